@@ -4,5 +4,5 @@ from .speck import SpeckCipher
 from .present import PresentCipher
 from .selective_encryption import SelectiveEncryption
 from .hmac_util import HMACUtil
-from .key_management import KeyManagement
+from .key_management import KeyManagement, KeyStore, LRUCache, RandomKeyPredistribution
 from .chacha20_cipher import ChaCha20Cipher  # Newly added
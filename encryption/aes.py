@@ -1,30 +1,76 @@
 # encryption/aes.py
+from cryptography.exceptions import InvalidTag
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import AESCCM
 from cryptography.hazmat.primitives.padding import PKCS7
 import os
 
+CCM_NONCE_SIZE = 13  # 802.15.4 CCM* nonce: 8-byte source address + 4-byte frame counter + security level
+CCM_COUNTER_SIZE = 4
+
 class AES:
-    def __init__(self, key=None):
+    KEY_SIZE = 16
+
+    def __init__(self, key=None, mode="CBC", tag_length=8, nonce_prefix=None):
+        """
+        Initialize AES with a reusable key context.
+
+        :param key: 16-byte key, random if omitted
+        :param mode: "CBC" (IV + PKCS7 padding) or "CCM" (AEAD, no padding)
+        :param tag_length: CCM tag length in bytes (4, 6, 8, 10, 12, 14 or 16)
+        :param nonce_prefix: Fixed 9-byte part of the CCM nonce (the sender address), random if omitted
+        """
         self.key = key if key else os.urandom(16)  # 128-bit key
+        self.mode = mode.upper()
+        if self.mode == "CBC":
+            self._algorithm = algorithms.AES(self.key)  # Key context shared by every packet
+        elif self.mode == "CCM":
+            self.tag_length = tag_length
+            self._aead = AESCCM(self.key, tag_length=tag_length)
+            self.nonce_prefix = nonce_prefix if nonce_prefix else os.urandom(CCM_NONCE_SIZE - CCM_COUNTER_SIZE)
+            if len(self.nonce_prefix) != CCM_NONCE_SIZE - CCM_COUNTER_SIZE:
+                raise ValueError("CCM nonce prefix must be 9 bytes")
+            self.frame_counter = 0
+        else:
+            raise ValueError(f"Unsupported AES mode: {mode}")
+        self.authenticated = self.mode == "CCM"  # Tag is produced by the cipher itself
+        self.algorithm = f"AES-{self.mode}"
 
-    def encrypt(self, data):
-        """Encrypt variable-length plaintext using AES with CBC mode."""
+    def encrypt(self, data, associated_data=None):
+        """Encrypt variable-length plaintext using AES in the configured mode."""
+        if self.mode == "CCM":
+            return self._encrypt_ccm(data, associated_data)
         iv = os.urandom(16)  # Generate a 16-byte IV
-        cipher = Cipher(algorithms.AES(self.key), modes.CBC(iv))
-        encryptor = cipher.encryptor()
+        encryptor = Cipher(self._algorithm, modes.CBC(iv)).encryptor()
         padder = PKCS7(128).padder()
         padded_data = padder.update(data) + padder.finalize()
         return iv + encryptor.update(padded_data) + encryptor.finalize()
 
-    def decrypt(self, encrypted_data):
+    def decrypt(self, encrypted_data, associated_data=None):
         """Decrypt variable-length ciphertext."""
+        if self.mode == "CCM":
+            return self._decrypt_ccm(encrypted_data, associated_data)
         iv = encrypted_data[:16]  # Extract the first 16 bytes as IV
         ciphertext = encrypted_data[16:]  # Remaining bytes are the ciphertext
-        cipher = Cipher(algorithms.AES(self.key), modes.CBC(iv))
-        decryptor = cipher.decryptor()
+        decryptor = Cipher(self._algorithm, modes.CBC(iv)).decryptor()
         unpadder = PKCS7(128).unpadder()
         padded_data = decryptor.update(ciphertext) + decryptor.finalize()
         return unpadder.update(padded_data) + unpadder.finalize()  # Unpad the plaintext
 
+    def _encrypt_ccm(self, data, associated_data):
+        """Return frame counter + ciphertext + tag; only the counter part of the nonce goes on air."""
+        if self.frame_counter >= 2 ** (8 * CCM_COUNTER_SIZE) - 1:
+            raise ValueError("CCM frame counter exhausted; rekey before sending more packets")
+        self.frame_counter += 1
+        counter = self.frame_counter.to_bytes(CCM_COUNTER_SIZE, byteorder="big")
+        return counter + self._aead.encrypt(self.nonce_prefix + counter, data, associated_data)
+
+    def _decrypt_ccm(self, encrypted_data, associated_data):
+        counter = bytes(encrypted_data[:CCM_COUNTER_SIZE])
+        try:
+            return self._aead.decrypt(self.nonce_prefix + counter, encrypted_data[CCM_COUNTER_SIZE:], associated_data)
+        except InvalidTag as e:
+            raise ValueError("CCM authentication failed") from e
+
     def get_key_bytes(self):
         return self.key
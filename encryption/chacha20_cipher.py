@@ -1,19 +1,61 @@
 # encryption/chacha20_cipher.py
 from Crypto.Cipher import ChaCha20
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
 import os
 
+NONCE_SIZE = 12  # 96-bit nonce
+COUNTER_SIZE = 4  # Per-packet counter carried on air; the rest of the nonce is a fixed sender prefix
+
 class ChaCha20Cipher:
-    def __init__(self):
-        self.key = os.urandom(32)  # 256-bit key
-        self.nonce = os.urandom(12)  # 96-bit nonce
+    KEY_SIZE = 32
+
+    def __init__(self, key=None, mode="stream", nonce_prefix=None):
+        """
+        Initialize ChaCha20 as a raw stream cipher or as the ChaCha20-Poly1305 AEAD.
+
+        Both modes use a fresh nonce per packet: the fixed prefix plus a packet counter that is
+        carried on air in front of the ciphertext, so a keystream is never reused under one key.
+
+        :param key: 32-byte key, random if omitted
+        :param mode: "stream" (plain ChaCha20) or "poly1305" (AEAD)
+        :param nonce_prefix: Fixed 8-byte part of the nonce (the sender address), random if omitted
+        """
+        self.key = key if key else os.urandom(32)  # 256-bit key
+        self.mode = mode.lower()
+        if self.mode == "poly1305":
+            self._aead = ChaCha20Poly1305(self.key)  # Key context shared by every packet
+        elif self.mode != "stream":
+            raise ValueError(f"Unsupported ChaCha20 mode: {mode}")
+        self.nonce_prefix = nonce_prefix if nonce_prefix else os.urandom(NONCE_SIZE - COUNTER_SIZE)
+        if len(self.nonce_prefix) != NONCE_SIZE - COUNTER_SIZE:
+            raise ValueError("ChaCha20 nonce prefix must be 8 bytes")
+        self.packet_counter = 0
+        self.authenticated = self.mode == "poly1305"  # Tag is produced by the cipher itself
+        self.algorithm = "ChaCha20-Poly1305" if self.authenticated else "ChaCha20"
+
+    def encrypt(self, data, associated_data=None):
+        """Return packet counter + ciphertext (+ 16-byte tag in poly1305 mode)."""
+        counter = self._next_counter()
+        if self.mode == "poly1305":
+            return counter + self._aead.encrypt(self.nonce_prefix + counter, data, associated_data)
+        return counter + ChaCha20.new(key=self.key, nonce=self.nonce_prefix + counter).encrypt(data)
 
-    def encrypt(self, data):
-        cipher = ChaCha20.new(key=self.key, nonce=self.nonce)
-        return cipher.encrypt(data)
+    def decrypt(self, data, associated_data=None):
+        counter = bytes(data[:COUNTER_SIZE])
+        if self.mode == "poly1305":
+            try:
+                return self._aead.decrypt(self.nonce_prefix + counter, data[COUNTER_SIZE:], associated_data)
+            except InvalidTag as e:
+                raise ValueError("ChaCha20-Poly1305 authentication failed") from e
+        return ChaCha20.new(key=self.key, nonce=self.nonce_prefix + counter).decrypt(data[COUNTER_SIZE:])
 
-    def decrypt(self, data):
-        cipher = ChaCha20.new(key=self.key, nonce=self.nonce)
-        return cipher.decrypt(data)
+    def _next_counter(self):
+        """Advance the packet counter; the nonce never repeats under one key."""
+        if self.packet_counter >= 2 ** (8 * COUNTER_SIZE) - 1:
+            raise ValueError("ChaCha20 packet counter exhausted; rekey before sending more packets")
+        self.packet_counter += 1
+        return self.packet_counter.to_bytes(COUNTER_SIZE, byteorder="big")
 
     def get_key_bytes(self):
         return self.key
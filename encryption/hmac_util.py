@@ -3,14 +3,67 @@ import hmac
 import hashlib
 
 class HMACUtil:
-    def __init__(self, key):
+    def __init__(self, key, tag_length=None):
+        """
+        Initialize HMAC-SHA256 with an optional tag truncation.
+
+        :param key: Key in bytes
+        :param tag_length: Binary tag length in bytes (4 to 32, typically 4/8/16); full digest if omitted
+        """
         if not isinstance(key, bytes):
             raise ValueError("Key must be in bytes format")
+        if tag_length is not None and not 4 <= tag_length <= hashlib.sha256().digest_size:
+            raise ValueError("Tag length must be between 4 and 32 bytes")
         self.key = key[:16]  # Use the first 16 bytes for HMAC
+        self.tag_length = tag_length if tag_length else hashlib.sha256().digest_size
+        # Keyed state with the ipad/opad blocks already absorbed; copied per message
+        self._keyed_hmac = hmac.new(self.key, digestmod=hashlib.sha256)
+
+    def _digest(self, data):
+        mac = self._keyed_hmac.copy()
+        mac.update(data)
+        return mac
 
     def generate_hmac(self, data):
-        return hmac.new(self.key, data, hashlib.sha256).hexdigest()
+        return self._digest(data).hexdigest()
 
     def verify_hmac(self, data, received_hmac):
         expected_hmac = self.generate_hmac(data)
         return hmac.compare_digest(expected_hmac, received_hmac)
+
+    def generate_tag(self, data):
+        """Return the raw HMAC digest truncated to tag_length bytes."""
+        return self._digest(data).digest()[:self.tag_length]
+
+    def verify_tag(self, data, received_tag):
+        """Check a binary tag in constant time."""
+        return hmac.compare_digest(self.generate_tag(data), bytes(received_tag))
+
+    def generate_many(self, messages):
+        """
+        Generate binary tags for a batch of messages.
+
+        :param messages: Iterable of byte strings
+        :return: List of tags, one per message
+        """
+        keyed_hmac = self._keyed_hmac
+        tag_length = self.tag_length
+        tags = []
+        for data in messages:
+            mac = keyed_hmac.copy()
+            mac.update(data)
+            tags.append(mac.digest()[:tag_length])
+        return tags
+
+    def verify_many(self, messages, received_tags):
+        """
+        Verify a batch of messages against their binary tags.
+
+        :param messages: Iterable of byte strings
+        :param received_tags: Iterable of tags, one per message
+        :return: List of booleans, True where the tag is valid
+        """
+        if len(messages) != len(received_tags):
+            raise ValueError("Number of tags does not match number of messages")
+        return [hmac.compare_digest(expected, bytes(received))
+                for expected, received in zip(self.generate_many(messages), received_tags)]
@@ -1,9 +1,282 @@
 # encryption/key_management.py
+from collections import OrderedDict
+import hashlib
+import hmac
+import math
 import os
 
+import numpy as np
+
+HASH_SIZE = hashlib.sha256().digest_size
+
+
+class LRUCache:
+    def __init__(self, capacity):
+        """
+        Bounded mapping that evicts the least recently used entry when full.
+
+        :param capacity: Maximum number of entries
+        """
+        if capacity < 1:
+            raise ValueError("Cache capacity must be at least 1")
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the cached value (marking it recently used) or None."""
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Insert or refresh an entry, evicting the least recently used one if the cache is full.
+
+        :return: The evicted (key, value) pair, or None
+        """
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.capacity:
+            self.evictions += 1
+            return self._entries.popitem(last=False)
+        return None
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Hit, miss and eviction counters."""
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": len(self)}
+
+
+def _encode_id(node_id):
+    """Unambiguous byte encoding of an integer or string node identifier."""
+    if isinstance(node_id, int):
+        return b"i" + node_id.to_bytes(8, "big", signed=True)
+    if isinstance(node_id, str):
+        return b"s" + node_id.encode()
+    if isinstance(node_id, bytes):
+        return b"b" + node_id
+    raise TypeError(f"Unsupported node id type: {type(node_id).__name__}")
+
+
+class KeyStore:
+    def __init__(self, master_secret=None, key_length=16, cache_size=4096, salt=b""):
+        """
+        Derive node and pairwise keys on demand from a master secret with HKDF-SHA256 (RFC 5869).
+
+        Keys are never stored except in a bounded LRU cache (or a preloaded array), so memory does
+        not grow with the number of nodes.
+
+        :param master_secret: Input keying material, random if omitted
+        :param key_length: Default derived key length in bytes
+        :param cache_size: Number of derived keys kept in the LRU cache
+        :param salt: HKDF salt
+        """
+        self.master_secret = master_secret if master_secret else os.urandom(32)
+        self.key_length = key_length
+        self.cache = LRUCache(cache_size)
+        self._prk = hmac.digest(salt or bytes(HASH_SIZE), self.master_secret, "sha256")  # HKDF-Extract, done once
+        self._preloaded = None  # Contiguous node keys of ids 0..n-1, see preload()
+
+    def derive(self, info, length=None):
+        """
+        HKDF-Expand the master secret for one context string.
+
+        :param info: Context bytes identifying the key
+        :param length: Key length in bytes (default key_length)
+        :return: Derived key bytes
+        """
+        length = length or self.key_length
+        if length > 255 * HASH_SIZE:
+            raise ValueError("HKDF cannot derive more than 8160 bytes")
+        if length <= HASH_SIZE:
+            return hmac.digest(self._prk, info + b"\x01", "sha256")[:length]  # Single-block fast path
+        output = b""
+        block = b""
+        counter = 1
+        while len(output) < length:
+            block = hmac.digest(self._prk, block + info + bytes([counter]), "sha256")
+            output += block
+            counter += 1
+        return output[:length]
+
+    def _lookup(self, info, length):
+        cache_key = (info, length)
+        key = self.cache.get(cache_key)
+        if key is None:
+            key = self.derive(info, length)
+            self.cache.put(cache_key, key)
+        return key
+
+    def node_key(self, node_id, length=None):
+        """
+        Key shared between a node and the network (e.g. the sink).
+
+        :param node_id: Integer, string or bytes node identifier
+        :param length: Key length in bytes (default key_length)
+        """
+        length = length or self.key_length
+        preloaded = self._preloaded
+        if preloaded is not None and length == self.key_length and isinstance(node_id, int) \
+                and 0 <= node_id * length < len(preloaded):
+            start = node_id * length
+            return preloaded[start:start + length]
+        return self._lookup(b"node:" + _encode_id(node_id), length)
+
+    def pair_key(self, node_a, node_b, length=None):
+        """
+        Pairwise key between two nodes; the same for (a, b) and (b, a).
+
+        :param length: Key length in bytes (default key_length)
+        """
+        first, second = sorted((_encode_id(node_a), _encode_id(node_b)))
+        return self._lookup(b"pair:" + first + second, length or self.key_length)
+
+    def preload(self, num_nodes):
+        """
+        Derive the node keys of nodes 0..num_nodes-1 into one contiguous array for bulk use.
+
+        Lookups of those nodes then bypass the cache; the array holds num_nodes * key_length bytes.
+
+        :param num_nodes: Number of integer node ids to preload
+        :return: The (num_nodes, key_length) uint8 key array
+        """
+        self._preloaded = b"".join(self.derive(b"node:" + _encode_id(node_id)) for node_id in range(num_nodes))
+        return np.frombuffer(self._preloaded, dtype=np.uint8).reshape(num_nodes, self.key_length)
+
+
+class RandomKeyPredistribution:
+    def __init__(self, num_nodes, pool_size=10000, ring_size=100, q=1, seed=None, store=None):
+        """
+        Eschenauer-Gligor (q=1) / q-composite random key predistribution.
+
+        Every node holds ring_size keys drawn without replacement from a pool of pool_size keys.
+        Rings are packed bitsets, one row of uint64 words per node, so shared-key discovery for
+        many neighbor pairs is an AND plus popcount over whole arrays.
+
+        :param num_nodes: Number of nodes
+        :param pool_size: Number of keys in the pool
+        :param ring_size: Keys per node
+        :param q: Shared keys two neighbors need to establish a link
+        :param seed: Seed for drawing the key rings
+        :param store: KeyStore the pool keys are derived from (a fresh one if omitted)
+        """
+        if not 0 < ring_size <= pool_size:
+            raise ValueError("Ring size must be between 1 and the pool size")
+        if q < 1:
+            raise ValueError("q must be at least 1")
+        self.num_nodes = num_nodes
+        self.pool_size = pool_size
+        self.ring_size = ring_size
+        self.q = q
+        self.store = store if store is not None else KeyStore()
+        self.words = (pool_size + 63) // 64
+        self.rings = self._draw_rings(np.random.default_rng(seed))
+
+    def _draw_rings(self, rng):
+        rings = np.zeros((self.num_nodes, self.words), dtype=np.uint64)
+        flat = rings.reshape(-1)
+        chunk = max(1, (1 << 22) // self.pool_size)  # Bounds the random matrix to ~32 MB
+        for start in range(0, self.num_nodes, chunk):
+            stop = min(start + chunk, self.num_nodes)
+            # The ring_size smallest of pool_size uniform draws index a uniform subset without replacement
+            keys = rng.random((stop - start, self.pool_size)).argpartition(self.ring_size - 1, axis=1)
+            keys = keys[:, :self.ring_size].astype(np.int64)
+            rows = np.arange(start, stop, dtype=np.int64)[:, None]
+            positions = rows * self.words + (keys >> 6)
+            np.bitwise_or.at(flat, positions.ravel(), (np.uint64(1) << (keys & 63).astype(np.uint64)).ravel())
+        return rings
+
+    def key_ids(self, node):
+        """Pool indices of the keys in a node's ring."""
+        bits = np.unpackbits(self.rings[node].view(np.uint8), bitorder="little")
+        return np.flatnonzero(bits[:self.pool_size])
+
+    def shared_counts(self, pairs, chunk_size=None):
+        """
+        Number of keys each neighbor pair shares.
+
+        :param pairs: (m, 2) array of node indices
+        :param chunk_size: Pairs processed per vectorized step; by default ~1 MB of ring words,
+                           which keeps the gathered rows in cache
+        :return: (m,) int array
+        """
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        chunk_size = chunk_size or max(1, (1 << 20) // (self.words * 8))
+        counts = np.empty(len(pairs), dtype=np.int64)
+        for start in range(0, len(pairs), chunk_size):
+            block = pairs[start:start + chunk_size]
+            shared = self.rings[block[:, 0]] & self.rings[block[:, 1]]
+            counts[start:start + len(block)] = np.bitwise_count(shared).sum(axis=1, dtype=np.int64)
+        return counts
+
+    def secure_links(self, pairs):
+        """Mask of the neighbor pairs that share at least q keys."""
+        return self.shared_counts(pairs) >= self.q
+
+    def connectivity(self, pairs):
+        """Fraction of neighbor pairs that can establish a secure link."""
+        pairs = np.asarray(pairs).reshape(-1, 2)
+        return float(self.secure_links(pairs).mean()) if len(pairs) else 0.0
+
+    def expected_connectivity(self):
+        """Analytical probability that two random rings share at least q keys."""
+        P, k = self.pool_size, self.ring_size
+
+        def log_comb(n, r):
+            return math.lgamma(n + 1) - math.lgamma(r + 1) - math.lgamma(n - r + 1)
+
+        below_q = 0.0
+        for i in range(min(self.q, k + 1)):
+            if 2 * (k - i) > P - i:
+                continue  # Rings this large cannot share only i keys
+            below_q += math.exp(log_comb(P, i) + log_comb(P - i, 2 * (k - i)) + log_comb(2 * (k - i), k - i)
+                                - 2 * log_comb(P, k))
+        return 1.0 - below_q
+
+    def ring_memory(self):
+        """Bytes of key material one node stores for its ring."""
+        return self.ring_size * self.store.key_length
+
+    def pool_key(self, index):
+        """Key number index of the pool."""
+        return self.store.derive(b"pool:" + index.to_bytes(4, "big"))
+
+    def link_key(self, node_a, node_b):
+        """
+        Link key of two neighbors: a hash over all their shared pool keys (q-composite).
+
+        :return: Key bytes, or None if the nodes share fewer than q keys
+        """
+        shared = np.flatnonzero(np.unpackbits((self.rings[node_a] & self.rings[node_b]).view(np.uint8),
+                                              bitorder="little")[:self.pool_size])
+        if len(shared) < self.q:
+            return None
+        digest = hashlib.sha256(b"".join(self.pool_key(int(index)) for index in shared)).digest()
+        return digest[:self.store.key_length]
+
+
 class KeyManagement:
-    def __init__(self):
+    def __init__(self, store=None):
+        """
+        Per-node key registry.
+
+        :param store: Optional KeyStore; node keys are then derived from its master secret instead of random
+        """
         self.keys = {}
+        self.store = store
+        self.key_rings = None
 
     def generate_key(self, node_id):
         """
@@ -11,7 +284,10 @@ class KeyManagement:
         
         :param node_id: Unique identifier for the node
         """
-        self.keys[node_id] = os.urandom(16)  # Generate a random 128-bit key
+        if self.store is not None:
+            self.keys[node_id] = self.store.node_key(node_id)
+        else:
+            self.keys[node_id] = os.urandom(16)  # Generate a random 128-bit key
 
     def get_key(self, node_id):
         """
@@ -22,6 +298,16 @@ class KeyManagement:
         """
         return self.keys.get(node_id, None)
 
+    def predistribute_key_rings(self, num_nodes, pool_size=10000, ring_size=100, q=1, seed=None):
+        """
+        Load every node with a random key ring (Eschenauer-Gligor / q-composite).
+
+        :return: The RandomKeyPredistribution holding the rings
+        """
+        self.key_rings = RandomKeyPredistribution(num_nodes, pool_size, ring_size, q, seed,
+                                                  self.store if self.store is not None else KeyStore())
+        return self.key_rings
+
     def distribute_keys(self, node_ids):
         """
         Generate and distribute keys to multiple nodes.
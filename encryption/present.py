@@ -1,35 +1,185 @@
 # encryption/present.py
 import os
+import numpy as np
+
+ROUNDS = 31
+SBOX = [0xC, 0x5, 0x6, 0xB, 0x9, 0x0, 0xA, 0xD, 0x3, 0xE, 0xF, 0x8, 0x4, 0x7, 0x1, 0x2]
+INV_SBOX = [SBOX.index(i) for i in range(16)]
+BLOCK_MASK = 0xFFFFFFFFFFFFFFFF
+KEY_MASK = (1 << 80) - 1
+
+
+def _p_layer(state):
+    """Bit permutation: bit i moves to position 16 * i mod 63 (bit 63 stays put)."""
+    out = 0
+    for i in range(64):
+        if (state >> i) & 1:
+            out |= 1 << (63 if i == 63 else (16 * i) % 63)
+    return out
+
+
+def _inv_p_layer(state):
+    out = 0
+    for i in range(64):
+        if (state >> (63 if i == 63 else (16 * i) % 63)) & 1:
+            out |= 1 << i
+    return out
+
+
+def _byte_sbox(byte, sbox):
+    return (sbox[byte >> 4] << 4) | sbox[byte & 0xF]
+
+
+def _build_tables():
+    """
+    Build the combined lookup tables.
+
+    SP_TABLES[j][b] is the pLayer image of the S-boxed byte b placed at byte position j,
+    so one encryption round is the OR of eight table lookups. The inverse round uses the
+    inverse pLayer tables followed by a byte-wise inverse S-box.
+    """
+    sp_tables = []
+    inv_p_tables = []
+    for j in range(8):
+        shift = 8 * j
+        sp_tables.append([_p_layer(_byte_sbox(b, SBOX) << shift) for b in range(256)])
+        inv_p_tables.append([_inv_p_layer(b << shift) for b in range(256)])
+    inv_sbox_bytes = [_byte_sbox(b, INV_SBOX) for b in range(256)]
+    return sp_tables, inv_p_tables, inv_sbox_bytes
+
+
+SP_TABLES, INV_P_TABLES, INV_SBOX_BYTES = _build_tables()
+SP_TABLES_NP = np.array(SP_TABLES, dtype=np.uint64)
+INV_P_TABLES_NP = np.array(INV_P_TABLES, dtype=np.uint64)
+INV_SBOX_BYTES_NP = np.array(INV_SBOX_BYTES, dtype=np.uint64)
+
 
 class PresentCipher:
+    algorithm = "PRESENT-80"
+    KEY_SIZE = 10
+    block_size = 8
+    # Below this many blocks the scalar path beats the NumPy call overhead
+    batch_threshold = 32
+
     def __init__(self, key=None):
         self.key = key if key else os.urandom(10)  # 80-bit key
+        if len(self.key) != 10:
+            raise ValueError("PRESENT-80 requires a 10-byte key")
         self.key_int = int.from_bytes(self.key, byteorder="big")
+        self.round_keys = self._expand_key(self.key_int)
+        self._round_keys_np = np.array(self.round_keys, dtype=np.uint64)
+
+    @staticmethod
+    def _expand_key(key_int):
+        """Compute the 32 round keys of PRESENT-80."""
+        round_keys = []
+        k = key_int
+        for counter in range(1, ROUNDS + 2):
+            round_keys.append(k >> 16)
+            k = ((k << 61) | (k >> 19)) & KEY_MASK
+            k = (SBOX[k >> 76] << 76) | (k & ((1 << 76) - 1))
+            k ^= counter << 15
+        return round_keys
+
+    def encrypt_block(self, state):
+        """Encrypt one 64-bit block given as an integer."""
+        t0, t1, t2, t3, t4, t5, t6, t7 = SP_TABLES
+        round_keys = self.round_keys
+        for i in range(ROUNDS):
+            state ^= round_keys[i]
+            state = (t0[state & 0xFF] | t1[(state >> 8) & 0xFF] | t2[(state >> 16) & 0xFF]
+                     | t3[(state >> 24) & 0xFF] | t4[(state >> 32) & 0xFF]
+                     | t5[(state >> 40) & 0xFF] | t6[(state >> 48) & 0xFF] | t7[state >> 56])
+        return state ^ round_keys[ROUNDS]
+
+    def decrypt_block(self, state):
+        """Decrypt one 64-bit block given as an integer."""
+        p0, p1, p2, p3, p4, p5, p6, p7 = INV_P_TABLES
+        s = INV_SBOX_BYTES
+        round_keys = self.round_keys
+        state ^= round_keys[ROUNDS]
+        for i in range(ROUNDS - 1, -1, -1):
+            state = (p0[state & 0xFF] | p1[(state >> 8) & 0xFF] | p2[(state >> 16) & 0xFF]
+                     | p3[(state >> 24) & 0xFF] | p4[(state >> 32) & 0xFF]
+                     | p5[(state >> 40) & 0xFF] | p6[(state >> 48) & 0xFF] | p7[state >> 56])
+            state = (s[state & 0xFF] | s[(state >> 8) & 0xFF] << 8 | s[(state >> 16) & 0xFF] << 16
+                     | s[(state >> 24) & 0xFF] << 24 | s[(state >> 32) & 0xFF] << 32
+                     | s[(state >> 40) & 0xFF] << 40 | s[(state >> 48) & 0xFF] << 48
+                     | s[state >> 56] << 56)
+            state ^= round_keys[i]
+        return state
+
+    def encrypt_blocks(self, blocks):
+        """
+        Encrypt many blocks at once with vectorized table lookups.
+
+        :param blocks: uint64 array of 64-bit blocks
+        :return: New uint64 array with the encrypted blocks
+        """
+        state = np.array(blocks, dtype=np.uint64)
+        index = np.empty_like(state)
+        acc = np.empty_like(state)
+        for i in range(ROUNDS):
+            state ^= self._round_keys_np[i]
+            acc[:] = 0
+            for j in range(8):
+                np.right_shift(state, np.uint64(8 * j), out=index)
+                index &= np.uint64(0xFF)
+                acc |= SP_TABLES_NP[j][index]
+            state, acc = acc, state
+        state ^= self._round_keys_np[ROUNDS]
+        return state
+
+    def decrypt_blocks(self, blocks):
+        """
+        Decrypt many blocks at once with vectorized table lookups.
+
+        :param blocks: uint64 array of 64-bit blocks
+        :return: New uint64 array with the decrypted blocks
+        """
+        state = np.array(blocks, dtype=np.uint64)
+        index = np.empty_like(state)
+        acc = np.empty_like(state)
+        state ^= self._round_keys_np[ROUNDS]
+        for i in range(ROUNDS - 1, -1, -1):
+            acc[:] = 0
+            for j in range(8):
+                np.right_shift(state, np.uint64(8 * j), out=index)
+                index &= np.uint64(0xFF)
+                acc |= INV_P_TABLES_NP[j][index]
+            state[:] = 0
+            for j in range(8):
+                shift = np.uint64(8 * j)
+                np.right_shift(acc, shift, out=index)
+                index &= np.uint64(0xFF)
+                state |= INV_SBOX_BYTES_NP[index] << shift
+            state ^= self._round_keys_np[i]
+        return state
 
     def encrypt(self, plaintext):
         """Encrypt variable-length plaintext by padding and chunking."""
-        block_size = 8
-        plaintext = self.pad_data(plaintext, block_size)  # Apply padding
-        encrypted_chunks = []
-        for i in range(0, len(plaintext), block_size):
-            chunk = plaintext[i:i + block_size]
-            chunk_int = int.from_bytes(chunk, byteorder="big")
-            encrypted_int = (chunk_int ^ self.key_int) & 0xFFFFFFFFFFFFFFFF
-            encrypted_chunks.append(encrypted_int.to_bytes(block_size, byteorder="big"))
-        return b"".join(encrypted_chunks)
+        plaintext = self.pad_data(plaintext, self.block_size)  # Apply padding
+        return self._process(plaintext, self.encrypt_block, self.encrypt_blocks)
 
     def decrypt(self, ciphertext):
         """Decrypt variable-length ciphertext by chunking and unpadding."""
-        block_size = 8
-        decrypted_chunks = []
-        for i in range(0, len(ciphertext), block_size):
-            chunk = ciphertext[i:i + block_size]
-            chunk_int = int.from_bytes(chunk, byteorder="big")
-            decrypted_int = (chunk_int ^ self.key_int) & 0xFFFFFFFFFFFFFFFF
-            decrypted_chunks.append(decrypted_int.to_bytes(block_size, byteorder="big"))
-        decrypted_data = b"".join(decrypted_chunks)
+        if len(ciphertext) % self.block_size:
+            raise ValueError("Ciphertext length must be a multiple of the block size")
+        decrypted_data = self._process(ciphertext, self.decrypt_block, self.decrypt_blocks)
         return self.unpad_data(decrypted_data)
 
+    def _process(self, data, block_func, blocks_func):
+        """Run every 8-byte block of data through the scalar or the batch path."""
+        block_size = self.block_size
+        if len(data) // block_size >= self.batch_threshold:
+            blocks = np.frombuffer(data, dtype=">u8")
+            return blocks_func(blocks).astype(">u8").tobytes()
+        out = bytearray(len(data))
+        for i in range(0, len(data), block_size):
+            chunk_int = int.from_bytes(data[i:i + block_size], byteorder="big")
+            out[i:i + block_size] = block_func(chunk_int).to_bytes(block_size, byteorder="big")
+        return bytes(out)
+
     def pad_data(self, data, block_size):
         """Pad data to make its length a multiple of the block size."""
         padding_length = block_size - (len(data) % block_size)
@@ -1,65 +1,117 @@
-from cryptography.hazmat.primitives.padding import PKCS7
+import struct
+
+# Length of the encrypted critical section, written in front of it
+LENGTH_PREFIX = struct.Struct("!H")
 
 
 class SelectiveEncryption:
-    def __init__(self, base_encryption, encryption_ratio=0.5):
+    def __init__(self, base_encryption, encryption_ratio=0.5, critical_ranges=None):
         """
-        Initialize with a base encryption algorithm and the ratio of data to encrypt.
+        Initialize with a base encryption algorithm and the part of the data to encrypt.
 
         :param base_encryption: An instance of an encryption class (e.g., AES)
         :param encryption_ratio: Float between 0 and 1 indicating the portion to encrypt
+        :param critical_ranges: Optional list of (start, stop) byte ranges or slices to encrypt
+                                instead of the leading encryption_ratio portion
         """
         self.base_encryption = base_encryption
         self.encryption_ratio = encryption_ratio
-        self.block_size = 128  # Block size in bits (16 bytes for AES)
+        self.critical_ranges = None
+        if critical_ranges is not None:
+            ranges = []
+            for r in critical_ranges:
+                start, stop = (r.start or 0, r.stop) if isinstance(r, slice) else r
+                if start < 0 or (stop is not None and stop < start):
+                    raise ValueError(f"Invalid critical range: {r}")
+                ranges.append((start, stop))
+            self.critical_ranges = sorted(ranges, key=lambda r: r[0])
 
-    def _apply_padding(self, data):
-        """Apply PKCS7 padding to the data."""
-        padder = PKCS7(self.block_size).padder()
-        return padder.update(data) + padder.finalize()
+    def _critical_spans(self, length):
+        """Return the sorted, non-overlapping (start, stop) spans to encrypt for data of this length."""
+        if self.critical_ranges is None:
+            return [(0, int(length * self.encryption_ratio))]
+        spans = []
+        for start, stop in self.critical_ranges:
+            stop = length if stop is None else min(stop, length)
+            if start >= stop:
+                continue
+            if spans and start <= spans[-1][1]:
+                spans[-1] = (spans[-1][0], max(spans[-1][1], stop))
+            else:
+                spans.append((start, stop))
+        return spans
 
-    def _remove_padding(self, data):
-        """Remove PKCS7 padding from the data."""
-        unpadder = PKCS7(self.block_size).unpadder()
-        return unpadder.update(data) + unpadder.finalize()
+    @property
+    def algorithm(self):
+        """Cipher that does the actual work, for cost accounting."""
+        return self.base_encryption.algorithm
 
-    def encrypt(self, data):
-        """Encrypt only a portion of the data based on encryption_ratio."""
-        # Split data into critical and non-critical portions
-        split_index = int(len(data) * self.encryption_ratio)
-        critical_data = data[:split_index]
-        non_critical_data = data[split_index:]
+    def encrypted_length(self, length):
+        """Number of plaintext bytes that go through the base cipher for data of this length."""
+        return sum(stop - start for start, stop in self._critical_spans(length))
 
-        # Pad the critical portion
-        padded_critical_data = self._apply_padding(critical_data)
+    @staticmethod
+    def _complement(spans, length):
+        """Return the spans of data left in the clear."""
+        clear = []
+        position = 0
+        for start, stop in spans:
+            if start > position:
+                clear.append((position, start))
+            position = stop
+        if position < length:
+            clear.append((position, length))
+        return clear
 
-        # Encrypt the padded critical portion
-        encrypted_critical = self.base_encryption.encrypt(padded_critical_data)
+    def encrypt(self, data):
+        """Encrypt only the critical part of the data and prefix it with its encrypted length."""
+        view = memoryview(data)
+        spans = self._critical_spans(len(view))
+        if self.critical_ranges is None:
+            split_index = spans[0][1]
+            critical_data = bytes(view[:split_index])
+            non_critical_data = view[split_index:]
+        else:
+            critical_data = b"".join(view[start:stop] for start, stop in spans)
+            non_critical_data = b"".join(view[start:stop] for start, stop in self._complement(spans, len(view)))
 
-        # Combine encrypted critical data and non-critical data using delimiter
-        delimiter = b"||"
-        return encrypted_critical + delimiter + non_critical_data
+        # The base cipher applies its own padding, if it needs any
+        encrypted_critical = self.base_encryption.encrypt(critical_data)
+        if len(encrypted_critical) > 0xFFFF:
+            raise ValueError("Encrypted critical section too large for the length prefix")
+        return LENGTH_PREFIX.pack(len(encrypted_critical)) + encrypted_critical + non_critical_data
 
     def decrypt(self, encrypted_data):
         """Decrypt only the encrypted portion of the data."""
-        # Split encrypted critical data and non-critical data using the delimiter
-        delimiter = b"||"
-        if delimiter not in encrypted_data:
-            raise ValueError("Data does not contain expected delimiter '||'.")
-        
-        encrypted_critical, non_critical_data = encrypted_data.split(delimiter, maxsplit=1)
+        view = memoryview(encrypted_data)
+        if len(view) < LENGTH_PREFIX.size:
+            raise ValueError("Data too short for selective encryption header")
+        (critical_length,) = LENGTH_PREFIX.unpack_from(view, 0)
+        end = LENGTH_PREFIX.size + critical_length
+        if end > len(view):
+            raise ValueError("Encrypted critical section exceeds data length")
 
         # Decrypt the critical portion
-        decrypted_critical = self.base_encryption.decrypt(encrypted_critical)
-
-        # Remove padding from the critical portion
-        try:
-            unpadded_critical_data = self._remove_padding(decrypted_critical)
-        except ValueError as e:
-            raise ValueError("Invalid padding during decryption") from e
+        decrypted_critical = self.base_encryption.decrypt(view[LENGTH_PREFIX.size:end])
+        non_critical_data = view[end:]
+        if self.critical_ranges is None:
+            return decrypted_critical + non_critical_data
 
-        # Combine decrypted critical data and non-critical data
-        return unpadded_critical_data + non_critical_data
+        # Scatter both parts back to their original positions
+        length = len(decrypted_critical) + len(non_critical_data)
+        spans = self._critical_spans(length)
+        if sum(stop - start for start, stop in spans) != len(decrypted_critical):
+            raise ValueError("Decrypted critical section does not match the configured ranges")
+        output = bytearray(length)
+        position = 0
+        for start, stop in spans:
+            output[start:stop] = decrypted_critical[position:position + stop - start]
+            position += stop - start
+        position = 0
+        for start, stop in self._complement(spans, length):
+            output[start:stop] = non_critical_data[position:position + stop - start]
+            position += stop - start
+        return bytes(output)
 
     def get_key_bytes(self):
         """Delegate to the base encryption's `get_key_bytes` method."""
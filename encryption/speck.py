@@ -1,35 +1,140 @@
 # encryption/speck.py
 import os
+import numpy as np
+
+# SPECK-64/128 parameters: 32-bit words, 4-word key, 27 rounds, rotations 8/3
+WORD_MASK = 0xFFFFFFFF
+ROUNDS = 27
+ALPHA = 8
+BETA = 3
+
+
+def _ror(x, r):
+    return ((x >> r) | (x << (32 - r))) & WORD_MASK
+
+
+def _rol(x, r):
+    return ((x << r) | (x >> (32 - r))) & WORD_MASK
+
 
 class SpeckCipher:
+    algorithm = "SPECK-64/128"
+    KEY_SIZE = 16
+    block_size = 8
+    # Below this many blocks the scalar path beats the NumPy call overhead
+    batch_threshold = 64
+
     def __init__(self, key=None):
-        self.key_bytes = key if key else os.urandom(8)  # 8-byte (64-bit) key
-        self.key = int.from_bytes(self.key_bytes, byteorder="big")
+        self.key_bytes = key if key else os.urandom(16)  # 16-byte (128-bit) key
+        if len(self.key_bytes) != 16:
+            raise ValueError("SPECK-64/128 requires a 16-byte key")
+        self.round_keys = self._expand_key(self.key_bytes)
+        self._round_keys_np = np.array(self.round_keys, dtype=np.uint32)
+
+    @staticmethod
+    def _expand_key(key_bytes):
+        """Compute the 27 round keys from a 128-bit key (little-endian words)."""
+        k = int.from_bytes(key_bytes[0:4], byteorder="little")
+        l = [int.from_bytes(key_bytes[i:i + 4], byteorder="little") for i in (4, 8, 12)]
+        round_keys = [k]
+        for i in range(ROUNDS - 1):
+            new_l = ((k + _ror(l[i], ALPHA)) & WORD_MASK) ^ i
+            k = _rol(k, BETA) ^ new_l
+            l.append(new_l)
+            round_keys.append(k)
+        return round_keys
+
+    def encrypt_block(self, y, x):
+        """Encrypt one block given as its (low, high) 32-bit words."""
+        for k in self.round_keys:
+            x = ((_ror(x, ALPHA) + y) & WORD_MASK) ^ k
+            y = _rol(y, BETA) ^ x
+        return y, x
+
+    def decrypt_block(self, y, x):
+        """Decrypt one block given as its (low, high) 32-bit words."""
+        for k in reversed(self.round_keys):
+            y = _ror(y ^ x, BETA)
+            x = _rol(((x ^ k) - y) & WORD_MASK, ALPHA)
+        return y, x
+
+    def encrypt_blocks(self, blocks):
+        """
+        Encrypt many blocks at once.
+
+        :param blocks: uint32 array of shape (n, 2) holding the (low, high) words of each block
+        :return: New uint32 array of the same shape with the encrypted blocks
+        """
+        blocks = np.asarray(blocks, dtype=np.uint32)
+        y = blocks[:, 0].copy()
+        x = blocks[:, 1].copy()
+        tmp = np.empty_like(x)
+        for k in self._round_keys_np:
+            # x = (ROR(x, 8) + y) ^ k
+            np.right_shift(x, ALPHA, out=tmp)
+            np.left_shift(x, 32 - ALPHA, out=x)
+            x |= tmp
+            x += y
+            x ^= k
+            # y = ROL(y, 3) ^ x
+            np.right_shift(y, 32 - BETA, out=tmp)
+            np.left_shift(y, BETA, out=y)
+            y |= tmp
+            y ^= x
+        return np.stack((y, x), axis=1)
+
+    def decrypt_blocks(self, blocks):
+        """
+        Decrypt many blocks at once.
+
+        :param blocks: uint32 array of shape (n, 2) holding the (low, high) words of each block
+        :return: New uint32 array of the same shape with the decrypted blocks
+        """
+        blocks = np.asarray(blocks, dtype=np.uint32)
+        y = blocks[:, 0].copy()
+        x = blocks[:, 1].copy()
+        tmp = np.empty_like(x)
+        for k in self._round_keys_np[::-1]:
+            # y = ROR(y ^ x, 3)
+            y ^= x
+            np.left_shift(y, 32 - BETA, out=tmp)
+            np.right_shift(y, BETA, out=y)
+            y |= tmp
+            # x = ROL((x ^ k) - y, 8)
+            x ^= k
+            x -= y
+            np.right_shift(x, 32 - ALPHA, out=tmp)
+            np.left_shift(x, ALPHA, out=x)
+            x |= tmp
+        return np.stack((y, x), axis=1)
 
     def encrypt(self, plaintext):
         """Encrypt variable-length plaintext by padding and chunking."""
-        block_size = 8
-        plaintext = self.pad_data(plaintext, block_size)  # Apply padding
-        encrypted_chunks = []
-        for i in range(0, len(plaintext), block_size):
-            chunk = plaintext[i:i + block_size]
-            chunk_int = int.from_bytes(chunk, byteorder="big")
-            encrypted_int = (chunk_int ^ self.key) & 0xFFFFFFFFFFFFFFFF
-            encrypted_chunks.append(encrypted_int.to_bytes(block_size, byteorder="big"))
-        return b"".join(encrypted_chunks)
+        plaintext = self.pad_data(plaintext, self.block_size)  # Apply padding
+        return self._process(plaintext, self.encrypt_block, self.encrypt_blocks)
 
     def decrypt(self, ciphertext):
         """Decrypt variable-length ciphertext by chunking and unpadding."""
-        block_size = 8
-        decrypted_chunks = []
-        for i in range(0, len(ciphertext), block_size):
-            chunk = ciphertext[i:i + block_size]
-            chunk_int = int.from_bytes(chunk, byteorder="big")
-            decrypted_int = (chunk_int ^ self.key) & 0xFFFFFFFFFFFFFFFF
-            decrypted_chunks.append(decrypted_int.to_bytes(block_size, byteorder="big"))
-        decrypted_data = b"".join(decrypted_chunks)
+        if len(ciphertext) % self.block_size:
+            raise ValueError("Ciphertext length must be a multiple of the block size")
+        decrypted_data = self._process(ciphertext, self.decrypt_block, self.decrypt_blocks)
         return self.unpad_data(decrypted_data)
 
+    def _process(self, data, block_func, blocks_func):
+        """Run every 8-byte block of data through the scalar or the batch path."""
+        num_blocks = len(data) // self.block_size
+        if num_blocks >= self.batch_threshold:
+            words = np.frombuffer(data, dtype="<u4").reshape(-1, 2)
+            return blocks_func(words).astype("<u4").tobytes()
+        out = bytearray(len(data))
+        for i in range(0, len(data), self.block_size):
+            y = int.from_bytes(data[i:i + 4], byteorder="little")
+            x = int.from_bytes(data[i + 4:i + 8], byteorder="little")
+            y, x = block_func(y, x)
+            out[i:i + 4] = y.to_bytes(4, byteorder="little")
+            out[i + 4:i + 8] = x.to_bytes(4, byteorder="little")
+        return bytes(out)
+
     def pad_data(self, data, block_size):
         """Pad data to make its length a multiple of the block size."""
         padding_length = block_size - (len(data) % block_size)
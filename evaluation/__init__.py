@@ -1,4 +1,15 @@
 # evaluation/__init__.py
 from .performance import PerformanceEvaluator
-from .visualizer import Visualizer
-from .report_generator import ReportGenerator
+from .online_stats import Distribution, DDSketch, RunningStats
+
+# Plotting and PDF output pull in matplotlib, seaborn and reportlab; load them on first use (PEP 562)
+_LAZY = {"Visualizer": ".visualizer", "ReportGenerator": ".report_generator"}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,160 @@
+# evaluation/benchmark.py
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+
+from evaluation.performance import PerformanceEvaluator
+from simulation.parallel_runner import CIPHERS, PROTOCOLS, build_protocols
+from simulation.sweep import code_version
+
+PAYLOAD_SIZES = (8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+SELECTIVE_RATIOS = (0.25, 0.5, 0.75)
+
+
+def cipher_targets(ratios=SELECTIVE_RATIOS):
+    """Cipher factories by benchmark name; SelectiveAES appears once per encryption ratio."""
+    targets = {name: factory for name, factory in CIPHERS.items() if name != "SelectiveAES"}
+    for ratio in ratios:
+        targets[f"SelectiveAES@{ratio:g}"] = lambda ratio=ratio: CIPHERS["SelectiveAES"](encryption_ratio=ratio)
+    return targets
+
+
+def protocol_targets():
+    """Every protocol wrapper over every cipher, named as in main.py (e.g. "OpenWSN_AES")."""
+    return [f"{protocol}_{cipher}" for protocol in PROTOCOLS for cipher in CIPHERS]
+
+
+def make_payload(size):
+    """Deterministic, non-repeating-looking payload of the given size."""
+    return bytes((i * 31 + 7) & 0xFF for i in range(size))
+
+
+def operations(kind, instance, payload):
+    """
+    The timed operations for one target and payload.
+
+    :return: List of (operation name, callable, args)
+    """
+    if kind == "cipher":
+        ciphertext = instance.encrypt(payload)
+        return [("encrypt", instance.encrypt, (payload,)), ("decrypt", instance.decrypt, (ciphertext,))]
+    if hasattr(instance, "prepare_packet"):
+        headers = {"Type": "Data", "Source": 1, "Destination": 2}
+        packet = instance.prepare_packet(payload, headers)
+        return [("send", instance.prepare_packet, (payload, headers)), ("receive", instance.process_packet, (packet,))]
+    packet = instance.query_response("Temperature", payload, 1, 2)
+    return [("send", instance.query_response, ("Temperature", payload, 1, 2)),
+            ("receive", instance.process_response, (packet,))]
+
+
+class CipherBenchmark:
+    def __init__(self, sizes=PAYLOAD_SIZES, warmup=10, repetitions=30, targets=None, evaluator=None):
+        """
+        Micro-benchmark every cipher and protocol wrapper across payload sizes.
+
+        :param sizes: Payload sizes in bytes
+        :param warmup: Untimed calls before each measurement
+        :param repetitions: Timed samples per (target, operation, size)
+        :param targets: Optional subset of target names (cipher names or protocol names such as "DASH7_AES")
+        :param evaluator: PerformanceEvaluator used for timing
+        """
+        self.sizes = list(sizes)
+        self.warmup = warmup
+        self.repetitions = repetitions
+        self.targets = set(targets) if targets else None
+        self.evaluator = evaluator or PerformanceEvaluator()
+        self.results = []
+
+    def _selected(self, name):
+        return self.targets is None or name in self.targets
+
+    def _instances(self):
+        for name, factory in cipher_targets().items():
+            if self._selected(name):
+                yield "cipher", name, factory()
+        names = [name for name in protocol_targets() if self._selected(name)]
+        for name, protocol in build_protocols(names).items():
+            yield "protocol", name, protocol
+
+    def measure(self, kind, name, instance, size):
+        """Time every operation of one target at one payload size."""
+        records = []
+        for operation, func, args in operations(kind, instance, make_payload(size)):
+            samples, loops = self.evaluator.measure_repeated(
+                func, *args, warmup=self.warmup, repetitions=self.repetitions)
+            median = statistics.median(samples)
+            records.append({
+                "target": name,
+                "kind": kind,
+                "operation": operation,
+                "size": size,
+                "loops": loops,
+                "median": median,
+                "mean": statistics.fmean(samples),
+                "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+                "mb_per_s": size / median / 1e6 if median > 0 else 0.0,
+                "packets_per_s": 1 / median if median > 0 else 0.0,
+                "samples": samples,
+            })
+        return records
+
+    def run(self):
+        """
+        Run the benchmark.
+
+        :return: Report dictionary with "meta" and "results" entries
+        """
+        self.results = []
+        for kind, name, instance in self._instances():
+            for size in self.sizes:
+                self.results.extend(self.measure(kind, name, instance, size))
+            print(f"Benchmarked {name}")
+        return self.report()
+
+    def report(self):
+        """Machine-readable report: run metadata plus one record per (target, operation, size)."""
+        return {
+            "meta": {
+                "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "machine": platform.machine(),
+                "code_version": code_version(),
+                "warmup": self.warmup,
+                "repetitions": self.repetitions,
+                "sizes": self.sizes,
+            },
+            "results": self.results,
+        }
+
+    def write_json(self, path="results/benchmark.json"):
+        """
+        Write the report as JSON.
+
+        :param path: Output JSON path
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        print(f"Benchmark results written to {path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cipher and protocol micro-benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(PAYLOAD_SIZES), help="Payload sizes in bytes")
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed calls per measurement")
+    parser.add_argument("--repetitions", type=int, default=30, help="Timed samples per measurement")
+    parser.add_argument("--targets", nargs="+", help="Only these ciphers/protocols (e.g. AES DASH7_SPECK)")
+    parser.add_argument("--output", default="results/benchmark.json", help="Output JSON path")
+    args = parser.parse_args(argv)
+
+    benchmark = CipherBenchmark(args.sizes, args.warmup, args.repetitions, args.targets)
+    benchmark.run()
+    benchmark.write_json(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+# evaluation/online_stats.py
+import math
+
+import numpy as np
+
+
+class RunningStats:
+    def __init__(self):
+        """Count, mean, variance, min and max of a stream in constant memory (Welford's algorithm)."""
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared deviations from the mean
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value, count=1):
+        """Add value, count times."""
+        if count <= 0:
+            return
+        value = float(value)
+        total = self.count + count
+        delta = value - self.mean
+        self.mean += delta * count / total
+        self.m2 += delta * delta * self.count * count / total
+        self.count = total
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def add_array(self, values):
+        """Add every element of an array (one vectorized pass, then a merge)."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if not len(values):
+            return
+        batch = RunningStats()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        self.merge(batch)
+
+    def merge(self, other):
+        """Fold another RunningStats into this one (Chan et al.'s parallel update); exact up to rounding."""
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        """Sample variance (0 for fewer than two values)."""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def to_dict(self):
+        return {"count": self.count, "mean": self.mean, "m2": self.m2, "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, state):
+        stats = cls()
+        stats.count, stats.mean, stats.m2 = state["count"], state["mean"], state["m2"]
+        stats.min, stats.max = state["min"], state["max"]
+        return stats
+
+
+class DDSketch:
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048, min_value=1e-12):
+        """
+        Quantile sketch of non-negative values with a relative error guarantee (Masson et al., DDSketch).
+
+        Values fall into logarithmic buckets of ratio gamma, so any quantile is returned within
+        relative_accuracy of the true value. Two sketches with the same accuracy merge exactly by
+        adding their bucket counts.
+
+        :param relative_accuracy: Relative error bound of every quantile
+        :param max_buckets: Bucket limit; beyond it the lowest buckets are collapsed together
+        :param min_value: Values below this are counted as zero
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("Relative accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.offset = 0  # Bucket index of counts[0]
+        self.zero_count = 0
+        self.count = 0
+
+    def _index(self, value):
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _extend(self, low, high):
+        """Grow the bucket array to cover indices low..high, collapsing the lowest buckets past max_buckets."""
+        if len(self.counts):
+            low, high = min(low, self.offset), max(high, self.offset + len(self.counts) - 1)
+        low = max(low, high - self.max_buckets + 1)
+        if len(self.counts) and (low, high) == (self.offset, self.offset + len(self.counts) - 1):
+            return
+        counts = np.zeros(high - low + 1, dtype=np.int64)
+        if len(self.counts):
+            start = self.offset - low
+            if start < 0:  # Collapse buckets below the new range into its lowest bucket
+                counts[0] += self.counts[:-start].sum()
+                counts[:len(self.counts) + start] += self.counts[-start:]
+            else:
+                counts[start:start + len(self.counts)] = self.counts
+        self.counts = counts
+        self.offset = low
+
+    def _bucket(self, index):
+        """Position of a bucket index in counts (the lowest bucket for collapsed indices)."""
+        return max(index - self.offset, 0)
+
+    def add(self, value, count=1):
+        """Add a non-negative value, count times."""
+        if value < 0:
+            raise ValueError("DDSketch only tracks non-negative values")
+        self.count += count
+        if value < self.min_value:
+            self.zero_count += count
+            return
+        index = self._index(value)
+        if not self.offset <= index < self.offset + len(self.counts):
+            self._extend(index, index)
+        self.counts[self._bucket(index)] += count
+
+    def add_array(self, values):
+        """Add every element of an array of non-negative values."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if not len(values):
+            return
+        if values.min() < 0:
+            raise ValueError("DDSketch only tracks non-negative values")
+        self.count += len(values)
+        positive = values[values >= self.min_value]
+        self.zero_count += len(values) - len(positive)
+        if not len(positive):
+            return
+        indices = np.ceil(np.log(positive) / self._log_gamma).astype(np.int64)
+        self._extend(int(indices.min()), int(indices.max()))
+        np.add.at(self.counts, np.maximum(indices - self.offset, 0), 1)
+
+    def merge(self, other):
+        """Add another sketch's counts to this one; both must have the same relative accuracy."""
+        if other.gamma != self.gamma:
+            raise ValueError("Only sketches with the same relative accuracy can be merged")
+        self.count += other.count
+        self.zero_count += other.zero_count
+        if len(other.counts):
+            self._extend(other.offset, other.offset + len(other.counts) - 1)
+            start = other.offset - self.offset
+            if start < 0:
+                self.counts[0] += other.counts[:-start].sum()
+                self.counts[:len(other.counts) + start] += other.counts[-start:]
+            else:
+                self.counts[start:start + len(other.counts)] += other.counts
+        return self
+
+    def quantile(self, q):
+        """
+        Value at quantile q (0 to 1), within the relative accuracy.
+
+        :return: The estimate, or nan for an empty sketch
+        """
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        position = int(np.searchsorted(np.cumsum(self.counts), rank - self.zero_count, side="right"))
+        position = min(position, len(self.counts) - 1)
+        return 2 * self.gamma ** (self.offset + position) / (self.gamma + 1)
+
+    def to_dict(self):
+        nonzero = np.flatnonzero(self.counts)
+        return {"relative_accuracy": self.relative_accuracy, "zero_count": self.zero_count,
+                "buckets": dict(zip((self.offset + nonzero).tolist(), self.counts[nonzero].tolist()))}
+
+    @classmethod
+    def from_dict(cls, state):
+        sketch = cls(state["relative_accuracy"])
+        sketch.zero_count = state["zero_count"]
+        buckets = {int(index): count for index, count in state["buckets"].items()}  # JSON turns keys into strings
+        sketch.count = sketch.zero_count + sum(buckets.values())
+        if buckets:
+            sketch._extend(min(buckets), max(buckets))
+            for index, count in buckets.items():
+                sketch.counts[sketch._bucket(index)] += count
+        return sketch
+
+
+class Distribution:
+    def __init__(self, relative_accuracy=0.01):
+        """
+        Streaming summary of one metric: exact moments plus sketched percentiles, in constant memory.
+
+        :param relative_accuracy: Relative error bound of the percentiles
+        """
+        self.stats = RunningStats()
+        self.sketch = DDSketch(relative_accuracy)
+
+    @property
+    def count(self):
+        return self.stats.count
+
+    def add(self, value, count=1):
+        """Add value, count times."""
+        self.stats.add(value, count)
+        self.sketch.add(value, count)
+
+    def add_array(self, values):
+        """Add every element of an array."""
+        self.stats.add_array(values)
+        self.sketch.add_array(values)
+
+    def merge(self, other):
+        """Fold another Distribution (e.g. from another node or worker) into this one."""
+        self.stats.merge(other.stats)
+        self.sketch.merge(other.sketch)
+        return self
+
+    def quantile(self, q):
+        """Sketched quantile, clamped to the exact minimum and maximum."""
+        if self.count == 0:
+            return math.nan
+        return min(max(self.sketch.quantile(q), self.stats.min), self.stats.max)
+
+    def summary(self, percentiles=(50, 95, 99)):
+        """
+        Summary statistics of the metric.
+
+        :return: {"count", "mean", "std", "min", "max", "p50", ...}; only the count for an empty distribution
+        """
+        if self.count == 0:
+            return {"count": 0}
+        summary = {"count": self.count, "mean": self.stats.mean, "std": self.stats.std,
+                   "min": self.stats.min, "max": self.stats.max}
+        for p in percentiles:
+            summary[f"p{p}"] = self.quantile(p / 100)
+        return summary
+
+    def to_dict(self):
+        """Plain, JSON-serializable state, for shipping between processes or caching."""
+        return {"stats": self.stats.to_dict(), "sketch": self.sketch.to_dict()}
+
+    @classmethod
+    def from_dict(cls, state):
+        distribution = cls(state["sketch"]["relative_accuracy"])
+        distribution.stats = RunningStats.from_dict(state["stats"])
+        distribution.sketch = DDSketch.from_dict(state["sketch"])
+        return distribution
@@ -0,0 +1,212 @@
+# evaluation/regression.py
+import argparse
+import json
+import math
+import os
+import re
+import statistics
+import sys
+
+import numpy as np
+
+REGRESSION = "regression"
+IMPROVEMENT = "improvement"
+UNCHANGED = "unchanged"
+NEW = "new"
+
+
+class BaselineStore:
+    def __init__(self, directory="results/baselines"):
+        """
+        Named benchmark baselines, one JSON report per name.
+
+        :param directory: Directory holding the baseline files
+        """
+        self.directory = directory
+
+    def _path(self, name):
+        if not re.fullmatch(r"[\w.-]+", name):
+            raise ValueError(f"Invalid baseline name: {name}")
+        return os.path.join(self.directory, f"{name}.json")
+
+    def save(self, name, report):
+        """Store a benchmark report (as produced by CipherBenchmark) under a name, replacing any previous one."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(report, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def load(self, name):
+        """Load a stored baseline report."""
+        path = self._path(name)
+        if not os.path.exists(path):
+            raise KeyError(f"No baseline named {name}")
+        with open(path) as f:
+            return json.load(f)
+
+    def names(self):
+        """Names of all stored baselines."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith(".json"))
+
+
+def mann_whitney_u(a, b):
+    """
+    Two-sided Mann-Whitney U test using the normal approximation with tie correction.
+
+    :param a: First sample
+    :param b: Second sample
+    :return: (U statistic of a, p-value)
+    """
+    n1, n2 = len(a), len(b)
+    if n1 == 0 or n2 == 0:
+        raise ValueError("Mann-Whitney U needs two non-empty samples")
+    pooled = sorted([(value, 0) for value in a] + [(value, 1) for value in b])
+    rank_sum = 0.0
+    tie_term = 0.0
+    i = 0
+    while i < len(pooled):
+        j = i
+        while j < len(pooled) and pooled[j][0] == pooled[i][0]:
+            j += 1
+        rank = (i + j + 1) / 2  # Average rank of the tied run (ranks start at 1)
+        rank_sum += rank * sum(1 for k in range(i, j) if pooled[k][1] == 0)
+        tie_term += (j - i) ** 3 - (j - i)
+        i = j
+
+    u = rank_sum - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))) if n > 1 else 0.0
+    if variance <= 0:
+        return u, 1.0
+    z = (abs(u - n1 * n2 / 2) - 0.5) / math.sqrt(variance)  # Continuity correction
+    p_value = math.erfc(max(z, 0.0) / math.sqrt(2))
+    return u, min(1.0, p_value)
+
+
+def bootstrap_ratio_ci(baseline, candidate, resamples=2000, confidence=0.95, seed=0):
+    """
+    Bootstrap confidence interval for median(candidate) / median(baseline).
+
+    :return: (low, high) bounds of the ratio
+    """
+    rng = np.random.default_rng(seed)
+    baseline = np.asarray(baseline, dtype=np.float64)
+    candidate = np.asarray(candidate, dtype=np.float64)
+    base_medians = np.median(rng.choice(baseline, (resamples, len(baseline))), axis=1)
+    cand_medians = np.median(rng.choice(candidate, (resamples, len(candidate))), axis=1)
+    ratios = cand_medians / np.maximum(base_medians, np.finfo(np.float64).tiny)
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(ratios, [tail, 100 - tail])
+    return float(low), float(high)
+
+
+def compare_reports(baseline, candidate, threshold=0.10, alpha=0.05, resamples=2000):
+    """
+    Compare a benchmark run against a baseline, one row per (target, operation, size).
+
+    A case is a regression when its median slowed down by more than threshold, the Mann-Whitney
+    test rejects "same distribution" at alpha, and the bootstrap interval of the median ratio
+    lies entirely above 1. Improvements are flagged symmetrically.
+
+    :param baseline: Baseline benchmark report
+    :param candidate: New benchmark report
+    :param threshold: Relative slowdown that counts as a regression (0.10 = 10%)
+    :param alpha: Significance level
+    :param resamples: Bootstrap resamples per case
+    :return: List of comparison rows (dicts)
+    """
+    def key(record):
+        return record["target"], record["operation"], record["size"]
+
+    baseline_records = {key(record): record for record in baseline["results"]}
+    rows = []
+    for record in candidate["results"]:
+        row = {
+            "target": record["target"],
+            "operation": record["operation"],
+            "size": record["size"],
+            "candidate_median": statistics.median(record["samples"]),
+        }
+        base = baseline_records.get(key(record))
+        if base is None:
+            row.update(baseline_median=None, change=None, ci_low=None, ci_high=None, p_value=None, status=NEW)
+            rows.append(row)
+            continue
+
+        base_median = statistics.median(base["samples"])
+        change = row["candidate_median"] / base_median - 1 if base_median > 0 else 0.0
+        _, p_value = mann_whitney_u(base["samples"], record["samples"])
+        low, high = bootstrap_ratio_ci(base["samples"], record["samples"], resamples)
+        significant = p_value < alpha
+        if significant and change > threshold and low > 1:
+            status = REGRESSION
+        elif significant and change < -threshold and high < 1:
+            status = IMPROVEMENT
+        else:
+            status = UNCHANGED
+        row.update(baseline_median=base_median, change=change, ci_low=low - 1, ci_high=high - 1,
+                   p_value=p_value, status=status)
+        rows.append(row)
+    return rows
+
+
+def regressions(rows):
+    """Only the rows flagged as regressions."""
+    return [row for row in rows if row["status"] == REGRESSION]
+
+
+def format_table(rows):
+    """Plain-text summary table of a comparison, regressions first."""
+    order = {REGRESSION: 0, IMPROVEMENT: 1, NEW: 2, UNCHANGED: 3}
+    lines = [f"{'Target':<28}{'Op':<9}{'Size':>6}{'Base (us)':>12}{'New (us)':>12}{'Change':>9}  Status"]
+    for row in sorted(rows, key=lambda r: (order[r["status"]], r["target"], r["operation"], r["size"])):
+        base = f"{row['baseline_median'] * 1e6:.2f}" if row["baseline_median"] is not None else "-"
+        change = f"{row['change']:+.1%}" if row["change"] is not None else "-"
+        lines.append(f"{row['target']:<28}{row['operation']:<9}{row['size']:>6}{base:>12}"
+                     f"{row['candidate_median'] * 1e6:>12.2f}{change:>9}  {row['status']}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Store benchmark baselines and detect regressions")
+    parser.add_argument("--store", default="results/baselines", help="Baseline directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    save = commands.add_parser("save", help="Store a benchmark JSON file as a named baseline")
+    save.add_argument("name")
+    save.add_argument("benchmark", help="Benchmark JSON written by evaluation.benchmark")
+    compare = commands.add_parser("compare", help="Compare a benchmark JSON file against a baseline")
+    compare.add_argument("name")
+    compare.add_argument("benchmark")
+    compare.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown to flag")
+    compare.add_argument("--alpha", type=float, default=0.05, help="Significance level")
+    compare.add_argument("--report", help="Also write a PDF summary table to this path")
+    commands.add_parser("list", help="List stored baselines")
+    args = parser.parse_args(argv)
+
+    store = BaselineStore(args.store)
+    if args.command == "list":
+        print("\n".join(store.names()))
+        return 0
+    with open(args.benchmark) as f:
+        report = json.load(f)
+    if args.command == "save":
+        store.save(args.name, report)
+        print(f"Baseline {args.name} saved")
+        return 0
+
+    rows = compare_reports(store.load(args.name), report, args.threshold, args.alpha)
+    print(format_table(rows))
+    if args.report:
+        from evaluation.report_generator import ReportGenerator
+        ReportGenerator().generate_regression_report(rows, args.report, baseline_name=args.name)
+    flagged = regressions(rows)
+    print(f"\n{len(flagged)} regression(s) above {args.threshold:.0%}")
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,108 +1,125 @@
 # evaluation/report_generator.py
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_pdf import PdfPages
-import seaborn as sns
-import pandas as pd
+from io import BytesIO
+import os
+
+from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.utils import ImageReader
-import os
+from reportlab.platypus import Image, LongTable, PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from evaluation.visualizer import METRICS, Visualizer
+
+INTRO = ("This report presents the simulation results of various secure and energy-efficient protocols implemented "
+         "for Wireless Sensor Networks (WSNs). The protocols evaluated include OpenWSN and DASH7 integrated with "
+         "different encryption algorithms: AES, SPECK, PRESENT, and Selective AES.")
+
 
 class ReportGenerator:
-    def generate_pdf_report(self, results, pdf_path="results/simulation_report.pdf"):
+    def generate_pdf_report(self, results, pdf_path="results/simulation_report.pdf", figures=None):
         """
         Generate a detailed PDF report with simulation results and visualizations.
-        
+
+        The report is laid out as a single flowable story: the metrics table splits across
+        pages (repeating its header) and figures are embedded from memory, so large sweeps
+        build in one pass without temporary files.
+
         :param results: Dictionary containing protocol metrics
         :param pdf_path: Output path for the PDF report
+        :param figures: List of (title, PNG bytes); rendered from results with a headless Visualizer if omitted
         """
-        # Create DataFrame
-        data = []
+        if figures is None:
+            figures = Visualizer(headless=True).figure_images(results)
+
+        styles = getSampleStyleSheet()
+        cell_style = styles["BodyText"].clone("MetricCell", fontSize=8, leading=10)
+        header_style = cell_style.clone("MetricHeader", fontName="Helvetica-Bold", textColor=colors.whitesmoke)
+
+        table_data = [[Paragraph(column, header_style) for column in ["Protocol"] + METRICS]]
         for protocol, metrics in results.items():
-            data.append({
-                "Protocol": protocol,
-                "Encryption Time (s)": metrics.get("Encryption Time (s)", 0),
-                "Decryption Time (s)": metrics.get("Decryption Time (s)", 0),
-                "Energy Consumption (J)": metrics.get("Energy Consumption (J)", 0),
-                "Packet Size (bytes)": metrics.get("Packet Size (bytes)", 0),
-                "Network Lifetime (cycles)": metrics.get("Network Lifetime (cycles)", 0)
-            })
-
-        df = pd.DataFrame(data)
-
-        # Initialize PDF
-        c = canvas.Canvas(pdf_path, pagesize=letter)
-        width, height = letter
-
-        # Title
-        c.setFont("Helvetica-Bold", 20)
-        c.drawCentredString(width / 2, height - 50, "WSN Protocol Simulation Report")
-
-        # Introduction
-        c.setFont("Helvetica", 12)
-        text = c.beginText(50, height - 80)
-        intro = "This report presents the simulation results of various secure and energy-efficient protocols implemented for Wireless Sensor Networks (WSNs). The protocols evaluated include OpenWSN and DASH7 integrated with different encryption algorithms: AES, SPECK, PRESENT, and Selective AES."
-        for line in intro.splitlines():
-            text.textLine(line)
-        c.drawText(text)
-
-        # Add Metrics Table
-        c.showPage()
-        c.setFont("Helvetica-Bold", 16)
-        c.drawString(50, height - 50, "Simulation Metrics")
-
-        # Create a simple table using ReportLab
-        from reportlab.platypus import Table, TableStyle
-        from reportlab.lib import colors
-
-        table_data = [df.columns.tolist()] + df.values.tolist()
+            table_data.append([Paragraph(protocol, cell_style)]
+                              + [f"{metrics.get(metric, 0):.4g}" for metric in METRICS])
+        table = LongTable(table_data, repeatRows=1)
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0,0), (-1,0), colors.grey),
+            ('ALIGN',(1,0),(-1,-1),'CENTER'),
+            ('VALIGN',(0,0),(-1,-1),'MIDDLE'),
+            ('FONTSIZE', (0,1), (-1,-1), 8),
+            ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.whitesmoke]),
+            ('GRID', (0,0), (-1,-1), 0.5, colors.black),
+        ]))
+
+        os.makedirs(os.path.dirname(pdf_path) or ".", exist_ok=True)
+        document = SimpleDocTemplate(pdf_path, pagesize=letter, leftMargin=40, rightMargin=40)
+        story = [
+            Paragraph("WSN Protocol Simulation Report", styles["Title"]),
+            Paragraph(INTRO, styles["Normal"]),
+            PageBreak(),
+            Paragraph("Simulation Metrics", styles["Heading1"]),
+            table,
+            PageBreak(),
+            Paragraph("Visualizations", styles["Heading1"]),
+        ]
+        for _, image in figures:
+            story.append(self._scaled_image(image, document.width, document.height - 60))
+            story.append(Spacer(1, 20))
+        document.build(story)
+        print(f"Report generated at {pdf_path}")
+
+    @staticmethod
+    def _scaled_image(data, max_width, max_height):
+        """Image flowable for in-memory image bytes, scaled to fit the frame and keep its aspect ratio."""
+        img_width, img_height = ImageReader(BytesIO(data)).getSize()
+        scale = min(max_width / img_width, max_height / img_height)
+        return Image(BytesIO(data), width=img_width * scale, height=img_height * scale)
+
+    def generate_regression_report(self, comparison, pdf_path="results/regression_report.pdf", baseline_name=None):
+        """
+        Generate a PDF summary table of a benchmark comparison.
+
+        :param comparison: Rows from evaluation.regression.compare_reports
+        :param pdf_path: Output path for the PDF report
+        :param baseline_name: Name of the baseline the run was compared against
+        """
+        status_order = {"regression": 0, "improvement": 1, "new": 2, "unchanged": 3}
+        rows = sorted(comparison, key=lambda r: (status_order[r["status"]], r["target"], r["operation"], r["size"]))
+        counts = {status: sum(1 for row in rows if row["status"] == status) for status in status_order}
+
+        styles = getSampleStyleSheet()
+        title = "Benchmark Regression Report" + (f" (baseline: {baseline_name})" if baseline_name else "")
+        summary = ", ".join(f"{count} {status}" for status, count in counts.items())
+
+        table_data = [["Target", "Operation", "Size (B)", "Baseline (us)", "New (us)", "Change", "95% CI", "p", "Status"]]
+        for row in rows:
+            if row["baseline_median"] is None:
+                table_data.append([row["target"], row["operation"], row["size"], "-",
+                                   f"{row['candidate_median'] * 1e6:.2f}", "-", "-", "-", row["status"]])
+                continue
+            table_data.append([
+                row["target"], row["operation"], row["size"],
+                f"{row['baseline_median'] * 1e6:.2f}", f"{row['candidate_median'] * 1e6:.2f}",
+                f"{row['change']:+.1%}", f"[{row['ci_low']:+.1%}, {row['ci_high']:+.1%}]",
+                f"{row['p_value']:.3g}", row["status"],
+            ])
+
         table = Table(table_data, repeatRows=1)
         table_style = TableStyle([
             ('BACKGROUND', (0,0), (-1,0), colors.grey),
             ('TEXTCOLOR',(0,0),(-1,0),colors.whitesmoke),
             ('ALIGN',(0,0),(-1,-1),'CENTER'),
             ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0,0), (-1,0), 12),
-            ('GRID', (0,0), (-1,-1), 1, colors.black),
+            ('FONTSIZE', (0,0), (-1,-1), 7),
+            ('GRID', (0,0), (-1,-1), 0.5, colors.black),
         ])
+        for index, row in enumerate(rows, start=1):
+            if row["status"] == "regression":
+                table_style.add('BACKGROUND', (0,index), (-1,index), colors.mistyrose)
+            elif row["status"] == "improvement":
+                table_style.add('BACKGROUND', (0,index), (-1,index), colors.honeydew)
         table.setStyle(table_style)
 
-        # Position the table
-        table_width, table_height = table.wrap(0, 0)
-        table.drawOn(c, 50, height - 100 - table_height)
-
-        # Add Visualizations
-        c.showPage()
-        c.setFont("Helvetica-Bold", 16)
-        c.drawString(50, height - 50, "Visualizations")
-
-        # List of plots to include
-        plot_files = [
-            "encryption_time.png",
-            "decryption_time.png",
-            "energy_consumption.png",
-            "packet_size.png",
-            "network_longevity.png",
-            "energy_vs_encryption_time.png",
-            "metrics_heatmap.png"
-        ]
-
-        y_position = height - 100
-        for plot in plot_files:
-            plot_path = os.path.join("results", plot)
-            if os.path.exists(plot_path):
-                # Resize image to fit the page
-                img = ImageReader(plot_path)
-                img_width, img_height = img.getSize()
-                aspect = img_height / float(img_width)
-                img_display_width = width - 100
-                img_display_height = img_display_width * aspect
-                if y_position - img_display_height < 50:
-                    c.showPage()
-                    y_position = height - 50
-                c.drawImage(plot_path, 50, y_position - img_display_height, width=img_display_width, height=img_display_height)
-                y_position -= (img_display_height + 30)
-
-        # Save PDF
-        c.save()
-        print(f"Report generated at {pdf_path}")
+        os.makedirs(os.path.dirname(pdf_path) or ".", exist_ok=True)
+        document = SimpleDocTemplate(pdf_path, pagesize=letter, leftMargin=30, rightMargin=30)
+        document.build([Paragraph(title, styles["Title"]), Paragraph(summary, styles["Normal"]),
+                        Spacer(1, 12), table])
+        print(f"Regression report generated at {pdf_path}")
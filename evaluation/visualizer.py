@@ -1,110 +1,232 @@
 # evaluation/visualizer.py
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import io
+import json
+import os
+import sys
+
+import matplotlib
 import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
 
-class Visualizer:
-    def visualize_results(self, results):
-        """
-        Generate comparative plots for protocol performance.
-        
-        :param results: Dictionary containing protocol metrics
-        """
-        # Transform results into a DataFrame
-        data = []
-        for protocol, metrics in results.items():
-            data.append({
-                "Protocol": protocol,
-                "Encryption Time (s)": metrics.get("Encryption Time (s)", 0),
-                "Decryption Time (s)": metrics.get("Decryption Time (s)", 0),
-                "Energy Consumption (J)": metrics.get("Energy Consumption (J)", 0),
-                "Packet Size (bytes)": metrics.get("Packet Size (bytes)", 0),
-                "Network Lifetime (cycles)": metrics.get("Network Lifetime (cycles)", 0)
-            })
-
-        df = pd.DataFrame(data)
-
-        # Set Seaborn style
-        sns.set(style="whitegrid", font_scale=1.2)
-
-        # Plot Encryption Time
-        plt.figure(figsize=(10, 6))
-        sns.barplot(x="Protocol", y="Encryption Time (s)", data=df, hue="Protocol", dodge=False, palette="Blues_d")
-        plt.title("Encryption Time by Protocol")
-        plt.ylabel("Time (seconds)")
-        plt.xlabel("Protocol")
-        plt.xticks(rotation=45)
-        plt.legend([], [], frameon=False)
-        plt.tight_layout()
-        plt.savefig("results/encryption_time.png")
-        plt.show()
-
-        # Plot Decryption Time
-        plt.figure(figsize=(10, 6))
-        sns.barplot(x="Protocol", y="Decryption Time (s)", data=df, hue="Protocol", dodge=False, palette="Greens_d")
-        plt.title("Decryption Time by Protocol")
-        plt.ylabel("Time (seconds)")
-        plt.xlabel("Protocol")
-        plt.xticks(rotation=45)
-        plt.legend([], [], frameon=False)
-        plt.tight_layout()
-        plt.savefig("results/decryption_time.png")
-        plt.show()
-
-        # Plot Energy Consumption
-        plt.figure(figsize=(10, 6))
-        sns.barplot(x="Protocol", y="Energy Consumption (J)", data=df, hue="Protocol", dodge=False, palette="Reds_d")
-        plt.title("Energy Consumption by Protocol")
-        plt.ylabel("Energy (Joules)")
-        plt.xlabel("Protocol")
-        plt.xticks(rotation=45)
-        plt.legend([], [], frameon=False)
-        plt.tight_layout()
-        plt.savefig("results/energy_consumption.png")
-        plt.show()
-
-        # Plot Packet Size
-        plt.figure(figsize=(10, 6))
-        sns.barplot(x="Protocol", y="Packet Size (bytes)", data=df, hue="Protocol", dodge=False, palette="Purples_d")
-        plt.title("Packet Size by Protocol")
-        plt.ylabel("Size (bytes)")
-        plt.xlabel("Protocol")
-        plt.xticks(rotation=45)
-        plt.legend([], [], frameon=False)
-        plt.tight_layout()
-        plt.savefig("results/packet_size.png")
-        plt.show()
-
-        # Plot Network Lifetime
-        plt.figure(figsize=(10, 6))
-        sns.barplot(x="Protocol", y="Network Lifetime (cycles)", data=df, hue="Protocol", dodge=False, palette="Oranges_d")
-        plt.title("Network Lifetime by Protocol")
-        plt.ylabel("Lifetime (cycles)")
+METRICS = [
+    "Encryption Time (s)", "Decryption Time (s)", "Energy Consumption (J)",
+    "Packet Size (bytes)", "Network Lifetime (cycles)",
+]
+
+# One entry per output figure: file name, plot kind and its labels
+FIGURES = [
+    {"file": "encryption_time.png", "kind": "bar", "metric": "Encryption Time (s)", "palette": "Blues_d",
+     "title": "Encryption Time by Protocol", "ylabel": "Time (seconds)"},
+    {"file": "decryption_time.png", "kind": "bar", "metric": "Decryption Time (s)", "palette": "Greens_d",
+     "title": "Decryption Time by Protocol", "ylabel": "Time (seconds)"},
+    {"file": "energy_consumption.png", "kind": "bar", "metric": "Energy Consumption (J)", "palette": "Reds_d",
+     "title": "Energy Consumption by Protocol", "ylabel": "Energy (Joules)"},
+    {"file": "packet_size.png", "kind": "bar", "metric": "Packet Size (bytes)", "palette": "Purples_d",
+     "title": "Packet Size by Protocol", "ylabel": "Size (bytes)"},
+    {"file": "network_longevity.png", "kind": "bar", "metric": "Network Lifetime (cycles)", "palette": "Oranges_d",
+     "title": "Network Lifetime by Protocol", "ylabel": "Lifetime (cycles)"},
+    {"file": "energy_vs_encryption_time.png", "kind": "scatter", "title": "Energy Consumption vs. Encryption Time"},
+    {"file": "metrics_heatmap.png", "kind": "heatmap", "title": "Heatmap of Protocol Metrics"},
+]
+
+CACHE_FILE = ".figure_cache.json"
+
+_source_digest = None
+
+
+def _renderer_version():
+    """Hash of this module and the plotting library versions; a change re-renders every figure."""
+    global _source_digest
+    if _source_digest is None:
+        with open(__file__, "rb") as f:
+            _source_digest = hashlib.sha256(f.read()).hexdigest()
+    return f"{_source_digest}:{matplotlib.__version__}:{sns.__version__}"
+
+
+def figure_columns(figure):
+    """Result columns a figure plots."""
+    if figure["kind"] == "bar":
+        return ["Protocol", figure["metric"]]
+    if figure["kind"] == "scatter":
+        return ["Protocol", "Encryption Time (s)", "Energy Consumption (J)"]
+    return ["Protocol"] + METRICS
+
+
+def figure_key(figure, rows):
+    """Content hash of everything a figure's pixels depend on."""
+    data = [[row[column] for column in figure_columns(figure)] for row in rows]
+    payload = json.dumps({"figure": figure, "data": data, "renderer": _renderer_version()},
+                         sort_keys=True, default=float)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def results_rows(results):
+    """One row per protocol with the plotted metrics (missing metrics count as 0)."""
+    return [dict({"Protocol": protocol}, **{metric: metrics.get(metric, 0) for metric in METRICS})
+            for protocol, metrics in results.items()]
+
+
+def draw_figure(figure, rows):
+    """
+    Draw one figure into a new pyplot figure.
+
+    :param figure: Entry of FIGURES
+    :param rows: Output of results_rows
+    :return: The matplotlib Figure
+    """
+    df = pd.DataFrame(rows, columns=["Protocol"] + METRICS)
+    sns.set(style="whitegrid", font_scale=1.2)
+    kind = figure["kind"]
+    if kind == "bar":
+        fig = plt.figure(figsize=(10, 6))
+        sns.barplot(x="Protocol", y=figure["metric"], data=df, hue="Protocol", dodge=False, palette=figure["palette"])
+        plt.ylabel(figure["ylabel"])
         plt.xlabel("Protocol")
         plt.xticks(rotation=45)
         plt.legend([], [], frameon=False)
-        plt.tight_layout()
-        plt.savefig("results/network_longevity.png")
-        plt.show()
-
-        # **New Addition: Scatter Plot for Energy vs. Encryption Time**
-        plt.figure(figsize=(10, 6))
+    elif kind == "scatter":
+        fig = plt.figure(figsize=(10, 6))
         sns.scatterplot(x="Encryption Time (s)", y="Energy Consumption (J)", hue="Protocol", data=df, palette="deep", s=100)
-        plt.title("Energy Consumption vs. Encryption Time")
         plt.xlabel("Encryption Time (seconds)")
         plt.ylabel("Energy Consumption (Joules)")
         plt.legend(title="Protocol", bbox_to_anchor=(1.05, 1), loc='upper left')
-        plt.tight_layout()
-        plt.savefig("results/energy_vs_encryption_time.png")
-        plt.show()
-
-        # **New Addition: Heatmap of Metrics**
-        metrics_df = df.set_index("Protocol")
-        plt.figure(figsize=(12, 8))
-        sns.heatmap(metrics_df, annot=True, cmap="YlGnBu", fmt=".4g")
-        plt.title("Heatmap of Protocol Metrics")
+    elif kind == "heatmap":
+        fig = plt.figure(figsize=(12, 8))
+        sns.heatmap(df.set_index("Protocol"), annot=True, cmap="YlGnBu", fmt=".4g")
         plt.ylabel("Protocol")
         plt.xlabel("Metrics")
-        plt.tight_layout()
-        plt.savefig("results/metrics_heatmap.png")
-        plt.show()
+    else:
+        raise ValueError(f"Unknown figure kind: {kind}")
+    plt.title(figure["title"])
+    plt.tight_layout()
+    return fig
+
+
+def _figure_bytes(fig, fmt="png", dpi=100):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, dpi=dpi)
+    return buffer.getvalue()
+
+
+def render_figure_bytes(figure, rows, fmt="png", dpi=100):
+    """Draw one figure into an in-memory image; runs inside worker processes."""
+    plt.switch_backend("Agg")
+    fig = draw_figure(figure, rows)
+    image = _figure_bytes(fig, fmt, dpi)
+    plt.close(fig)
+    return image
+
+
+def _display_available():
+    if sys.platform.startswith("linux"):
+        return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+    return True
+
+
+class Visualizer:
+    def __init__(self, output_dir="results", headless=None, max_workers=None, use_cache=True):
+        """
+        Render the comparison figures of a set of simulation results.
+
+        :param output_dir: Directory the PNG files are written to
+        :param headless: Save figures only (Agg backend, no windows), rendering them in parallel;
+                         by default headless when no display is available or the backend is non-interactive
+        :param max_workers: Worker processes for headless rendering (defaults to the CPU count; 1 renders in-process)
+        :param use_cache: Skip figures whose input data and rendering code are unchanged since the last run
+        """
+        self.output_dir = output_dir
+        if headless is None:
+            headless = not _display_available() or matplotlib.get_backend().lower() in ("agg", "pdf", "svg")
+        self.headless = headless
+        self.max_workers = max_workers
+        self.use_cache = use_cache
+        self.rendered = []  # Figure paths drawn by the last call
+        self.skipped = []  # Figure paths reused from the cache by the last call
+        self.images = []  # (figure title, PNG bytes) of every figure of the last call, e.g. for the PDF report
+
+    def _cache_path(self):
+        return os.path.join(self.output_dir, CACHE_FILE)
+
+    def _load_cache(self):
+        try:
+            with open(self._cache_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self, cache):
+        tmp_path = self._cache_path() + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._cache_path())
+
+    def visualize_results(self, results):
+        """
+        Generate comparative plots for protocol performance.
+
+        :param results: Dictionary containing protocol metrics
+        :return: Paths of all figures; their images are kept in self.images
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        rows = results_rows(results)
+        cache = self._load_cache() if self.use_cache else {}
+        pending = []
+        images = {}
+        self.rendered, self.skipped = [], []
+        for figure in FIGURES:
+            path = os.path.join(self.output_dir, figure["file"])
+            key = figure_key(figure, rows)
+            if self.use_cache and cache.get(figure["file"]) == key and os.path.exists(path):
+                self.skipped.append(path)
+                with open(path, "rb") as f:
+                    images[figure["file"]] = f.read()
+            else:
+                pending.append((figure, path, key))
+
+        if self.headless:
+            rendered = self._render_headless(pending, rows)
+        else:
+            rendered = [_figure_bytes(draw_figure(figure, rows)) for figure, _, _ in pending]
+            plt.show()  # Block once for all redrawn figures instead of once per figure
+        for (figure, path, _), image in zip(pending, rendered):
+            with open(path, "wb") as f:
+                f.write(image)
+            images[figure["file"]] = image
+        self.rendered = [path for _, path, _ in pending]
+        self.images = [(figure["title"], images[figure["file"]]) for figure in FIGURES]
+
+        if self.use_cache and pending:
+            cache.update({figure["file"]: key for figure, _, key in pending})
+            self._save_cache(cache)
+        return [os.path.join(self.output_dir, figure["file"]) for figure in FIGURES]
+
+    def figure_images(self, results, fmt="png", dpi=100):
+        """
+        Render every figure to memory instead of files (e.g. for the PDF report); never uses the cache.
+
+        :param results: Dictionary containing protocol metrics
+        :param fmt: Image format understood by matplotlib's savefig
+        :param dpi: Raster resolution
+        :return: List of (figure title, image bytes) in FIGURES order
+        """
+        rows = results_rows(results)
+        max_workers = min(self.max_workers or os.cpu_count(), len(FIGURES))
+        if max_workers <= 1:
+            images = [render_figure_bytes(figure, rows, fmt, dpi) for figure in FIGURES]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                images = list(executor.map(render_figure_bytes, FIGURES, [rows] * len(FIGURES),
+                                           [fmt] * len(FIGURES), [dpi] * len(FIGURES)))
+        return [(figure["title"], image) for figure, image in zip(FIGURES, images)]
+
+    def _render_headless(self, pending, rows):
+        """Render figures to PNG bytes with the Agg backend, spread over worker processes."""
+        max_workers = min(self.max_workers or os.cpu_count(), len(pending))
+        if max_workers <= 1:
+            return [render_figure_bytes(figure, rows) for figure, _, _ in pending]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(render_figure_bytes, figure, rows) for figure, _, _ in pending]
+            return [future.result() for future in futures]
@@ -1,50 +1,124 @@
 # main.py
-from encryption.aes import AES
-from encryption.speck import SpeckCipher
-from encryption.present import PresentCipher
-from encryption.selective_encryption import SelectiveEncryption
-from encryption.chacha20_cipher import ChaCha20Cipher  # Newly added
-from encryption.key_management import KeyManagement
-from protocols.openwsn import OpenWSN
-from protocols.dash7 import DASH7
-from protocols.energy_model import EnergyModel
-from evaluation.performance import PerformanceEvaluator
-from evaluation.visualizer import Visualizer
-from evaluation.report_generator import ReportGenerator
+import argparse
+import contextlib
+import json
+import os
+import sys
+
+from simulation.parallel_runner import (CIPHERS, DEFAULT_PROTOCOLS, PROTOCOLS, ParallelRunner, build_protocols,
+                                        split_protocol_name)
 from simulation.node_simulation import NodeSimulation
 
-def main():
-    # Initialize Key Management
-    key_mgmt = KeyManagement()
-    node_ids = [f"Node_{i}" for i in range(1, 7)]  # Example node IDs
-    key_mgmt.distribute_keys(node_ids)
-
-    # Initialize Encryption Algorithms with keys
-    aes = AES()
-    speck = SpeckCipher()
-    present = PresentCipher()
-    chacha20 = ChaCha20Cipher()  # Newly added
-    selective_aes = SelectiveEncryption(aes, encryption_ratio=0.5)  # 50% selective encryption
-
-    # Initialize Energy Model
-    energy_model = EnergyModel()
-
-    # Initialize Protocols with Encryption and Energy Model
-    protocols = {
-        "OpenWSN_AES": OpenWSN(aes, energy_model),
-        "OpenWSN_SPECK": OpenWSN(speck, energy_model),
-        "OpenWSN_PRESENT": OpenWSN(present, energy_model),
-        "OpenWSN_ChaCha20": OpenWSN(chacha20, energy_model),  # Newly added
-        "DASH7_AES": DASH7(aes, energy_model),
-        "DASH7_SPECK": DASH7(speck, energy_model),
-        "DASH7_PRESENT": DASH7(present, energy_model),
-        "DASH7_ChaCha20": DASH7(chacha20, energy_model),  # Newly added
-        "OpenWSN_SelectiveAES": OpenWSN(selective_aes, energy_model)
-    }
-
-    # Initialize Node Simulation
-    simulation = NodeSimulation(protocols, num_cycles=1000, energy_initial=1.0)  # 1 Joule initial energy
-    results = simulation.run_simulation()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate secure WSN protocols and compare their cost.")
+    parser.add_argument("--protocols", nargs="+", choices=sorted(PROTOCOLS),
+                        help="Protocol families to simulate (default: all in the default configurations)")
+    parser.add_argument("--ciphers", nargs="+", choices=sorted(CIPHERS),
+                        help="Ciphers to combine with the protocols (default: all in the default configurations)")
+    parser.add_argument("--configs", nargs="+", metavar="NAME",
+                        help="Explicit configurations such as OpenWSN_AES (overrides --protocols/--ciphers)")
+    parser.add_argument("--cycles", type=int, default=1000, help="Simulation cycles (default: 1000)")
+    parser.add_argument("--energy", type=float, default=1.0, help="Initial energy per node in Joules (default: 1.0)")
+    parser.add_argument("--threshold", type=float, default=0.05,
+                        help="Energy below which nodes switch protocols, in Joules (default: 0.05)")
+    parser.add_argument("--seeds", nargs="+", type=int, help="Seeds; several seeds are run in parallel and merged")
+    parser.add_argument("--mode", choices=("scalar", "network", "event"), default="scalar",
+                        help="Simulation mode (default: scalar)")
+    parser.add_argument("--nodes", type=int, default=100, help="Nodes per protocol in network/event mode")
+    parser.add_argument("--workers", type=int, help="Worker processes for multiple seeds (default: CPU count)")
+    parser.add_argument("--encryption-ratio", type=float, default=0.5, help="SelectiveAES encryption ratio")
+    parser.add_argument("--profile", help="MCU cost profile for computation energy, e.g. MSP430 or CC2538")
+    parser.add_argument("--radio", help="Radio model for transmission energy, e.g. CC2420")
+    parser.add_argument("--trace", metavar="PATH", help="Write per-cycle records to a .csv or .parquet file")
+    parser.add_argument("--output-dir", default="results", help="Directory for figures (default: results)")
+    parser.add_argument("--report", default="results/simulation_report.pdf", help="PDF report path")
+    parser.add_argument("--no-plots", action="store_true", help="Skip figures and the PDF report")
+    parser.add_argument("--no-report", action="store_true", help="Skip the PDF report")
+    parser.add_argument("--json", action="store_true",
+                        help="Print results as JSON on stdout (progress goes to stderr); implies --no-plots")
+    args = parser.parse_args(argv)
+    if args.trace and args.seeds and len(args.seeds) > 1:
+        parser.error("--trace records a single run; give at most one seed")
+    try:
+        args.configs = select_configurations(args)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
+def select_configurations(args):
+    """Protocol configuration names chosen on the command line."""
+    if args.configs:
+        for name in args.configs:
+            split_protocol_name(name)  # Raises ValueError for unknown names
+        return args.configs
+    if not args.protocols and not args.ciphers:
+        return list(DEFAULT_PROTOCOLS)
+    defaults = [split_protocol_name(name) for name in DEFAULT_PROTOCOLS]
+    protocols = args.protocols or list(dict.fromkeys(protocol for protocol, _ in defaults))
+    ciphers = args.ciphers or list(dict.fromkeys(cipher for _, cipher in defaults))
+    return [f"{protocol}_{cipher}" for protocol in protocols for cipher in ciphers]
+
+
+def run(args):
+    """Run the simulation described by the parsed arguments and return its results."""
+    cipher_options = {"SelectiveAES": {"encryption_ratio": args.encryption_ratio}}
+    energy_model = {key: value for key, value in (("profile", args.profile), ("radio", args.radio)) if value}
+    seeds = args.seeds or [None]
+    if len(seeds) > 1:
+        runner = ParallelRunner(args.configs, seeds=seeds, max_workers=args.workers, num_cycles=args.cycles,
+                                energy_initial=args.energy, energy_threshold=args.threshold,
+                                cipher_options=cipher_options, energy_model=energy_model or None,
+                                mode=args.mode, num_nodes=args.nodes)
+        return runner.run()
+
+    simulation = NodeSimulation({}, num_cycles=args.cycles, energy_initial=args.energy,
+                                energy_threshold=args.threshold, seed=seeds[0])
+    # Switch targets must exist for protocols to fall back to them on low energy
+    names = list(args.configs)
+    for name in args.configs:
+        target = simulation.switch_protocol(name, float("-inf"))
+        if target not in names and target != name:
+            names.append(target)
+    simulation.protocols = build_protocols(names, cipher_options, energy_model)
+
+    with contextlib.ExitStack() as stack:
+        if args.trace:
+            from simulation.result_sink import open_sink
+            simulation.sink = stack.enter_context(open_sink(args.trace))
+        if args.mode == "network":
+            return simulation.run_network_simulation(args.nodes, args.configs)
+        if args.mode == "event":
+            return simulation.run_event_simulation(args.nodes, protocol_names=args.configs)
+        return simulation.run_simulation(args.configs)
+
+
+@contextlib.contextmanager
+def stdout_to_stderr():
+    """Send everything written to stdout, by this process or its workers, to stderr."""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    os.dup2(2, 1)  # Worker processes inherit the file descriptor, whatever their start method
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved, 1)
+        os.close(saved)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.json:
+        with stdout_to_stderr():  # Keep stdout for the JSON document
+            results = run(args)
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return results
+
+    results = run(args)
 
     # Display Results
     print("\n=== Simulation Results ===")
@@ -54,13 +128,20 @@ def main():
             print(f"  {metric}: {value}")
         print()
 
-    # Visualize Results
-    visualizer = Visualizer()
+    if args.no_plots:
+        return results
+
+    # Plotting and reporting libraries are imported only when figures are requested
+    from evaluation.visualizer import Visualizer
+    visualizer = Visualizer(args.output_dir)
     visualizer.visualize_results(results)
 
-    # Generate PDF Report
-    report_generator = ReportGenerator()
-    report_generator.generate_pdf_report(results)
+    if not args.no_report:
+        from evaluation.report_generator import ReportGenerator
+        # Reuse the figures just drawn (or read from the cache) instead of rendering them again
+        ReportGenerator().generate_pdf_report(results, args.report, figures=visualizer.images)
+    return results
+
 
 if __name__ == "__main__":
     main()
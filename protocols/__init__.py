@@ -2,3 +2,5 @@
 from .openwsn import OpenWSN
 from .dash7 import DASH7
 from .energy_model import EnergyModel
+from .context_pool import ContextPool
+from .secure_protocol import SecureProtocol
@@ -0,0 +1,130 @@
+# protocols/context_pool.py
+import hashlib
+
+from encryption.hmac_util import HMACUtil
+from encryption.key_management import KeyStore, LRUCache, _encode_id
+
+# Cipher attributes holding the per-key nonce counter (AES-CCM, ChaCha20)
+NONCE_COUNTERS = ("frame_counter", "packet_counter")
+
+
+def sender_nonce_prefix(sender, size):
+    """Fixed nonce part identifying the sender: its address, or a hash of a non-integer id."""
+    if isinstance(sender, int):
+        return sender.to_bytes(size, "big")
+    return hashlib.sha256(_encode_id(sender)).digest()[:size]
+
+
+def _nonce_counter(cipher):
+    """Name of the cipher's nonce counter attribute, or None for ciphers without one."""
+    for name in NONCE_COUNTERS:
+        if hasattr(cipher, name):
+            return name
+    return None
+
+
+class ContextPool:
+    def __init__(self, key_provider, cipher_factory, node_id=0, capacity=256, mac_length=8, key_size=None,
+                 on_build=None):
+        """
+        Bounded LRU pool of per-peer cipher and HMAC contexts.
+
+        A context (expanded key schedule plus HMAC pad states) is built the first time a link is
+        used in a direction and reused for every later packet. Frames a node sends and frames it
+        receives use separate contexts: nonce-based ciphers (CCM, ChaCha20) get the sender's address
+        as nonce prefix, so the two directions of a link never share a nonce under the same key.
+        The nonce counter of an evicted sending context is kept (one integer per link) and restored
+        when the context is rebuilt, so a key never sees the same nonce twice.
+
+        :param key_provider: KeyStore for pairwise link keys derived with node_id; KeyManagement (the per-node
+                             keys it distributed, via get_key) or a callable node -> key for per-node keys,
+                             where a frame is protected with its sender's key
+        :param cipher_factory: Cipher class or callable key -> cipher instance (e.g. SpeckCipher)
+        :param node_id: Address of the local node, the other end of every link
+        :param capacity: Maximum number of cached contexts
+        :param mac_length: Truncated HMAC tag length in bytes
+        :param key_size: Cipher key length; required unless cipher_factory is a class with KEY_SIZE
+        :param on_build: Optional callable invoked with every newly built cipher (e.g. to charge its key setup)
+        """
+        self.key_provider = key_provider
+        self.cipher_factory = cipher_factory
+        self.node_id = node_id
+        self.mac_length = mac_length
+        self.on_build = on_build
+        self.key_size = key_size or getattr(cipher_factory, "KEY_SIZE", None)
+        if self.key_size is None:
+            raise ValueError("key_size is required when cipher_factory is not a cipher class")
+        self.pairwise = isinstance(key_provider, KeyStore)
+        self.cache = LRUCache(capacity)
+        self.counters = {}  # Nonce counters of evicted sending contexts, by cache key
+
+    def link_key(self, peer, sender):
+        """
+        Key protecting frames sent by sender on the link between the local node and peer.
+
+        Pairwise keys are the same in both directions; per-node keys are the sender's own key.
+        """
+        if self.pairwise:
+            return self.key_provider.pair_key(self.node_id, peer, self.key_size)
+        provider = self.key_provider
+        if hasattr(provider, "get_key"):
+            key = provider.get_key(sender)  # Per-node keys, as held by the sink
+        else:
+            key = provider(sender)
+        if key is None:
+            raise KeyError(f"No key for node {sender}")
+        if len(key) < self.key_size:
+            raise ValueError(f"Key for node {sender} is shorter than {self.key_size} bytes")
+        return key[:self.key_size]
+
+    def get(self, peer, sender):
+        """
+        Cipher and HMACUtil for frames sent by sender on the link to peer, built on first use.
+
+        :param peer: The other end of the link
+        :param sender: The sending end, either the local node_id or peer
+        :return: (cipher, hmac_util)
+        """
+        link = peer if self.pairwise else None  # Per-node keys do not depend on the peer
+        key = (link, sender)
+        context = self.cache.get(key)
+        if context is None:
+            cipher = self.cipher_factory(self.link_key(peer, sender))
+            prefix = getattr(cipher, "nonce_prefix", None)
+            if prefix is not None:
+                cipher.nonce_prefix = sender_nonce_prefix(sender, len(prefix))
+            counter = _nonce_counter(cipher)
+            if counter is not None and key in self.counters:
+                setattr(cipher, counter, self.counters.pop(key))  # Resume where the evicted context stopped
+            if self.on_build is not None:
+                self.on_build(cipher)
+            context = (cipher, HMACUtil(cipher.get_key_bytes(), tag_length=self.mac_length))
+            evicted = self.cache.put(key, context)
+            if evicted is not None:
+                self._keep_counter(*evicted)
+        return context
+
+    def _keep_counter(self, key, context):
+        """Remember the nonce counter of an evicted sending context."""
+        counter = _nonce_counter(context[0])
+        if counter is not None and key[1] == self.node_id:
+            self.counters[key] = getattr(context[0], counter)
+
+    def sending(self, peer):
+        """Context for frames the local node sends to peer."""
+        return self.get(peer, self.node_id)
+
+    def receiving(self, peer):
+        """Context for frames received from peer."""
+        return self.get(peer, peer)
+
+    def prototype(self):
+        """A cipher with an all-zero key, describing the algorithm (name, AEAD) without any link key."""
+        return self.cipher_factory(bytes(self.key_size))
+
+    def stats(self):
+        """Hit, miss and eviction counters of the pool."""
+        return self.cache.stats()
+
+    def __len__(self):
+        return len(self.cache)
@@ -1,47 +1,54 @@
 # protocols/dash7.py
-from encryption.hmac_util import HMACUtil
+from protocols import frame
+from protocols import radio_model
+from protocols.secure_protocol import SecureProtocol
 
-class DASH7:
-    def __init__(self, encryption, energy_model):
-        """
-        Initialize DASH7 protocol with encryption and energy model.
-        
-        :param encryption: Encryption instance (e.g., AES, SPECK)
-        :param energy_model: EnergyModel instance
-        """
-        self.encryption = encryption
-        self.hmac_util = HMACUtil(self.encryption.get_key_bytes())
-        self.energy_model = energy_model
+# Background channel scan a DASH7 endpoint runs to catch a query, and the size of that query frame
+BACKGROUND_SCAN_TIME = 2.5e-3
+QUERY_SIZE = frame.HEADER_SIZE + 8
 
-    def query_response(self, query, response):
+class DASH7(SecureProtocol):
+    def query_response(self, query, response, source=0, destination=0, out=None):
         """
-        Prepare a query-response packet.
-        
-        :param query: The query string
+        Prepare a query-response frame.
+
+        :param query: The query identifier; its 32-bit tag goes in the sequence field
         :param response: The response data
-        :return: Dictionary representing the response packet
-        """
-        # Encrypt the response
-        encrypted_response = self.encryption.encrypt(response)
-        # Generate HMAC for the encrypted response
-        hmac_value = self.hmac_util.generate_hmac(encrypted_response)
-        return {
-            'query': query,
-            'response': encrypted_response,
-            'hmac': hmac_value,
-        }
+        :param source: Address of the responding node
+        :param destination: Address of the querying node
+        :param out: Optional preallocated bytearray to serialize into
+        :return: The response frame as bytes, or a memoryview into out
+        """
+        return self._seal(frame.FRAME_RESPONSE, source, destination, frame.query_tag(query), response, out)
 
     def process_response(self, response_packet):
         """
-        Process an incoming query-response packet.
-        
-        :param response_packet: Dictionary representing the response packet
+        Process an incoming query-response frame.
+
+        :param response_packet: Bytes-like response frame
         :return: Decrypted response
         """
-        encrypted_response = response_packet['response']
-        if not self.hmac_util.verify_hmac(encrypted_response, response_packet['hmac']):
-            raise ValueError("HMAC verification failed")
+        return self._open(response_packet)
+
+    def process_responses(self, response_packets):
+        """
+        Process a batch of query-response frames, authenticating all of them before decrypting any.
+
+        :param response_packets: List of bytes-like response frames
+        :return: List of decrypted responses
+        """
+        return self._open_many(response_packets, "responses")
 
-        # Decrypt the response
-        decrypted_response = self.encryption.decrypt(encrypted_response)
-        return decrypted_response
+    def radio_activity(self, packet_size):
+        """
+        Radio states of one query-response: wake-up, background scan that receives the query, then the response.
+
+        :param packet_size: On-air response frame size in bytes
+        :return: Ordered (state, seconds) segments for RadioModel.activity
+        """
+        radio = self.energy_model.radio
+        return [
+            (radio_model.IDLE, 0.0),  # Oscillator start-up and PLL lock, charged as transitions
+            (radio_model.RX, BACKGROUND_SCAN_TIME + radio.airtime(QUERY_SIZE)),
+            (radio_model.TX, radio.airtime(packet_size)),
+        ]
@@ -1,20 +1,96 @@
 # protocols/energy_model.py
+import numpy as np
+
+from protocols.radio_model import RadioModel
+
+# Per-MCU computation cost tables. Cycle counts are representative figures for optimized C
+# implementations on each core (hardware AES on the CC2538); energy per cycle is active power
+# divided by clock rate. HMAC-SHA256 uses precomputed ipad/opad states, so a message costs its
+# inner compression blocks plus one outer block.
+MCU_PROFILES = {
+    "MSP430": {  # MSP430F1611 @ 8 MHz, ~7.2 mW active (TelosB class)
+        "energy_per_cycle": 0.9e-9,
+        "ciphers": {
+            "AES-CBC": {"block_size": 16, "cycles_per_block": 5400, "key_setup_cycles": 2400, "padded": True},
+            "AES-CCM": {"block_size": 16, "cycles_per_block": 10800, "key_setup_cycles": 2400,
+                        "fixed_cycles": 16200},  # CTR + CBC-MAC per block; B0, AAD and tag blocks
+            "SPECK-64/128": {"block_size": 8, "cycles_per_block": 1100, "key_setup_cycles": 1500, "padded": True},
+            "PRESENT-80": {"block_size": 8, "cycles_per_block": 8500, "key_setup_cycles": 4000, "padded": True},
+            "ChaCha20": {"block_size": 64, "cycles_per_block": 17000, "key_setup_cycles": 100},
+            "ChaCha20-Poly1305": {"block_size": 64, "cycles_per_block": 27000, "key_setup_cycles": 100,
+                                  "fixed_cycles": 19500},  # Poly1305 key block and length block
+        },
+        "mac": {"block_size": 64, "cycles_per_block": 28000},  # SHA-256 compression
+    },
+    "CC2538": {  # ARM Cortex-M3 @ 32 MHz, ~21 mW active, AES co-processor
+        "energy_per_cycle": 0.66e-9,
+        "ciphers": {
+            "AES-CBC": {"block_size": 16, "cycles_per_block": 150, "key_setup_cycles": 400, "padded": True},
+            "AES-CCM": {"block_size": 16, "cycles_per_block": 300, "key_setup_cycles": 400, "fixed_cycles": 450},
+            "SPECK-64/128": {"block_size": 8, "cycles_per_block": 150, "key_setup_cycles": 300, "padded": True},
+            "PRESENT-80": {"block_size": 8, "cycles_per_block": 2800, "key_setup_cycles": 1500, "padded": True},
+            "ChaCha20": {"block_size": 64, "cycles_per_block": 900, "key_setup_cycles": 50},
+            "ChaCha20-Poly1305": {"block_size": 64, "cycles_per_block": 1620, "key_setup_cycles": 50,
+                                  "fixed_cycles": 1080},
+        },
+        "mac": {"block_size": 64, "cycles_per_block": 3000},
+    },
+}
+
+
+def cipher_cycles(costs, lengths):
+    """
+    Cycles to encrypt messages of the given lengths.
+
+    :param costs: Cipher entry of an MCU profile
+    :param lengths: Plaintext length in bytes, scalar or NumPy array
+    """
+    block_size = costs["block_size"]
+    if costs.get("padded", False):
+        blocks = lengths // block_size + 1  # PKCS7 always adds at least one byte
+    else:
+        blocks = -(-lengths // block_size)
+    return costs.get("fixed_cycles", 0) + blocks * costs["cycles_per_block"]
+
+
+def mac_cycles(costs, lengths):
+    """Cycles to HMAC messages of the given lengths (inner hash with 9 bytes of SHA padding, one outer block)."""
+    block_size = costs["block_size"]
+    return ((lengths + 9 + block_size - 1) // block_size + 1) * costs["cycles_per_block"]
+
 
 class EnergyModel:
-    def __init__(self, energy_per_bit=50e-9, energy_per_operation=5e-9):
+    def __init__(self, energy_per_bit=50e-9, energy_per_operation=5e-9, profile=None, max_table_length=4096,
+                 radio=None):
         """
         Initialize energy consumption parameters.
-        
+
         :param energy_per_bit: Energy consumed per bit transmitted (Joules)
         :param energy_per_operation: Energy consumed per cryptographic operation (Joules)
+        :param profile: MCU profile name from MCU_PROFILES or a profile dict; None charges the flat
+                        energy_per_operation per packet
+        :param max_table_length: Largest message length in the precomputed energy tables
+        :param radio: RadioModel or radio profile name; None charges energy_per_bit for transmitted bits only
         """
         self.energy_per_bit = energy_per_bit  # Energy in joules
         self.energy_per_operation = energy_per_operation  # Energy per computation step
+        self.profile = MCU_PROFILES[profile] if isinstance(profile, str) else profile
+        self.radio = RadioModel(radio) if isinstance(radio, (str, dict)) else radio
+
+        # Energy for every (algorithm, length) up to max_table_length, so a packet costs one array lookup
+        self.cipher_energy = {}
+        self.mac_energy = None
+        if self.profile is not None:
+            lengths = np.arange(max_table_length + 1, dtype=np.int64)
+            energy_per_cycle = self.profile["energy_per_cycle"]
+            for algorithm, costs in self.profile["ciphers"].items():
+                self.cipher_energy[algorithm] = cipher_cycles(costs, lengths) * energy_per_cycle
+            self.mac_energy = mac_cycles(self.profile["mac"], lengths) * energy_per_cycle
 
     def calculate_transmission_energy(self, data_size_bytes):
         """
         Calculate energy consumption for data transmission.
-        
+
         :param data_size_bytes: Size of data in bytes
         :return: Energy consumed in Joules
         """
@@ -24,16 +100,66 @@ class EnergyModel:
     def calculate_computation_energy(self, num_operations):
         """
         Calculate energy consumption for computations.
-        
+
         :param num_operations: Number of cryptographic operations
         :return: Energy consumed in Joules
         """
         return num_operations * self.energy_per_operation
 
+    def _cipher_costs(self, algorithm):
+        try:
+            return self.profile["ciphers"][algorithm]
+        except KeyError:
+            raise ValueError(f"No cost entry for {algorithm} in the MCU profile") from None
+
+    def cipher_energy_for(self, algorithm, length):
+        """Energy to encrypt length bytes with algorithm under the MCU profile."""
+        table = self.cipher_energy.get(algorithm)
+        if table is None:
+            raise ValueError(f"No cost entry for {algorithm} in the MCU profile")
+        if length < len(table):
+            return float(table[length])
+        return cipher_cycles(self._cipher_costs(algorithm), length) * self.profile["energy_per_cycle"]
+
+    def mac_energy_for(self, length):
+        """Energy to compute the HMAC tag over length bytes under the MCU profile."""
+        if length < len(self.mac_energy):
+            return float(self.mac_energy[length])
+        return mac_cycles(self.profile["mac"], length) * self.profile["energy_per_cycle"]
+
+    def crypto_energy(self, encryption, payload_length, mac_length=None):
+        """
+        Calculate the computation energy of protecting one packet.
+
+        :param encryption: Cipher instance; its algorithm attribute selects the cost entry
+        :param payload_length: Plaintext bytes handed to the cipher
+        :param mac_length: Bytes covered by a separate HMAC tag (None for AEAD ciphers)
+        :return: Energy consumed in Joules
+        """
+        if self.profile is None:
+            return self.calculate_computation_energy(1)
+        if hasattr(encryption, "encrypted_length"):
+            payload_length = encryption.encrypted_length(payload_length)  # Selective encryption
+        energy = self.cipher_energy_for(encryption.algorithm, payload_length)
+        if mac_length is not None:
+            energy += self.mac_energy_for(mac_length)
+        return energy
+
+    def key_setup_energy(self, encryption):
+        """
+        Calculate the energy of expanding a cipher key (charged when a key is installed, not per packet).
+
+        :param encryption: Cipher instance
+        :return: Energy consumed in Joules (0 without an MCU profile)
+        """
+        if self.profile is None:
+            return 0.0
+        return self._cipher_costs(encryption.algorithm)["key_setup_cycles"] * self.profile["energy_per_cycle"]
+
     def total_energy(self, data_size_bytes, num_operations):
         """
         Calculate total energy consumption.
-        
+
         :param data_size_bytes: Size of data in bytes
         :param num_operations: Number of cryptographic operations
         :return: Total energy consumed in Joules
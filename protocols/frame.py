@@ -0,0 +1,85 @@
+# protocols/frame.py
+import struct
+import zlib
+from collections import namedtuple
+
+# Frame layout: | type (1) | source (2) | destination (2) | sequence (4) | body length (2) | body | tag |
+HEADER = struct.Struct("!BHHIH")
+HEADER_SIZE = HEADER.size
+ADDRESSING_SIZE = HEADER_SIZE - 2  # Header without the length field, used as AEAD associated data
+MAX_BODY_SIZE = 0xFFFF
+MAX_ADDRESS = 0xFFFF  # 16-bit short addresses, as in 802.15.4; larger node ids cannot go on air
+MAX_TAG_SIZE = 32
+MAX_FRAME_SIZE = HEADER_SIZE + MAX_BODY_SIZE + MAX_TAG_SIZE
+
+FRAME_DATA = 0x01
+FRAME_QUERY = 0x02
+FRAME_RESPONSE = 0x03
+FRAME_TYPES = {"Data": FRAME_DATA, "Query": FRAME_QUERY, "Response": FRAME_RESPONSE}
+
+Frame = namedtuple("Frame", ["frame_type", "source", "destination", "sequence", "body", "tag", "authenticated"])
+
+
+def frame_type_code(frame_type):
+    """Map a header type name (e.g. "Data") or a numeric code to its frame type code."""
+    if isinstance(frame_type, int):
+        return frame_type
+    try:
+        return FRAME_TYPES[frame_type]
+    except KeyError:
+        raise ValueError(f"Unknown frame type: {frame_type}") from None
+
+
+def query_tag(query):
+    """Reduce a query identifier to the 32-bit value carried in a response's sequence field."""
+    if isinstance(query, int):
+        return query & 0xFFFFFFFF
+    if isinstance(query, str):
+        query = query.encode()
+    return zlib.crc32(query)
+
+
+def addressing_bytes(frame_type, source, destination, sequence):
+    """Header fields that identify the frame, packed without the body length."""
+    return HEADER.pack(frame_type, source, destination, sequence, 0)[:ADDRESSING_SIZE]
+
+
+def write_frame(buffer, frame_type, source, destination, sequence, body, offset=0):
+    """
+    Serialize header and body into a preallocated buffer.
+
+    :param buffer: Writable buffer (e.g. bytearray) large enough for the frame and its tag
+    :param body: Ciphertext bytes
+    :param offset: Position in the buffer where the frame starts
+    :return: Offset just past the body, where the tag (if any) goes
+    :raises ValueError: If the body is too large or a header field (e.g. an address) is out of range
+    """
+    body_length = len(body)
+    if body_length > MAX_BODY_SIZE:
+        raise ValueError("Frame body too large")
+    try:
+        HEADER.pack_into(buffer, offset, frame_type, source, destination, sequence, body_length)
+    except struct.error as e:
+        raise ValueError(f"Frame header field out of range (addresses are 0..{MAX_ADDRESS}): {e}") from None
+    start = offset + HEADER_SIZE
+    end = start + body_length
+    buffer[start:end] = body
+    return end
+
+
+def parse_frame(data, tag_length):
+    """
+    Parse a frame without copying: body, tag and authenticated region are memoryview slices.
+
+    :param data: Bytes-like frame
+    :param tag_length: Length of the trailing tag in bytes (0 for AEAD ciphers)
+    :return: Frame tuple
+    """
+    view = memoryview(data)
+    if len(view) < HEADER_SIZE:
+        raise ValueError("Frame shorter than header")
+    frame_type, source, destination, sequence, body_length = HEADER.unpack_from(view, 0)
+    end = HEADER_SIZE + body_length
+    if len(view) != end + tag_length:
+        raise ValueError("Frame length does not match header")
+    return Frame(frame_type, source, destination, sequence, view[HEADER_SIZE:end], view[end:], view[:end])
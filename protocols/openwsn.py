@@ -1,45 +1,62 @@
 # protocols/openwsn.py
-from encryption.hmac_util import HMACUtil
+from protocols import frame
+from protocols import radio_model
+from protocols.secure_protocol import SecureProtocol
 
-class OpenWSN:
-    def __init__(self, encryption, energy_model):
-        """
-        Initialize OpenWSN protocol with encryption and energy model.
-        
-        :param encryption: Encryption instance (e.g., AES, SPECK)
-        :param energy_model: EnergyModel instance
-        """
-        self.encryption = encryption
-        self.hmac_util = HMACUtil(self.encryption.get_key_bytes())
-        self.energy_model = energy_model
+# TSCH timeslot timings (IEEE 802.15.4e defaults) and the size of an immediate ACK without FCS
+TSCH_TX_OFFSET = 2.12e-3
+TSCH_RX_ACK_DELAY = 0.8e-3
+ACK_SIZE = 3
+
+class OpenWSN(SecureProtocol):
+    def __init__(self, *args, **kwargs):
+        """Initialize OpenWSN protocol; see SecureProtocol for the parameters."""
+        super().__init__(*args, **kwargs)
+        self.sequence = 0
 
-    def prepare_packet(self, payload, headers):
+    def prepare_packet(self, payload, headers, out=None):
         """
-        Prepare a packet by encrypting the payload and generating an HMAC.
-        
+        Prepare a binary frame by encrypting the payload and appending an HMAC tag.
+
         :param payload: The data to encrypt
-        :param headers: Dictionary of headers
-        :return: Dictionary representing the packet
+        :param headers: Dictionary of headers ("Type", optional "Source" and "Destination")
+        :param out: Optional preallocated bytearray to serialize into
+        :return: The frame as bytes, or a memoryview into out
         """
-        encrypted_payload = self.encryption.encrypt(payload)  # Encrypt the entire payload
-        hmac_value = self.hmac_util.generate_hmac(encrypted_payload)  # Generate HMAC
-        return {
-            'headers': headers,
-            'payload': encrypted_payload,
-            'hmac': hmac_value,
-        }
+        frame_type = frame.frame_type_code(headers.get("Type", "Data"))
+        self.sequence = (self.sequence + 1) & 0xFFFFFFFF
+        return self._seal(frame_type, headers.get("Source", 0), headers.get("Destination", 0), self.sequence,
+                          payload, out)
 
     def process_packet(self, packet):
         """
-        Process an incoming packet by verifying the HMAC and decrypting the payload.
-        
-        :param packet: Dictionary representing the packet
+        Process an incoming frame by verifying the HMAC and decrypting the payload.
+
+        :param packet: Bytes-like frame
         :return: Decrypted payload
         """
-        encrypted_payload = packet['payload']
-        if not self.hmac_util.verify_hmac(encrypted_payload, packet['hmac']):
-            raise ValueError("HMAC verification failed")
+        return self._open(packet)
+
+    def process_packets(self, packets):
+        """
+        Process a batch of received frames, authenticating all of them before decrypting any.
+
+        :param packets: List of bytes-like frames
+        :return: List of decrypted payloads
+        """
+        return self._open_many(packets, "packets")
 
-        # Decrypt the payload
-        decrypted_payload = self.encryption.decrypt(encrypted_payload)
-        return decrypted_payload
+    def radio_activity(self, packet_size):
+        """
+        Radio states of one TSCH transmit slot: wait for the TX offset, send, then receive the ACK.
+
+        :param packet_size: On-air frame size in bytes
+        :return: Ordered (state, seconds) segments for RadioModel.activity
+        """
+        radio = self.energy_model.radio
+        return [
+            (radio_model.IDLE, TSCH_TX_OFFSET),
+            (radio_model.TX, radio.airtime(packet_size)),
+            (radio_model.IDLE, TSCH_RX_ACK_DELAY),
+            (radio_model.RX, radio.airtime(ACK_SIZE)),
+        ]
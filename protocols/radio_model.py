@@ -0,0 +1,95 @@
+# protocols/radio_model.py
+import numpy as np
+
+# Radio states; used as indices into every per-state array
+TX, RX, IDLE, SLEEP = range(4)
+STATES = ("TX", "RX", "IDLE", "SLEEP")
+STATE_INDEX = {name: index for index, name in enumerate(STATES)}
+
+# Datasheet figures at 3 V. Transitions are (time, power) pairs; the time is spent settling, not in either state.
+# Every transition a radio can make must be listed, free ones included; any other is rejected by RadioModel.activity.
+RADIO_PROFILES = {
+    "CC2420": {  # 2.4 GHz 802.15.4 transceiver (TelosB, MicaZ)
+        "power": {"TX": 52.2e-3, "RX": 56.4e-3, "IDLE": 1.28e-3, "SLEEP": 60e-6},  # TX at 0 dBm
+        "transitions": {
+            ("SLEEP", "IDLE"): (0.97e-3, 1.28e-3),  # Crystal oscillator start-up
+            ("IDLE", "TX"): (192e-6, 56.4e-3),  # PLL lock / calibration
+            ("IDLE", "RX"): (192e-6, 56.4e-3),
+            ("TX", "RX"): (192e-6, 56.4e-3),  # Rx/Tx turnaround
+            ("RX", "TX"): (192e-6, 56.4e-3),
+            ("TX", "IDLE"): (0.0, 0.0),  # Powering down the synthesizer or the regulator is immediate
+            ("RX", "IDLE"): (0.0, 0.0),
+            ("TX", "SLEEP"): (0.0, 0.0),
+            ("RX", "SLEEP"): (0.0, 0.0),
+            ("IDLE", "SLEEP"): (0.0, 0.0),
+        },
+        "data_rate": 250e3,  # bits per second
+        "phy_overhead": 6,  # Preamble (4), SFD (1) and PHY length (1) bytes
+        "fcs_size": 2,  # Frame check sequence appended by the radio
+    },
+}
+
+
+class RadioModel:
+    def __init__(self, profile="CC2420"):
+        """
+        Radio state machine with per-state power draw and per-transition energy.
+
+        :param profile: Radio profile name from RADIO_PROFILES or a profile dict
+        """
+        self.profile = RADIO_PROFILES[profile] if isinstance(profile, str) else profile
+        self.power = np.array([self.profile["power"][state] for state in STATES], dtype=np.float64)
+        self.transition_energy = np.zeros((len(STATES), len(STATES)), dtype=np.float64)
+        self.allowed = np.zeros((len(STATES), len(STATES)), dtype=bool)  # Transitions the profile defines
+        for (source, target), (duration, power) in self.profile["transitions"].items():
+            self.transition_energy[STATE_INDEX[source], STATE_INDEX[target]] = duration * power
+            self.allowed[STATE_INDEX[source], STATE_INDEX[target]] = True
+        self.data_rate = self.profile["data_rate"]
+        self.phy_overhead = self.profile["phy_overhead"] + self.profile.get("fcs_size", 0)
+
+    def airtime(self, frame_bytes):
+        """Seconds on air for a MAC frame, including PHY header and FCS (scalar or NumPy array)."""
+        return (frame_bytes + self.phy_overhead) * 8 / self.data_rate
+
+    def activity(self, segments, interval=None):
+        """
+        Summarize one wake-up of the radio.
+
+        The radio starts and ends asleep; with an interval, the rest of it is spent sleeping.
+
+        :param segments: Ordered (state, seconds) pairs the radio goes through while awake
+        :param interval: Optional cycle length in seconds
+        :return: (seconds per state, transition count matrix)
+        :raises ValueError: If the segments need a transition the profile does not define
+        """
+        state_times = np.zeros(len(STATES), dtype=np.float64)
+        transitions = np.zeros((len(STATES), len(STATES)), dtype=np.int64)
+        previous = SLEEP
+        for state, duration in segments:
+            state_times[state] += duration
+            if state != previous:
+                transitions[previous, state] += 1
+            previous = state
+        if previous != SLEEP:
+            transitions[previous, SLEEP] += 1
+        undefined = np.argwhere((transitions > 0) & ~self.allowed)
+        if len(undefined):
+            source, target = undefined[0]
+            raise ValueError(f"Radio profile defines no {STATES[source]} -> {STATES[target]} transition")
+        if interval is not None:
+            state_times[SLEEP] += max(0.0, interval - state_times.sum())
+        return state_times, transitions
+
+    def energy(self, state_times, transitions=None):
+        """
+        Energy of time spent in each state plus state transitions.
+
+        Works on one activity or a whole population at once: state_times has shape (..., 4) and
+        transitions (..., 4, 4).
+
+        :return: Energy in Joules (scalar or array over the leading dimensions)
+        """
+        energy = np.asarray(state_times) @ self.power
+        if transitions is not None:
+            energy = energy + (np.asarray(transitions) * self.transition_energy).sum(axis=(-2, -1))
+        return energy
@@ -0,0 +1,159 @@
+# protocols/secure_protocol.py
+import abc
+
+from encryption.hmac_util import HMACUtil
+from protocols import frame
+from protocols.context_pool import ContextPool
+
+
+class SecureProtocol(abc.ABC):
+    def __init__(self, encryption, energy_model, mac_length=8, key_provider=None, cipher_factory=None,
+                 node_id=0, pool_size=256, key_size=None):
+        """
+        Initialize the protocol with encryption and energy model.
+
+        Subclasses define how frames are exchanged (and radio_activity); frame protection,
+        per-peer contexts, stage timing and energy accounting live here.
+
+        :param encryption: Encryption instance (e.g., AES, SPECK); may be None with a key_provider
+        :param energy_model: EnergyModel instance
+        :param mac_length: Truncated HMAC tag length in bytes (4/8/16 as in MIC-32/64/128)
+        :param key_provider: Optional KeyStore (pairwise keys) or KeyManagement/callable (per-node keys); frames
+                             then use the context of their peer instead of the shared encryption instance
+        :param cipher_factory: Cipher class or callable key -> cipher, required with key_provider
+        :param node_id: Address of this node, used to look up link keys; must match the Source of its frames
+                        and fit the 16-bit address field (0..frame.MAX_ADDRESS)
+        :param pool_size: Maximum number of cached per-peer contexts
+        :param key_size: Link key length for cipher factories that are not cipher classes
+        """
+        if not 0 <= node_id <= frame.MAX_ADDRESS:
+            raise ValueError(f"Node id {node_id} does not fit the 16-bit frame address (0..{frame.MAX_ADDRESS})")
+        self.energy_model = energy_model
+        self.setup_energy = 0.0  # Energy spent expanding keys: the shared key, or every per-peer context built
+        self.contexts = None
+        if key_provider is not None:
+            if cipher_factory is None:
+                raise ValueError("A cipher_factory is required with a key_provider")
+            self.contexts = ContextPool(key_provider, cipher_factory, node_id, pool_size, mac_length, key_size,
+                                        on_build=self._charge_key_setup)
+            if encryption is None:
+                encryption = self.contexts.prototype()  # Describes the cipher (algorithm, AEAD)
+        else:
+            self._charge_key_setup(encryption)
+        self.encryption = encryption
+        self.hmac_util = HMACUtil(self.encryption.get_key_bytes(), tag_length=mac_length)
+        self.node_id = node_id
+        # AEAD ciphers (e.g. AES-CCM) authenticate the payload themselves, so no separate HMAC pass
+        self.authenticated = getattr(encryption, "authenticated", False)
+        self.tag_length = 0 if self.authenticated else self.hmac_util.tag_length
+        self.timer = None  # Optional StageTimer measuring encrypt/mac/verify/decrypt
+
+    def _context(self, peer, sending):
+        """Cipher and HMACUtil for frames sent to (or received from) peer; the shared ones without a key provider."""
+        if self.contexts is None:
+            return self.encryption, self.hmac_util
+        return self.contexts.sending(peer) if sending else self.contexts.receiving(peer)
+
+    def _charge_key_setup(self, cipher):
+        self.setup_energy += self.energy_model.key_setup_energy(cipher)
+
+    def key_setup_energy(self):
+        """
+        Energy a node spends installing this protocol's key (expanding its key schedule).
+
+        :return: Energy in Joules (0 without an MCU profile)
+        """
+        return self.energy_model.key_setup_energy(self.encryption)
+
+    def _stage(self, stage, func, *args, **kwargs):
+        """Run one packet-processing stage, timing it when a StageTimer is attached."""
+        if self.timer is None:
+            return func(*args, **kwargs)
+        return self.timer.time(stage, func, *args, **kwargs)
+
+    def _seal(self, frame_type, source, destination, sequence, payload, out=None):
+        """
+        Encrypt a payload and serialize it into a frame, appending an HMAC tag unless the cipher is AEAD.
+
+        :param out: Optional preallocated bytearray to serialize into
+        :return: The frame as bytes, or a memoryview into out
+        """
+        cipher, mac = self._context(destination, sending=True)
+        if self.authenticated:
+            # Bind the addressing fields to the AEAD tag
+            aad = frame.addressing_bytes(frame_type, source, destination, sequence)
+            encrypted_payload = self._stage("encrypt", cipher.encrypt, payload, associated_data=aad)
+        else:
+            encrypted_payload = self._stage("encrypt", cipher.encrypt, payload)
+
+        size = frame.HEADER_SIZE + len(encrypted_payload) + self.tag_length
+        buffer = out if out is not None else bytearray(size)
+        end = frame.write_frame(buffer, frame_type, source, destination, sequence, encrypted_payload)
+        if not self.authenticated:
+            view = memoryview(buffer)
+            buffer[end:size] = self._stage("mac", mac.generate_tag, view[:end])  # Tag covers header and ciphertext
+        return bytes(buffer) if out is None else memoryview(buffer)[:size]
+
+    def _open(self, packet):
+        """
+        Verify a frame and decrypt its payload.
+
+        :param packet: Bytes-like frame
+        :return: Decrypted payload
+        """
+        parsed = frame.parse_frame(packet, self.tag_length)
+        cipher, mac = self._context(parsed.source, sending=False)
+        if self.authenticated:
+            aad = bytes(parsed.authenticated[:frame.ADDRESSING_SIZE])
+            return self._stage("decrypt", cipher.decrypt, parsed.body, associated_data=aad)
+        if not self._stage("verify", mac.verify_tag, parsed.authenticated, parsed.tag):
+            raise ValueError("HMAC verification failed")
+        return self._stage("decrypt", cipher.decrypt, parsed.body)
+
+    def _open_many(self, packets, label="packets"):
+        """
+        Process a batch of frames, authenticating all of them before decrypting any.
+
+        :param packets: List of bytes-like frames
+        :param label: Name of the frames in error messages
+        :return: List of decrypted payloads
+        """
+        if self.authenticated:
+            return [self._open(packet) for packet in packets]
+        parsed = [frame.parse_frame(packet, self.tag_length) for packet in packets]
+        if self.contexts is None:
+            valid = self.hmac_util.verify_many([p.authenticated for p in parsed], [p.tag for p in parsed])
+            failed = [i for i, ok in enumerate(valid) if not ok]
+            if failed:
+                raise ValueError(f"HMAC verification failed for {label} {failed}")
+            return [self.encryption.decrypt(p.body) for p in parsed]
+        contexts = [self.contexts.receiving(p.source) for p in parsed]
+        failed = [i for i, (p, (_, mac)) in enumerate(zip(parsed, contexts))
+                  if not mac.verify_tag(p.authenticated, p.tag)]
+        if failed:
+            raise ValueError(f"HMAC verification failed for {label} {failed}")
+        return [cipher.decrypt(p.body) for p, (cipher, _) in zip(parsed, contexts)]
+
+    def packet_energy(self, payload_length, packet_size):
+        """
+        Energy a node spends to protect and transmit one frame.
+
+        :param payload_length: Plaintext bytes in the frame
+        :param packet_size: On-air frame size in bytes
+        :return: Energy in Joules
+        """
+        mac_length = None if self.authenticated else packet_size - self.tag_length
+        computation = self.energy_model.crypto_energy(self.encryption, payload_length, mac_length)
+        radio = self.energy_model.radio
+        if radio is None:
+            return self.energy_model.calculate_transmission_energy(packet_size) + computation
+        return float(radio.energy(*radio.activity(self.radio_activity(packet_size)))) + computation
+
+    @abc.abstractmethod
+    def radio_activity(self, packet_size):
+        """
+        Radio states of one frame exchange.
+
+        :param packet_size: On-air frame size in bytes
+        :return: Ordered (state, seconds) segments for RadioModel.activity
+        """
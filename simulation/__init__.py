@@ -1,2 +1,17 @@
 # simulation/__init__.py
 from .node_simulation import NodeSimulation
+from .energy_ledger import EnergyLedger
+from .event_scheduler import EventScheduler
+from .parallel_runner import ParallelRunner
+
+# Result sinks need pandas (and pyarrow for Parquet); load them on first use (PEP 562)
+_LAZY = {name: ".result_sink" for name in ("CSVSink", "ParquetSink", "open_sink", "read_records")}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
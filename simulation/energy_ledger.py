@@ -0,0 +1,80 @@
+# simulation/energy_ledger.py
+import numpy as np
+
+from protocols.radio_model import STATES
+
+NUM_RADIO_STATES = len(STATES)
+
+class EnergyLedger:
+    def __init__(self, num_nodes, energy_initial, protocol_index=0):
+        """
+        Per-node energy state for a population of nodes, kept in NumPy arrays.
+
+        :param num_nodes: Number of nodes
+        :param energy_initial: Initial energy in Joules, a scalar or one value per node
+        :param protocol_index: Initial protocol index, a scalar or one value per node
+        """
+        self.num_nodes = num_nodes
+        self.remaining = np.empty(num_nodes, dtype=np.float64)
+        self.remaining[:] = energy_initial
+        self.protocol = np.empty(num_nodes, dtype=np.int32)
+        self.protocol[:] = protocol_index
+        self.cycles = np.zeros(num_nodes, dtype=np.int64)
+        self.consumed = np.zeros(num_nodes, dtype=np.float64)
+        self.bytes_sent = np.zeros(num_nodes, dtype=np.int64)
+        self.state_time = np.zeros((num_nodes, NUM_RADIO_STATES), dtype=np.float64)  # Seconds in each radio state
+        self._cost = np.empty(num_nodes, dtype=np.float64)
+        self._size = np.empty(num_nodes, dtype=np.int64)
+
+    def alive(self):
+        """Mask of nodes that still have energy left."""
+        return self.remaining > 0
+
+    def apply_cycle(self, cycle_energy, packet_sizes, cycle_state_times=None):
+        """
+        Charge one cycle to every live node according to its active protocol.
+
+        :param cycle_energy: Energy per cycle for each protocol index (Joules)
+        :param packet_sizes: Frame size per cycle for each protocol index (bytes)
+        :param cycle_state_times: Optional seconds per radio state per cycle, one row per protocol index
+        :return: Mask of the nodes that ran this cycle
+        """
+        alive = self.alive()
+        np.take(cycle_energy, self.protocol, out=self._cost)
+        self._cost *= alive
+        np.take(packet_sizes, self.protocol, out=self._size)
+        self._size *= alive
+        self.remaining -= self._cost
+        self.consumed += self._cost
+        self.bytes_sent += self._size
+        self.cycles += alive
+        if cycle_state_times is not None:
+            self.state_time += np.take(cycle_state_times, self.protocol, axis=0) * alive[:, None]
+        return alive
+
+    def charge(self, protocol_energy, nodes=None):
+        """
+        Charge a one-off cost, such as a key setup, to nodes according to their active protocol.
+
+        :param protocol_energy: Energy for each protocol index (Joules)
+        :param nodes: Optional mask of the nodes to charge (all nodes if None)
+        """
+        cost = np.take(protocol_energy, self.protocol)
+        if nodes is not None:
+            cost *= nodes
+        self.remaining -= cost
+        self.consumed += cost
+
+    def switch_protocols(self, energy_threshold, switch_targets):
+        """
+        Move every node whose energy dropped below the threshold to its protocol's switch target.
+
+        :param energy_threshold: Energy level below which nodes switch (Joules)
+        :param switch_targets: Target protocol index for each protocol index
+        :return: Mask of the nodes that switched
+        """
+        switching = self.remaining < energy_threshold
+        targets = np.take(switch_targets, self.protocol)
+        switching &= targets != self.protocol
+        self.protocol[switching] = targets[switching]
+        return switching
@@ -0,0 +1,75 @@
+# simulation/event_scheduler.py
+import heapq
+import itertools
+from collections import namedtuple
+
+# Event kinds
+SENSE = "sense"
+TRANSMIT = "transmit"
+RECEIVE = "receive"
+SLEEP = "sleep"
+PROTOCOL_SWITCH = "protocol_switch"
+
+Event = namedtuple("Event", ["time", "kind", "node", "data"])
+
+class EventScheduler:
+    def __init__(self):
+        """Priority queue of timestamped events, dispatched in time order to registered handlers."""
+        self._queue = []
+        self._order = itertools.count()  # Tie-breaker: same-time events run in scheduling order
+        self._handlers = {}
+        self.now = 0.0
+        self.processed = 0
+
+    def __len__(self):
+        return len(self._queue)
+
+    def register(self, kind, handler):
+        """
+        Register the handler for an event kind.
+
+        :param kind: Event kind (e.g. SENSE)
+        :param handler: Callable taking (scheduler, event)
+        """
+        self._handlers[kind] = handler
+
+    def schedule(self, time, kind, node, data=None):
+        """
+        Schedule an event at an absolute time.
+
+        :param time: Simulation time of the event
+        :param kind: Event kind
+        :param node: Node index the event belongs to
+        :param data: Optional event payload
+        """
+        if time < self.now:
+            raise ValueError("Cannot schedule an event in the past")
+        heapq.heappush(self._queue, (time, next(self._order), kind, node, data))
+
+    def schedule_in(self, delay, kind, node, data=None):
+        """Schedule an event relative to the current time."""
+        self.schedule(self.now + delay, kind, node, data)
+
+    def run(self, until=None):
+        """
+        Dispatch events in time order.
+
+        :param until: Stop before the first event later than this time (run to exhaustion if None)
+        :return: Number of events processed in this call
+        """
+        queue = self._queue
+        handlers = self._handlers
+        processed = 0
+        while queue:
+            if until is not None and queue[0][0] > until:
+                self.now = until
+                break
+            time, _, kind, node, data = heapq.heappop(queue)
+            self.now = time
+            handler = handlers.get(kind)
+            if handler is None:
+                raise ValueError(f"No handler registered for event kind: {kind}")
+            handler(self, Event(time, kind, node, data))
+            processed += 1
+        self.processed += processed
+        return processed
@@ -2,9 +2,23 @@
 from protocols.openwsn import OpenWSN
 from protocols.dash7 import DASH7
 from protocols.energy_model import EnergyModel
+from protocols import frame
+from protocols import radio_model
+from evaluation.online_stats import Distribution
+from evaluation.performance import StageTimer
+from simulation.energy_ledger import EnergyLedger
+from simulation import event_scheduler
+from simulation.event_scheduler import EventScheduler
+import numpy as np
+import random
+
+SENSOR_READING = b"Environmental data: Temp=25C, Humidity=60%"
+# Exchanges timed per protocol when the population modes measure their per-packet stage latency
+TIMED_EXCHANGES = 32
 
 class NodeSimulation:
-    def __init__(self, protocols, num_cycles=1000, energy_initial=1.0, energy_threshold=0.05):
+    def __init__(self, protocols, num_cycles=1000, energy_initial=1.0, energy_threshold=0.05, seed=None,
+                 sample_every=10, cycle_interval=60.0, sink=None, sink_interval=1):
         """
         Initialize the simulation environment.
         
@@ -12,12 +26,24 @@ class NodeSimulation:
         :param num_cycles: Number of simulation cycles
         :param energy_initial: Initial energy per node in Joules
         :param energy_threshold: Energy level below which to switch protocols
+        :param seed: Seed for the randomized parts of the simulation (event timing)
+        :param sample_every: Time the crypto stages of one packet in every sample_every packets
+        :param cycle_interval: Seconds per cycle; with a radio model the radio sleeps for the rest of it
+        :param sink: Optional ResultSink receiving per-cycle (or per-event) records
+        :param sink_interval: Write network-simulation records every sink_interval cycles
         """
         self.protocols = protocols
         self.num_cycles = num_cycles
         self.energy_initial = energy_initial  # Joules
         self.energy_threshold = energy_threshold  # Threshold to switch protocols
         self.energy_model = EnergyModel()
+        self.seed = seed
+        self.sample_every = sample_every
+        self.cycle_interval = cycle_interval
+        self.sink = sink
+        self.sink_interval = sink_interval
+        # Mergeable per-metric Distributions of the last run, per starting protocol (summarized under "Statistics")
+        self.distributions = {}
 
     def switch_protocol(self, current_protocol, energy_level):
         """
@@ -38,37 +64,45 @@ class NodeSimulation:
             return new_protocol
         return current_protocol
 
-    def run_simulation(self):
+    def run_simulation(self, protocol_names=None):
         """
         Run the simulation across all protocols.
         
+        :param protocol_names: Starting protocols to simulate (all protocols if None)
         :return: Dictionary containing results for each protocol
         """
         results = {}
-        plaintext = b"Environmental data: Temp=25C, Humidity=60%"
+        plaintext = SENSOR_READING
+        headers = {"Type": "Data"}
+        tx_buffer = bytearray(frame.MAX_FRAME_SIZE)  # Frames are serialized in place, once per cycle
 
-        for protocol_name, protocol in self.protocols.items():
+        for protocol_name in protocol_names or list(self.protocols):
+            protocol = self.protocols[protocol_name]
             print(f"\nSimulating protocol: {protocol_name}")
             remaining_energy = self.energy_initial
             cycle = 0
 
-            encryption_times = []
-            decryption_times = []
-            energy_consumptions = []
-            packet_sizes = []
+            total_energy_consumed = 0.0
+            total_bytes = 0
+            energy_distribution = Distribution()
+            size_distribution = Distribution()
+            radio_time = np.zeros(len(radio_model.STATES))
             current_protocol = protocol_name
+            # The node expands its key once when it starts a protocol, and again on every switch
+            remaining_energy -= protocol.key_setup_energy()
+            total_energy_consumed += protocol.key_setup_energy()
+            timer = StageTimer(self.sample_every)
+            for instance in self.protocols.values():
+                instance.timer = timer
 
             while cycle < self.num_cycles and remaining_energy > 0:
                 current_protocol_instance = self.protocols.get(current_protocol, protocol)
-                
+                timer.next_packet()
+
                 if isinstance(current_protocol_instance, OpenWSN):
                     # For OpenWSN, use prepare_packet
-                    packet = current_protocol_instance.prepare_packet(plaintext, headers={"Type": "Data"})
-                    packet_size = len(packet['payload']) + len(packet['hmac']) + len(packet['headers']['Type'])
-
-                    # Measure encryption time
-                    encryption_time = current_protocol_instance.energy_model.calculate_computation_energy(1)  # One encryption operation
-                    encryption_times.append(encryption_time)
+                    packet = current_protocol_instance.prepare_packet(plaintext, headers, out=tx_buffer)
+                    packet_size = len(packet)  # Exact on-air frame size
 
                     # Process packet
                     try:
@@ -80,12 +114,8 @@ class NodeSimulation:
 
                 elif isinstance(current_protocol_instance, DASH7):
                     # For DASH7, use query_response
-                    response_packet = current_protocol_instance.query_response("Query1", plaintext)
-                    packet_size = len(response_packet['response']) + len(response_packet['hmac']) + len(response_packet['query'])
-
-                    # Measure encryption time
-                    encryption_time = current_protocol_instance.energy_model.calculate_computation_energy(1)  # One encryption operation
-                    encryption_times.append(encryption_time)
+                    response_packet = current_protocol_instance.query_response("Query1", plaintext, out=tx_buffer)
+                    packet_size = len(response_packet)  # Exact on-air frame size
 
                     # Process response
                     try:
@@ -99,39 +129,404 @@ class NodeSimulation:
                     print(f"Unknown protocol type: {current_protocol}")
                     break
 
-                # Measure energy consumption for transmission
-                transmission_energy = current_protocol_instance.energy_model.calculate_transmission_energy(packet_size)
-                packet_sizes.append(packet_size)
-
-                # Measure total energy consumption
-                total_energy = current_protocol_instance.energy_model.total_energy(packet_size, 1)
-                energy_consumptions.append(total_energy)
+                # Computation energy scales with the cipher's work on this payload
+                total_energy, state_times = self._cycle_cost(current_protocol_instance, packet_size,
+                                                             self.cycle_interval)
+                radio_time += state_times
+                energy_distribution.add(total_energy)
+                size_distribution.add(packet_size)
+                total_bytes += packet_size
+                total_energy_consumed += total_energy
                 remaining_energy -= total_energy
+                if self.sink is not None:
+                    self.sink.write(run=protocol_name, cycle=cycle, protocol=current_protocol,
+                                    packet_size=packet_size, energy=total_energy, remaining=remaining_energy)
 
                 # Adaptive Protocol Switching
                 new_protocol = self.switch_protocol(current_protocol, remaining_energy)
                 if new_protocol != current_protocol:
                     print(f"Switching protocol from {current_protocol} to {new_protocol} due to low energy.")
                     current_protocol = new_protocol
+                    setup_energy = self.protocols.get(current_protocol, protocol).key_setup_energy()
+                    remaining_energy -= setup_energy
+                    total_energy_consumed += setup_energy
 
                 cycle += 1
 
+            for instance in self.protocols.values():
+                instance.timer = None
+
             # Estimate network lifetime as number of cycles before energy depletion
             network_lifetime = cycle
 
-            # Aggregate results
-            total_encryption_time = sum(encryption_times)
-            total_decryption_time = total_encryption_time  # Assuming symmetric operations
-            total_energy_consumed = sum(energy_consumptions)
+            # Aggregate results; stage times are sampled, so totals are mean per packet times packets
+            total_encryption_time = (timer.mean("encrypt") + timer.mean("mac")) * cycle
+            total_decryption_time = (timer.mean("verify") + timer.mean("decrypt")) * cycle
 
             results[protocol_name] = {
                 "Encryption Time (s)": total_encryption_time,
                 "Decryption Time (s)": total_decryption_time,
                 "Energy Consumption (J)": total_energy_consumed,
-                "Packet Size (bytes)": sum(packet_sizes) / len(packet_sizes) if packet_sizes else 0,
-                "Network Lifetime (cycles)": network_lifetime
+                "Packet Size (bytes)": total_bytes / cycle if cycle else 0,
+                "Network Lifetime (cycles)": network_lifetime,
+                "Stage Latency (s)": timer.summary()
             }
+            self.distributions[protocol_name] = {
+                "Energy per Cycle (J)": energy_distribution,
+                "Packet Size (bytes)": size_distribution,
+                "Stage Latency (s)": timer.stages,
+            }
+            results[protocol_name]["Statistics"] = self.summarize(self.distributions[protocol_name])
+            if radio_time.any():
+                results[protocol_name]["Radio Time (s)"] = dict(zip(radio_model.STATES, radio_time.tolist()))
 
             print(f"Protocol: {protocol_name} | Cycles: {network_lifetime} | Energy Consumed: {total_energy_consumed:.6f} J")
 
         return results
+
+    def _exchange_packet(self, protocol, plaintext, tx_buffer):
+        """
+        Send one packet through a protocol and check that it decrypts.
+
+        :return: On-air frame size in bytes
+        """
+        if isinstance(protocol, OpenWSN):
+            packet = protocol.prepare_packet(plaintext, {"Type": "Data"}, out=tx_buffer)
+            decrypted = protocol.process_packet(packet)
+        elif isinstance(protocol, DASH7):
+            packet = protocol.query_response("Query1", plaintext, out=tx_buffer)
+            decrypted = protocol.process_response(packet)
+        else:
+            raise ValueError(f"Unknown protocol type: {type(protocol).__name__}")
+        if decrypted != plaintext:
+            raise ValueError("Decryption failed!")
+        return len(packet)
+
+    @staticmethod
+    def _cycle_cost(protocol, packet_size, interval=None):
+        """
+        Energy and radio state times of one cycle that sends a SENSOR_READING frame.
+
+        :param interval: Cycle length; the radio sleeps for whatever the exchange leaves of it
+        :return: (energy in Joules, seconds per radio state; zeros without a radio model)
+        """
+        energy = protocol.packet_energy(len(SENSOR_READING), packet_size)
+        radio = protocol.energy_model.radio
+        if radio is None:
+            return energy, np.zeros(len(radio_model.STATES))
+        state_times, _ = radio.activity(protocol.radio_activity(packet_size), interval)
+        return energy + state_times[radio_model.SLEEP] * radio.power[radio_model.SLEEP], state_times
+
+    def _protocol_costs(self, names, interval=None):
+        """
+        Measure frame size, per-cycle energy, radio state times and stage latency of each protocol.
+
+        Sizes and energy come from one real exchange; TIMED_EXCHANGES further exchanges run with a
+        StageTimer attached.
+
+        :return: (packet sizes, energy per cycle, state times per cycle, StageTimer per protocol)
+        """
+        tx_buffer = bytearray(frame.MAX_FRAME_SIZE)
+        packet_sizes = np.zeros(len(names), dtype=np.int64)
+        packet_energy = np.zeros(len(names), dtype=np.float64)
+        state_times = np.zeros((len(names), len(radio_model.STATES)), dtype=np.float64)
+        timers = []
+        for i, name in enumerate(names):
+            protocol = self.protocols[name]
+            packet_sizes[i] = self._exchange_packet(protocol, SENSOR_READING, tx_buffer)
+            packet_energy[i], state_times[i] = self._cycle_cost(protocol, int(packet_sizes[i]), interval)
+            timer = StageTimer(sample_every=1)
+            protocol.timer = timer
+            try:
+                for _ in range(TIMED_EXCHANGES):
+                    timer.next_packet()
+                    self._exchange_packet(protocol, SENSOR_READING, tx_buffer)
+            finally:
+                protocol.timer = None
+            timers.append(timer)
+        return packet_sizes, packet_energy, state_times, timers
+
+    @staticmethod
+    def _stage_times(timers, packet_counts):
+        """
+        Crypto time of the packets one run sent, from the per-protocol stage timers.
+
+        :param timers: StageTimer per protocol index
+        :param packet_counts: Packets sent per protocol index
+        :return: (total encryption seconds, total decryption seconds, merged per-stage Distributions)
+        """
+        encryption = decryption = 0.0
+        stages = {stage: Distribution() for stage in StageTimer.STAGES}
+        for timer, count in zip(timers, packet_counts):
+            if not count:
+                continue
+            encryption += (timer.mean("encrypt") + timer.mean("mac")) * count
+            decryption += (timer.mean("verify") + timer.mean("decrypt")) * count
+            for stage, distribution in timer.stages.items():
+                stages[stage].merge(distribution)
+        return encryption, decryption, stages
+
+    def _switch_targets(self, names):
+        """Index of each protocol's switch target; protocols whose target is not simulated keep running."""
+        index = {name: i for i, name in enumerate(names)}
+        return np.array([index.get(self.switch_protocol(name, float("-inf")), i)
+                         for i, name in enumerate(names)], dtype=np.int32)
+
+    @staticmethod
+    def summarize(distributions):
+        """
+        Summaries of a run's Distributions; stage latencies are summarized separately by StageTimer.
+
+        :return: {metric: {"count", "mean", "std", "min", "max", "p50", "p95", "p99"}}
+        """
+        return {metric: distribution.summary() for metric, distribution in distributions.items()
+                if metric != "Stage Latency (s)"}
+
+    def run_network_simulation(self, num_nodes=1000, protocol_names=None):
+        """
+        Run every protocol on a population of nodes, advancing all nodes together each cycle.
+
+        Every protocol's per-cycle cost is measured once with a real packet exchange; the
+        per-node energy, cycle count and active protocol then live in an EnergyLedger.
+
+        :param num_nodes: Number of nodes starting on each protocol
+        :param protocol_names: Starting protocols to simulate (all protocols if None)
+        :return: Dictionary containing results for each protocol
+        """
+        names = list(self.protocols)
+        starts = protocol_names or names
+        packet_sizes, cycle_energy, cycle_state_times, timers = self._protocol_costs(names, self.cycle_interval)
+        switch_targets = self._switch_targets(names)
+        setup_energy = np.array([self.protocols[name].key_setup_energy() for name in names], dtype=np.float64)
+        if not cycle_state_times.any():
+            cycle_state_times = None  # No radio model: nothing to track per state
+
+        # One ledger row block of num_nodes per starting protocol
+        start_index = np.array([names.index(name) for name in starts], dtype=np.int32)
+        ledger = EnergyLedger(len(starts) * num_nodes, self.energy_initial, np.repeat(start_index, num_nodes))
+        ledger.charge(setup_energy)  # Every node installs its starting protocol's key
+        # Cycles run per (starting protocol, active protocol); every such cycle has the same energy and size
+        cycle_key = np.repeat(np.arange(len(starts), dtype=np.int64) * len(names), num_nodes)
+        cycle_counts = np.zeros(len(starts) * len(names), dtype=np.int64)
+        if self.sink is not None:
+            run_labels = np.repeat(np.array(starts), num_nodes)
+            node_ids = np.tile(np.arange(num_nodes), len(starts))
+            protocol_labels = np.array(names)
+        for cycle in range(self.num_cycles):
+            ran = ledger.apply_cycle(cycle_energy, packet_sizes, cycle_state_times)
+            if not ran.any():
+                break
+            cycle_counts += np.bincount(cycle_key[ran] + ledger.protocol[ran], minlength=len(cycle_counts))
+            if self.sink is not None and cycle % self.sink_interval == 0:
+                # Only nodes that ran; a node's last record marks when it died
+                active = ledger.protocol[ran]
+                self.sink.write_batch({
+                    "run": run_labels[ran], "cycle": cycle, "node": node_ids[ran],
+                    "protocol": protocol_labels[active], "packet_size": packet_sizes[active],
+                    "remaining": ledger.remaining[ran],
+                })
+            switched = ledger.switch_protocols(self.energy_threshold, switch_targets)
+            if switched.any():
+                ledger.charge(setup_energy, switched)
+
+        cycles = ledger.cycles.reshape(len(starts), num_nodes)
+        consumed = ledger.consumed.reshape(len(starts), num_nodes)
+        bytes_sent = ledger.bytes_sent.reshape(len(starts), num_nodes)
+        alive = ledger.alive().reshape(len(starts), num_nodes)
+        state_time = ledger.state_time.reshape(len(starts), num_nodes, -1)
+
+        results = {}
+        for i, name in enumerate(starts):
+            total_cycles = int(cycles[i].sum())
+            mean_cycles = total_cycles / num_nodes
+            run_counts = cycle_counts[i * len(names):(i + 1) * len(names)].tolist()
+            encryption_time, decryption_time, stages = self._stage_times(timers, run_counts)
+            results[name] = {
+                "Encryption Time (s)": encryption_time / num_nodes,  # Per node, as in the scalar simulation
+                "Decryption Time (s)": decryption_time / num_nodes,
+                "Energy Consumption (J)": float(consumed[i].mean()),
+                "Packet Size (bytes)": int(bytes_sent[i].sum()) / total_cycles if total_cycles else 0,
+                "Network Lifetime (cycles)": int(cycles[i].min()),  # Until the first node dies
+                "Mean Node Lifetime (cycles)": mean_cycles,
+                "Nodes Alive": int(alive[i].sum()),
+                "Stage Latency (s)": StageTimer.summarize(stages),
+            }
+            if state_time[i].any():
+                results[name]["Radio Time (s)"] = dict(zip(radio_model.STATES, state_time[i].mean(axis=0).tolist()))
+            distributions = {metric: Distribution() for metric in
+                             ("Energy per Cycle (J)", "Packet Size (bytes)", "Node Lifetime (cycles)")}
+            for j, count in enumerate(run_counts):
+                distributions["Energy per Cycle (J)"].add(cycle_energy[j], count)
+                distributions["Packet Size (bytes)"].add(packet_sizes[j], count)
+            distributions["Node Lifetime (cycles)"].add_array(cycles[i])
+            distributions["Stage Latency (s)"] = stages
+            self.distributions[name] = distributions
+            results[name]["Statistics"] = self.summarize(distributions)
+            print(f"Protocol: {name} | Nodes: {num_nodes} | First death: {results[name]['Network Lifetime (cycles)']} cycles"
+                  f" | Alive: {results[name]['Nodes Alive']}")
+        return results
+
+    def run_event_simulation(self, num_nodes=100, sense_interval=60.0, query_rate=None, duration=None,
+                             protocol_names=None):
+        """
+        Run every protocol on a duty-cycled population driven by a discrete-event scheduler.
+
+        OpenWSN nodes wake on their sensing timer and report every reading; DASH7 nodes stay
+        asleep until a query arrives (Poisson arrivals) and answer it. Sleeping nodes have no
+        pending work besides their next wake-up, so run time scales with the number of events.
+
+        :param num_nodes: Number of nodes starting on each protocol
+        :param sense_interval: Seconds between sensing wake-ups; one interval counts as one cycle
+        :param query_rate: DASH7 queries per node per second (defaults to one per sense interval)
+        :param duration: Simulated seconds (defaults to num_cycles sense intervals)
+        :param protocol_names: Starting protocols to simulate (all protocols if None)
+        :return: Dictionary containing results for each protocol
+        """
+        names = list(self.protocols)
+        starts = protocol_names or names
+        packet_sizes, packet_energy, state_times, timers = self._protocol_costs(names)
+        packet_sizes = packet_sizes.tolist()
+        packet_energy = packet_energy.tolist()
+        # Radio time per wake-up, and sleep power for the time between wake-ups
+        active_time = state_times.sum(axis=1).tolist()
+        sleep_power = [float(self.protocols[name].energy_model.radio.power[radio_model.SLEEP])
+                       if self.protocols[name].energy_model.radio is not None else 0.0 for name in names]
+        switch_targets = self._switch_targets(names).tolist()
+        setup_energy = [self.protocols[name].key_setup_energy() for name in names]
+        on_demand = [isinstance(self.protocols[name], DASH7) for name in names]
+        query_rate = query_rate if query_rate else 1.0 / sense_interval
+        duration = duration if duration is not None else self.num_cycles * sense_interval
+        rng = random.Random(self.seed)
+
+        total_nodes = len(starts) * num_nodes
+        remaining = [float(self.energy_initial)] * total_nodes
+        protocol = [names.index(name) for name in starts for _ in range(num_nodes)]
+        packets = [0] * total_nodes
+        bytes_sent = [0] * total_nodes
+        death_time = [None] * total_nodes
+        sent_by_protocol = [0] * (len(starts) * len(names))  # Packets per (starting protocol, active protocol)
+        wake_epoch = [0] * total_nodes  # Invalidates the pending wake-up chain after a protocol switch
+        asleep_since = [0.0] * total_nodes
+        radio_time = np.zeros((total_nodes, len(radio_model.STATES)))
+        threshold = self.energy_threshold
+        sink = self.sink
+
+        scheduler = EventScheduler()
+
+        def start_wakeups(node, first_delay=None):
+            wake_epoch[node] += 1
+            if on_demand[protocol[node]]:
+                scheduler.schedule_in(rng.expovariate(query_rate), event_scheduler.RECEIVE, node, wake_epoch[node])
+            else:
+                delay = sense_interval if first_delay is None else first_delay
+                scheduler.schedule_in(delay, event_scheduler.SENSE, node, wake_epoch[node])
+
+        def on_sense(scheduler, event):
+            node = event.node
+            if death_time[node] is not None or event.data != wake_epoch[node]:
+                return  # Dead node or a timer from before a protocol switch
+            scheduler.schedule(event.time, event_scheduler.TRANSMIT, node)
+            scheduler.schedule_in(sense_interval, event_scheduler.SENSE, node, event.data)
+
+        def on_receive(scheduler, event):
+            node = event.node
+            if death_time[node] is not None or event.data != wake_epoch[node]:
+                return
+            scheduler.schedule(event.time, event_scheduler.TRANSMIT, node)
+            scheduler.schedule_in(rng.expovariate(query_rate), event_scheduler.RECEIVE, node, event.data)
+
+        def charge_sleep(node, until):
+            """Charge sleep current since the radio last went to sleep; returns False if the node died."""
+            slept = until - asleep_since[node]
+            if slept <= 0 or sleep_power[protocol[node]] == 0:
+                return True
+            sleep_energy = slept * sleep_power[protocol[node]]
+            if sleep_energy >= remaining[node]:
+                death_time[node] = asleep_since[node] + remaining[node] / sleep_power[protocol[node]]
+                radio_time[node, radio_model.SLEEP] += death_time[node] - asleep_since[node]
+                remaining[node] = 0.0
+                return False
+            remaining[node] -= sleep_energy
+            radio_time[node, radio_model.SLEEP] += slept
+            asleep_since[node] = until
+            return True
+
+        def on_transmit(scheduler, event):
+            node = event.node
+            if not charge_sleep(node, event.time):
+                return
+            active = protocol[node]
+            remaining[node] -= packet_energy[active]
+            radio_time[node] += state_times[active]
+            if sink is not None:
+                sink.write(run=starts[node // num_nodes], time=event.time, node=node % num_nodes,
+                           protocol=names[active], packet_size=packet_sizes[active], remaining=remaining[node])
+            packets[node] += 1
+            bytes_sent[node] += packet_sizes[active]
+            sent_by_protocol[node // num_nodes * len(names) + active] += 1
+            if remaining[node] <= 0:
+                death_time[node] = event.time
+                return
+            if remaining[node] < threshold and switch_targets[active] != active:
+                scheduler.schedule(event.time, event_scheduler.PROTOCOL_SWITCH, node, switch_targets[active])
+            scheduler.schedule(event.time, event_scheduler.SLEEP, node)
+
+        def on_switch(scheduler, event):
+            protocol[event.node] = event.data
+            remaining[event.node] -= setup_energy[event.data]  # Key setup of the new protocol
+            start_wakeups(event.node)
+
+        def on_sleep(scheduler, event):
+            asleep_since[event.node] = event.time + active_time[protocol[event.node]]
+
+        scheduler.register(event_scheduler.SENSE, on_sense)
+        scheduler.register(event_scheduler.RECEIVE, on_receive)
+        scheduler.register(event_scheduler.TRANSMIT, on_transmit)
+        scheduler.register(event_scheduler.PROTOCOL_SWITCH, on_switch)
+        scheduler.register(event_scheduler.SLEEP, on_sleep)
+
+        for node in range(total_nodes):
+            remaining[node] -= setup_energy[protocol[node]]
+            start_wakeups(node, first_delay=rng.uniform(0.0, sense_interval))  # Desynchronized timers
+        scheduler.run(until=duration)
+        for node in range(total_nodes):
+            if death_time[node] is None:
+                charge_sleep(node, duration)
+
+        results = {}
+        for i, name in enumerate(starts):
+            nodes = range(i * num_nodes, (i + 1) * num_nodes)
+            run_counts = sent_by_protocol[i * len(names):(i + 1) * len(names)]
+            encryption_time, decryption_time, stages = self._stage_times(timers, run_counts)
+            total_packets = sum(packets[n] for n in nodes)
+            deaths = [death_time[n] for n in nodes if death_time[n] is not None]
+            first_death = min(deaths) if deaths else duration
+            consumed = sum(self.energy_initial - max(remaining[n], 0.0) for n in nodes)
+            results[name] = {
+                "Encryption Time (s)": encryption_time / num_nodes,  # Per node, as in the scalar simulation
+                "Decryption Time (s)": decryption_time / num_nodes,
+                "Energy Consumption (J)": consumed / num_nodes,
+                "Packet Size (bytes)": sum(bytes_sent[n] for n in nodes) / total_packets if total_packets else 0,
+                "Network Lifetime (cycles)": int(first_death // sense_interval),
+                "Network Lifetime (s)": first_death,
+                "Packets Sent": total_packets,
+                "Nodes Alive": num_nodes - len(deaths),
+                "Stage Latency (s)": StageTimer.summarize(stages),
+            }
+            node_radio_time = radio_time[i * num_nodes:(i + 1) * num_nodes]
+            if node_radio_time.any():
+                results[name]["Radio Time (s)"] = dict(zip(radio_model.STATES, node_radio_time.mean(axis=0).tolist()))
+            distributions = {metric: Distribution() for metric in
+                             ("Energy per Packet (J)", "Packet Size (bytes)", "Node Lifetime (s)")}
+            for j, count in enumerate(run_counts):
+                distributions["Energy per Packet (J)"].add(packet_energy[j], count)
+                distributions["Packet Size (bytes)"].add(packet_sizes[j], count)
+            distributions["Node Lifetime (s)"].add_array([duration if death_time[n] is None else death_time[n]
+                                                          for n in nodes])
+            distributions["Stage Latency (s)"] = stages
+            self.distributions[name] = distributions
+            results[name]["Statistics"] = self.summarize(distributions)
+            print(f"Protocol: {name} | Nodes: {num_nodes} | First death: {first_death:.1f} s"
+                  f" | Packets: {total_packets}")
+        print(f"Processed {scheduler.processed} events")
+        return results
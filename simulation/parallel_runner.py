@@ -0,0 +1,217 @@
+# simulation/parallel_runner.py
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import os
+import random
+
+from encryption.aes import AES
+from encryption.speck import SpeckCipher
+from encryption.present import PresentCipher
+from encryption.selective_encryption import SelectiveEncryption
+from encryption.chacha20_cipher import ChaCha20Cipher
+from protocols.openwsn import OpenWSN
+from protocols.dash7 import DASH7
+from protocols.energy_model import EnergyModel
+from evaluation.online_stats import Distribution
+from evaluation.performance import StageTimer
+from simulation.node_simulation import NodeSimulation
+
+CIPHERS = {
+    "AES": lambda **options: AES(**options),
+    "AESCCM": lambda **options: AES(mode="CCM", **options),
+    "SPECK": lambda **options: SpeckCipher(**options),
+    "PRESENT": lambda **options: PresentCipher(**options),
+    "ChaCha20": lambda **options: ChaCha20Cipher(**options),
+    "ChaCha20Poly1305": lambda **options: ChaCha20Cipher(mode="poly1305", **options),
+    "SelectiveAES": lambda **options: SelectiveEncryption(AES(), **options),
+}
+PROTOCOLS = {"OpenWSN": OpenWSN, "DASH7": DASH7}
+
+# The protocol/cipher combinations simulated when none are selected (ParallelRunner and main.py)
+DEFAULT_PROTOCOLS = [
+    "OpenWSN_AES", "OpenWSN_SPECK", "OpenWSN_PRESENT", "OpenWSN_ChaCha20",
+    "DASH7_AES", "DASH7_SPECK", "DASH7_PRESENT", "DASH7_ChaCha20",
+    "OpenWSN_SelectiveAES",
+    "OpenWSN_AESCCM", "DASH7_AESCCM",  # AEAD: ciphertext and tag in one pass, no separate HMAC
+    "OpenWSN_ChaCha20Poly1305", "DASH7_ChaCha20Poly1305",
+]
+
+# Everything a worker needs to rebuild and run one configuration; only this crosses the process boundary
+SimulationSpec = namedtuple("SimulationSpec", [
+    "protocol", "num_cycles", "energy_initial", "energy_threshold", "seed",
+    "cipher_options", "energy_model", "mode", "num_nodes",
+])
+SimulationSpec.__new__.__defaults__ = (1000, 1.0, 0.05, None, None, None, "scalar", 1)
+
+
+def split_protocol_name(name):
+    """Split "OpenWSN_AES" into its protocol and cipher parts."""
+    protocol, _, cipher = name.partition("_")
+    if protocol not in PROTOCOLS or cipher not in CIPHERS:
+        raise ValueError(f"Unknown protocol configuration: {name}")
+    return protocol, cipher
+
+
+def build_protocols(names, cipher_options=None, energy_model=None):
+    """
+    Instantiate protocols by name, sharing one cipher instance per cipher type as main.py does.
+
+    :param names: Protocol names such as "OpenWSN_AES"
+    :param cipher_options: Keyword arguments per cipher name (e.g. {"SelectiveAES": {"encryption_ratio": 0.3}})
+    :param energy_model: EnergyModel keyword arguments
+    :return: Dictionary of protocol instances
+    """
+    cipher_options = cipher_options or {}
+    model = EnergyModel(**(energy_model or {}))
+    ciphers = {}
+    protocols = {}
+    for name in names:
+        protocol, cipher = split_protocol_name(name)
+        if cipher not in ciphers:
+            ciphers[cipher] = CIPHERS[cipher](**cipher_options.get(cipher, {}))
+        protocols[name] = PROTOCOLS[protocol](ciphers[cipher], model)
+    return protocols
+
+
+def run_spec(spec):
+    """Build and run one configuration; executed inside a worker process."""
+    if spec.seed is not None:
+        random.seed(spec.seed)
+    names = [spec.protocol]
+    simulation = NodeSimulation({}, spec.num_cycles, spec.energy_initial, spec.energy_threshold, seed=spec.seed)
+    switch_target = simulation.switch_protocol(spec.protocol, float("-inf"))
+    if switch_target != spec.protocol:
+        names.append(switch_target)  # The protocol this one falls back to on low energy
+    simulation.protocols = build_protocols(names, spec.cipher_options, spec.energy_model)
+
+    if spec.mode == "scalar":
+        results = simulation.run_simulation([spec.protocol])
+    elif spec.mode == "network":
+        results = simulation.run_network_simulation(spec.num_nodes, [spec.protocol])
+    elif spec.mode == "event":
+        results = simulation.run_event_simulation(spec.num_nodes, protocol_names=[spec.protocol])
+    else:
+        raise ValueError(f"Unknown simulation mode: {spec.mode}")
+    metrics = results[spec.protocol]
+    metrics["Sketches"] = sketch_state(simulation.distributions[spec.protocol])  # Lets merge_results combine runs exactly
+    return metrics
+
+
+def sketch_state(distributions):
+    """Plain-data state of a run's Distributions (stage latencies nested per stage)."""
+    state = {}
+    for metric, value in distributions.items():
+        if isinstance(value, dict):
+            state[metric] = {stage: distribution.to_dict() for stage, distribution in value.items()}
+        else:
+            state[metric] = value.to_dict()
+    return state
+
+
+def merge_sketches(states):
+    """
+    Merge the sketch states of several runs.
+
+    :return: {metric: Distribution}, stage latencies as {stage: Distribution}
+    """
+    merged = {}
+    for state in states:
+        for metric, value in state.items():
+            if "stats" in value:
+                merged.setdefault(metric, Distribution()).merge(Distribution.from_dict(value))
+            else:
+                stages = merged.setdefault(metric, {})
+                for stage, stage_state in value.items():
+                    stages.setdefault(stage, Distribution()).merge(Distribution.from_dict(stage_state))
+    return merged
+
+
+def run_specs(specs, max_workers=None):
+    """
+    Run specs across a process pool.
+
+    :param specs: List of SimulationSpec
+    :param max_workers: Worker processes (defaults to the CPU count; 1 runs in-process)
+    :return: List of per-spec metrics, in spec order
+    """
+    max_workers = max_workers or os.cpu_count()
+    if max_workers == 1 or len(specs) <= 1:
+        return [run_spec(spec) for spec in specs]
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(specs))) as executor:
+        # Run times differ widely between configurations, so hand out one spec at a time
+        return list(executor.map(run_spec, specs, chunksize=1))
+
+
+# Metrics rebuilt from the merged sketches (or only used to build them) instead of averaged
+REBUILT_METRICS = ("Statistics", "Stage Latency (s)", "Sketches")
+
+
+def _average(values):
+    """Mean of numbers, or per-key mean of dicts of numbers (e.g. radio time per state); None otherwise."""
+    if all(isinstance(value, (int, float)) for value in values):
+        return sum(values) / len(values)
+    if all(isinstance(value, dict) for value in values):
+        averaged = {key: _average([value[key] for value in values])
+                    for key in values[0] if all(key in value for value in values)}
+        return {key: value for key, value in averaged.items() if value is not None}
+    return None
+
+
+def merge_results(runs):
+    """
+    Merge per-run result dicts into one dict per protocol, averaging numeric metrics over seeds.
+
+    Nested numeric metrics, such as the radio time per state, are averaged key by key.
+
+    Distribution statistics and stage latencies are recomputed from the runs' merged sketches,
+    so their percentiles cover every packet of every run rather than averaging per-run percentiles.
+
+    :param runs: List of (spec, metrics) pairs
+    :return: Dictionary containing results for each protocol
+    """
+    grouped = {}
+    for spec, metrics in runs:
+        grouped.setdefault(spec.protocol, []).append(metrics)
+    merged = {}
+    for protocol, metric_list in grouped.items():
+        merged[protocol] = {}
+        for metric in metric_list[0]:
+            if metric in REBUILT_METRICS or not all(metric in m for m in metric_list):
+                continue
+            value = _average([m[metric] for m in metric_list])
+            if value is not None:
+                merged[protocol][metric] = value
+        if len(metric_list) > 1:
+            merged[protocol]["Runs"] = len(metric_list)
+        if all("Sketches" in m for m in metric_list):
+            distributions = merge_sketches(m["Sketches"] for m in metric_list)
+            merged[protocol]["Statistics"] = NodeSimulation.summarize(distributions)
+            if "Stage Latency (s)" in distributions:
+                merged[protocol]["Stage Latency (s)"] = StageTimer.summarize(distributions["Stage Latency (s)"])
+    return merged
+
+
+class ParallelRunner:
+    def __init__(self, protocols=None, seeds=(None,), max_workers=None, **params):
+        """
+        Run independent protocol configurations and seeds across a process pool.
+
+        :param protocols: Protocol names such as "OpenWSN_AES" (defaults to main.py's set)
+        :param seeds: Seeds to run for every protocol
+        :param max_workers: Worker processes (defaults to the CPU count)
+        :param params: Remaining SimulationSpec fields (num_cycles, energy_initial, mode, ...)
+        """
+        self.specs = [SimulationSpec(protocol=name, seed=seed, **params)
+                      for name in (protocols or DEFAULT_PROTOCOLS) for seed in seeds]
+        self.max_workers = max_workers
+        self.runs = []
+
+    def run(self):
+        """
+        Run every spec and merge the results.
+
+        :return: Dictionary containing results for each protocol
+        """
+        results = run_specs(self.specs, self.max_workers)
+        self.runs = list(zip(self.specs, results))
+        return merge_results(self.runs)
@@ -0,0 +1,157 @@
+# simulation/result_sink.py
+import abc
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional
+    pa = pq = None
+
+
+class ResultSink(abc.ABC):
+    def __init__(self, path, chunk_size=65536):
+        """
+        Buffer simulation records and write them out in chunks, so memory stays bounded.
+
+        Columns are taken from the first record; later records must have the same columns.
+
+        :param path: Output file path
+        :param chunk_size: Records buffered before a chunk is written
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        self.columns = None
+        self.records_written = 0
+        self._rows = []
+        self._batches = []
+        self._buffered = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def _check_columns(self, columns):
+        columns = list(columns)
+        if self.columns is None:
+            self.columns = columns
+        elif columns != self.columns:
+            raise ValueError(f"Record columns {columns} do not match the sink's columns {self.columns}")
+
+    def write(self, **record):
+        """Buffer one record given as column=value keyword arguments."""
+        self._check_columns(record)
+        self._rows.append(tuple(record.values()))
+        self._buffered += 1
+        if self._buffered >= self.chunk_size:
+            self.flush()
+
+    def write_batch(self, columns):
+        """
+        Buffer many records at once.
+
+        :param columns: Dictionary of equal-length arrays (or scalars broadcast to that length), one per column
+        """
+        self._check_columns(columns)
+        if self._rows:
+            self._batches.append(self._rows_frame())
+        frame = pd.DataFrame(columns)
+        self._batches.append(frame)
+        self._buffered += len(frame)
+        if self._buffered >= self.chunk_size:
+            self.flush()
+
+    def _rows_frame(self):
+        frame = pd.DataFrame.from_records(self._rows, columns=self.columns)
+        self._rows = []
+        return frame
+
+    def flush(self):
+        """Write everything buffered so far as one chunk."""
+        if self._rows:
+            self._batches.append(self._rows_frame())
+        if not self._batches:
+            return
+        chunk = pd.concat(self._batches, ignore_index=True) if len(self._batches) > 1 else self._batches[0]
+        self._batches = []
+        self._buffered = 0
+        self._write_chunk(chunk)
+        self.records_written += len(chunk)
+
+    @abc.abstractmethod
+    def _write_chunk(self, chunk):
+        """Write one chunk (a DataFrame) to the output file."""
+
+    def close(self):
+        """Flush remaining records and close the file."""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CSVSink(ResultSink):
+    """Chunked CSV output; the header is written with the first chunk."""
+
+    def __init__(self, path, chunk_size=65536):
+        super().__init__(path, chunk_size)
+        self._file = open(path, "w", newline="")
+        self._header = True
+
+    def _write_chunk(self, chunk):
+        chunk.to_csv(self._file, header=self._header, index=False)
+        self._header = False
+
+    def close(self):
+        if not self._file.closed:
+            super().close()
+            self._file.close()
+
+
+class ParquetSink(ResultSink):
+    """Parquet output with one row group per chunk (requires pyarrow)."""
+
+    def __init__(self, path, chunk_size=65536):
+        if pq is None:
+            raise ImportError("Parquet output requires pyarrow; install it or use a .csv path")
+        super().__init__(path, chunk_size)
+        self._writer = None
+
+    def _write_chunk(self, chunk):
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+
+    def close(self):
+        super().close()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def open_sink(path, chunk_size=65536):
+    """Create a sink for path, choosing Parquet for .parquet files and CSV otherwise."""
+    if path.endswith(".parquet"):
+        return ParquetSink(path, chunk_size)
+    return CSVSink(path, chunk_size)
+
+
+def read_records(path, chunk_size=65536, columns=None):
+    """
+    Lazily read records written by a sink.
+
+    :param path: CSV or Parquet file
+    :param chunk_size: Records per yielded DataFrame
+    :param columns: Optional subset of columns to read
+    :return: Iterator of pandas DataFrames
+    """
+    if path.endswith(".parquet"):
+        if pq is None:
+            raise ImportError("Reading Parquet requires pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, usecols=columns)
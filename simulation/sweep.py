@@ -0,0 +1,149 @@
+# simulation/sweep.py
+import csv
+import hashlib
+import itertools
+import json
+import os
+
+from simulation.parallel_runner import SimulationSpec, run_specs
+
+# Source trees whose contents define the "code version" part of every cache key
+CODE_PACKAGES = ("encryption", "evaluation", "protocols", "simulation")  # evaluation: StageTimer, statistics
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_code_version = None
+
+
+def code_version():
+    """Hash of every source file the simulation depends on; any code change invalidates the cache."""
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256()
+        for package in CODE_PACKAGES:
+            package_dir = os.path.join(PROJECT_ROOT, package)
+            for name in sorted(os.listdir(package_dir)):
+                if name.endswith(".py"):
+                    digest.update(f"{package}/{name}".encode())
+                    with open(os.path.join(package_dir, name), "rb") as f:
+                        digest.update(f.read())
+        _code_version = digest.hexdigest()
+    return _code_version
+
+
+def expand_grid(grid):
+    """
+    Expand a parameter grid into a list of configurations.
+
+    :param grid: Dictionary mapping parameter names to a value or a list of values
+    :return: List of configuration dictionaries (cartesian product)
+    """
+    keys = sorted(grid)
+    values = [grid[key] if isinstance(grid[key], (list, tuple)) else [grid[key]] for key in keys]
+    return [dict(zip(keys, combination)) for combination in itertools.product(*values)]
+
+
+def config_hash(config):
+    """Content address of a configuration together with the code version."""
+    payload = json.dumps({"config": config, "code": code_version()}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def config_to_spec(config):
+    """
+    Translate a flat sweep configuration into a SimulationSpec.
+
+    Recognized keys: protocol, num_cycles, energy_initial, energy_threshold, seed, mode, num_nodes,
+    encryption_ratio (SelectiveAES), energy_per_bit, energy_per_operation, profile and radio (EnergyModel).
+    """
+    config = dict(config)
+    cipher_options = {}
+    if "encryption_ratio" in config:
+        cipher_options["SelectiveAES"] = {"encryption_ratio": config.pop("encryption_ratio")}
+    energy_model = {key: config.pop(key) for key in ("energy_per_bit", "energy_per_operation", "profile", "radio") if key in config}
+    unknown = set(config) - set(SimulationSpec._fields)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+    return SimulationSpec(cipher_options=cipher_options or None, energy_model=energy_model or None, **config)
+
+
+def flatten(record, prefix=""):
+    """Flatten nested metric dictionaries into "outer.inner" columns."""
+    flat = {}
+    for key, value in record.items():
+        if key == "Sketches":
+            continue  # Raw sketch state, kept in the cache but not a table column
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        else:
+            flat[name] = value
+    return flat
+
+
+class ParameterSweep:
+    def __init__(self, configs, cache_dir="results/sweep_cache", max_workers=None):
+        """
+        Run a parameter sweep, skipping configurations whose results are already cached.
+
+        :param configs: Parameter grid (dict of value lists) or list of configuration dicts
+        :param cache_dir: Directory holding one JSON result file per configuration hash
+        :param max_workers: Worker processes for the configurations that still need to run
+        """
+        self.configs = expand_grid(configs) if isinstance(configs, dict) else list(configs)
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.rows = []
+        self.cache_hits = 0
+
+    def _cache_path(self, digest):
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def run(self):
+        """
+        Run every configuration not found in the cache.
+
+        :return: List of rows, each the configuration merged with its metrics
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        digests = [config_hash(config) for config in self.configs]
+        metrics = {}
+        pending = []
+        seen = set()
+        for digest, config in zip(digests, self.configs):
+            if digest in seen:
+                continue  # Duplicate configuration in the sweep
+            seen.add(digest)
+            path = self._cache_path(digest)
+            if os.path.exists(path):
+                with open(path) as f:
+                    metrics[digest] = json.load(f)["metrics"]
+            else:
+                pending.append((digest, config))
+        self.cache_hits = len(seen) - len(pending)
+
+        results = run_specs([config_to_spec(config) for _, config in pending], self.max_workers)
+        for (digest, config), result in zip(pending, results):
+            metrics[digest] = result
+            tmp_path = self._cache_path(digest) + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"config": config, "code_version": code_version(), "metrics": result}, f, indent=2)
+            os.replace(tmp_path, self._cache_path(digest))  # Never leave a half-written cache entry
+
+        self.rows = [dict(config, **flatten(metrics[digest])) for digest, config in zip(digests, self.configs)]
+        return self.rows
+
+    def write_table(self, path="results/sweep_results.csv"):
+        """
+        Write the combined result table as CSV.
+
+        :param path: Output CSV path
+        """
+        columns = []
+        for row in self.rows:
+            columns.extend(key for key in row if key not in columns)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(self.rows)
+        print(f"Sweep table written to {path}")
@@ -1,6 +1,7 @@
 # tests/test_encryption.py
 import sys
 import os
+import numpy as np
 
 # Add the root directory to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -9,6 +10,8 @@ from encryption.aes import AES
 from encryption.speck import SpeckCipher
 from encryption.present import PresentCipher
 from encryption.selective_encryption import SelectiveEncryption
+from encryption.chacha20_cipher import ChaCha20Cipher
+from encryption.hmac_util import HMACUtil
 
 def test_encryption():
     aes = AES()
@@ -51,5 +54,132 @@ def test_encryption():
 
     print("\nAll encryption tests passed!")
 
+def test_speck_known_answer():
+    # SPECK-64/128 test vector from the SPECK specification (little-endian byte order)
+    speck = SpeckCipher(bytes.fromhex("0001020308090a0b1011121318191a1b"))
+    y, x = speck.encrypt_block(0x7475432D, 0x3B726574)
+    assert (x, y) == (0x8C6FA548, 0x454E028B), "SPECK test vector mismatch!"
+    assert speck.decrypt_block(y, x) == (0x7475432D, 0x3B726574)
+
+def test_speck_batch_matches_scalar():
+    speck = SpeckCipher()
+    data = os.urandom(8 * 200)
+    blocks = np.frombuffer(data, dtype="<u4").reshape(-1, 2)
+    encrypted = speck.encrypt_blocks(blocks)
+    for i in range(0, len(blocks), 37):
+        assert tuple(encrypted[i]) == speck.encrypt_block(int(blocks[i, 0]), int(blocks[i, 1]))
+    assert (speck.decrypt_blocks(encrypted) == blocks).all()
+    assert speck.decrypt(speck.encrypt(data)) == data  # Long input takes the batch path
+
+def test_present_known_answers():
+    # PRESENT-80 test vectors from the PRESENT specification
+    vectors = [
+        (0, 0, 0x5579C1387B228445),
+        ((1 << 80) - 1, 0, 0xE72C46C0F5945049),
+        (0, (1 << 64) - 1, 0xA112FFC72F68417B),
+        ((1 << 80) - 1, (1 << 64) - 1, 0x3333DCD3213210D2),
+    ]
+    for key, plaintext, ciphertext in vectors:
+        present = PresentCipher(key.to_bytes(10, byteorder="big"))
+        assert present.encrypt_block(plaintext) == ciphertext, "PRESENT test vector mismatch!"
+        assert present.decrypt_block(ciphertext) == plaintext
+        assert int(present.encrypt_blocks([plaintext])[0]) == ciphertext
+
+def test_present_batch_matches_scalar():
+    present = PresentCipher()
+    data = os.urandom(8 * 100)
+    blocks = np.frombuffer(data, dtype=">u8").astype(np.uint64)
+    encrypted = present.encrypt_blocks(blocks)
+    for i in range(0, len(blocks), 23):
+        assert int(encrypted[i]) == present.encrypt_block(int(blocks[i]))
+    assert (present.decrypt_blocks(encrypted) == blocks).all()
+    assert present.decrypt(present.encrypt(data)) == data  # Long input takes the batch path
+
+def test_aes_ccm():
+    aes_ccm = AES(mode="CCM", tag_length=8)
+    plaintext = b"Environmental data: Temp=25C"
+    encrypted = aes_ccm.encrypt(plaintext)
+    assert len(encrypted) == 4 + len(plaintext) + 8  # Frame counter + ciphertext + tag, no padding
+    assert aes_ccm.decrypt(encrypted) == plaintext
+    assert aes_ccm.encrypt(plaintext) != encrypted  # Fresh nonce per packet
+
+    tampered = bytearray(encrypted)
+    tampered[5] ^= 0x01
+    try:
+        aes_ccm.decrypt(bytes(tampered))
+        assert False, "Tampered CCM ciphertext was accepted!"
+    except ValueError:
+        pass
+
+def test_chacha20_poly1305():
+    chacha = ChaCha20Cipher(mode="poly1305")
+    plaintext = b"Environmental data: Temp=25C"
+    first = chacha.encrypt(plaintext)
+    second = chacha.encrypt(plaintext)
+    assert first[:4] != second[:4] and first != second  # Counter nonce advances per packet
+    assert len(first) == 4 + len(plaintext) + 16
+    assert chacha.decrypt(first) == plaintext
+    assert chacha.decrypt(second) == plaintext
+
+    tampered = bytearray(second)
+    tampered[-1] ^= 0x01
+    try:
+        chacha.decrypt(bytes(tampered))
+        assert False, "Tampered ChaCha20-Poly1305 ciphertext was accepted!"
+    except ValueError:
+        pass
+
+def test_chacha20_stream_fresh_nonce():
+    key = os.urandom(32)
+    sender = ChaCha20Cipher(key, nonce_prefix=(1).to_bytes(8, "big"))
+    receiver = ChaCha20Cipher(key, nonce_prefix=(1).to_bytes(8, "big"))
+    plaintext = b"Environmental data: Temp=25C"
+    first = sender.encrypt(plaintext)
+    second = sender.encrypt(plaintext)
+    assert len(first) == 4 + len(plaintext)  # Packet counter on air, no tag
+    assert first[4:] != second[4:]  # Keystream is not reused across packets
+    assert receiver.decrypt(first) == plaintext
+    assert receiver.decrypt(second) == plaintext
+
+def test_hmac_truncated_tags():
+    data = b"Encrypted payload bytes"
+    for tag_length in (4, 8, 16):
+        hmac_util = HMACUtil(b"0123456789abcdef", tag_length=tag_length)
+        tag = hmac_util.generate_tag(data)
+        assert isinstance(tag, bytes) and len(tag) == tag_length
+        assert hmac_util.verify_tag(data, tag)
+        assert not hmac_util.verify_tag(data + b"!", tag)
+        assert not hmac_util.verify_tag(data, tag[:-1])
+    assert len(HMACUtil(b"0123456789abcdef").generate_tag(data)) == 32  # Full digest by default
+
+def test_hmac_batch():
+    hmac_util = HMACUtil(b"0123456789abcdef", tag_length=8)
+    messages = [bytes([i]) * (i + 1) for i in range(10)]
+    tags = hmac_util.generate_many(messages)
+    assert tags == [hmac_util.generate_tag(message) for message in messages]
+    tags[3] = bytes(8)
+    mask = hmac_util.verify_many(messages, tags)
+    assert mask == [i != 3 for i in range(10)]
+
+def test_selective_encryption_framing():
+    speck = SpeckCipher()
+    # Ciphertext bytes that happen to contain the old "||" delimiter must not matter
+    selective = SelectiveEncryption(speck, encryption_ratio=0.5)
+    for plaintext in (b"", b"x", b"||||||||||||", os.urandom(200)):
+        encrypted = selective.encrypt(plaintext)
+        assert selective.decrypt(encrypted) == plaintext
+        assert selective.decrypt(memoryview(encrypted)) == plaintext
+
+    # Single padding step: prefix + one padded SPECK ciphertext + clear tail
+    plaintext = b"A" * 32
+    assert len(selective.encrypt(plaintext)) == 2 + 24 + 16
+
+    fields = SelectiveEncryption(speck, critical_ranges=[(4, 8), slice(12, 16), (30, None)])
+    plaintext = bytes(range(40))
+    encrypted = fields.encrypt(plaintext)
+    assert encrypted[-22:] == plaintext[:4] + plaintext[8:12] + plaintext[16:30]
+    assert fields.decrypt(encrypted) == plaintext
+    assert fields.decrypt(fields.encrypt(plaintext[:10])) == plaintext[:10]  # Ranges clipped to short data
+
 if __name__ == "__main__":
     test_encryption()
@@ -0,0 +1,133 @@
+# tests/test_evaluation.py
+import sys
+import os
+import unittest
+
+# Add the root directory to sys.path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from evaluation.performance import PerformanceEvaluator
+from evaluation.benchmark import CipherBenchmark
+from evaluation.online_stats import Distribution
+from evaluation.visualizer import FIGURES, Visualizer
+from evaluation.report_generator import ReportGenerator
+from evaluation.regression import BaselineStore, mann_whitney_u, bootstrap_ratio_ci, compare_reports, regressions
+import json
+import tempfile
+
+import numpy as np
+
+class TestEvaluation(unittest.TestCase):
+    def test_measure_repeated(self):
+        calls = []
+        samples, loops = PerformanceEvaluator().measure_repeated(calls.append, 1, warmup=3, repetitions=5)
+        self.assertEqual(len(samples), 5)
+        self.assertGreaterEqual(loops, 1)
+        self.assertTrue(all(sample >= 0 for sample in samples))
+
+    def test_benchmark_json(self):
+        benchmark = CipherBenchmark(sizes=(8, 64), warmup=1, repetitions=3,
+                                    targets=["SPECK", "SelectiveAES@0.5", "DASH7_AES"])
+        report = benchmark.run()
+        self.assertEqual(len(report["results"]), 3 * 2 * 2)  # targets x operations x sizes
+        operations = {(r["target"], r["operation"]) for r in report["results"]}
+        self.assertIn(("SPECK", "decrypt"), operations)
+        self.assertIn(("DASH7_AES", "receive"), operations)
+        for record in report["results"]:
+            self.assertEqual(len(record["samples"]), 3)
+            self.assertAlmostEqual(record["packets_per_s"] * record["size"] / 1e6, record["mb_per_s"])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "benchmark.json")
+            benchmark.write_json(path)
+            with open(path) as f:
+                self.assertEqual(json.load(f)["meta"]["sizes"], [8, 64])
+
+    def test_mann_whitney_u(self):
+        u, p_value = mann_whitney_u([1, 2, 3, 4, 5], [6, 7, 8, 9, 10])
+        self.assertEqual(u, 0)
+        self.assertLess(p_value, 0.05)
+        _, p_value = mann_whitney_u([1, 2, 3, 3], [3, 3, 2, 1])
+        self.assertGreater(p_value, 0.5)
+
+    def test_bootstrap_ratio_ci(self):
+        low, high = bootstrap_ratio_ci([1.0, 1.1, 0.9, 1.0] * 5, [2.0, 2.2, 1.8, 2.0] * 5)
+        self.assertGreater(low, 1.5)
+        self.assertLess(high, 2.5)
+
+    def test_regression_comparison(self):
+        def report(slowdown):
+            samples = [1e-5 * (1 + 0.01 * (i % 5)) for i in range(20)]
+            return {"meta": {}, "results": [
+                {"target": "AES", "operation": "encrypt", "size": 64, "samples": samples},
+                {"target": "SPECK", "operation": "encrypt", "size": 64, "samples": [s * slowdown for s in samples]},
+            ]}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store = BaselineStore(tmp)
+            store.save("main", report(1.0))
+            self.assertEqual(store.names(), ["main"])
+            rows = compare_reports(store.load("main"), report(1.5), threshold=0.10)
+
+        status = {row["target"]: row["status"] for row in rows}
+        self.assertEqual(status, {"AES": "unchanged", "SPECK": "regression"})
+        self.assertEqual([row["target"] for row in regressions(rows)], ["SPECK"])
+        self.assertAlmostEqual(rows[1]["change"], 0.5)
+    def test_distribution_merge(self):
+        rng = np.random.default_rng(0)
+        values = rng.lognormal(-9, 1.5, 20000)
+        merged = Distribution()
+        for part in np.array_split(values, 4):
+            worker = Distribution()
+            worker.add_array(part)
+            merged.merge(Distribution.from_dict(json.loads(json.dumps(worker.to_dict()))))
+        single = Distribution()
+        for value in values:
+            single.add(value)
+        # Merging is exact: same buckets as one sketch over everything
+        self.assertTrue(np.array_equal(merged.sketch.counts, single.sketch.counts))
+        self.assertAlmostEqual(merged.stats.mean, values.mean(), delta=1e-12 * values.mean())
+        self.assertAlmostEqual(merged.stats.std, values.std(ddof=1), delta=1e-9 * values.std())
+        for q in (0.5, 0.95, 0.99):
+            self.assertLess(abs(merged.quantile(q) / np.quantile(values, q) - 1), 0.02)
+        summary = merged.summary()
+        self.assertEqual(summary["count"], len(values))
+        self.assertLessEqual(summary["p50"], summary["p99"])
+    def test_visualizer_cache(self):
+        results = {name: {"Encryption Time (s)": 1e-4, "Energy Consumption (J)": 0.5, "Packet Size (bytes)": 83}
+                   for name in ("OpenWSN_AES", "DASH7_AES")}
+        with tempfile.TemporaryDirectory() as tmp:
+            visualizer = Visualizer(tmp, headless=True, max_workers=1)
+            paths = visualizer.visualize_results(results)
+            self.assertEqual(len(visualizer.rendered), len(FIGURES))
+            self.assertTrue(all(os.path.getsize(path) > 0 for path in paths))
+
+            first_images = visualizer.images
+            visualizer.visualize_results(results)
+            self.assertEqual((len(visualizer.rendered), len(visualizer.skipped)), (0, len(FIGURES)))
+            # Cached figures still provide their images, e.g. for the PDF report
+            self.assertEqual(visualizer.images, first_images)
+            self.assertEqual([title for title, _ in visualizer.images], [figure["title"] for figure in FIGURES])
+            # Only the figures plotting the changed metric are redrawn
+            results["DASH7_AES"]["Packet Size (bytes)"] = 90
+            visualizer.visualize_results(results)
+            self.assertEqual(sorted(os.path.basename(path) for path in visualizer.rendered),
+                             ["metrics_heatmap.png", "packet_size.png"])
+    def test_pdf_report_in_memory_figures(self):
+        results = {f"OpenWSN_Config{i}": {"Energy Consumption (J)": 0.1 * i, "Network Lifetime (cycles)": 100 + i}
+                   for i in range(80)}
+        with tempfile.TemporaryDirectory() as tmp:
+            subset = {name: results[name] for name in list(results)[:3]}
+            images = Visualizer(tmp, headless=True, max_workers=1).figure_images(subset)
+            self.assertEqual(len(images), len(FIGURES))
+            self.assertTrue(all(image.startswith(b"\x89PNG") for _, image in images))
+            self.assertEqual(os.listdir(tmp), [])  # Nothing goes through the output directory
+
+            pdf_path = os.path.join(tmp, "report.pdf")
+            ReportGenerator().generate_pdf_report(results, pdf_path, figures=images[:2])
+            with open(pdf_path, "rb") as f:
+                pages = f.read().count(b"/Type /Page\n")
+            self.assertGreaterEqual(pages, 4)  # Title, a metrics table split over pages, figures
+
+if __name__ == "__main__":
+    unittest.main()
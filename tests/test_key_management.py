@@ -6,7 +6,10 @@ import unittest
 # Add the root directory to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from encryption.key_management import KeyManagement
+from encryption.key_management import KeyManagement, KeyStore, LRUCache, RandomKeyPredistribution
+import numpy as np
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 
 class TestKeyManagement(unittest.TestCase):
     def setUp(self):
@@ -31,5 +34,67 @@ class TestKeyManagement(unittest.TestCase):
         key = self.km.get_key("Node_X")
         self.assertIsNone(key)
 
+    def test_key_store_matches_hkdf(self):
+        store = KeyStore(b"master secret", salt=b"salt")
+        expected = HKDF(algorithm=hashes.SHA256(), length=40, salt=b"salt", info=b"context").derive(b"master secret")
+        self.assertEqual(store.derive(b"context", 40), expected)
+
+    def test_key_store_node_and_pair_keys(self):
+        store = KeyStore(b"master secret", cache_size=2)
+        self.assertEqual(store.node_key(7), KeyStore(b"master secret").node_key(7))  # Deterministic
+        self.assertNotEqual(store.node_key(7), store.node_key("7"))
+        self.assertEqual(store.pair_key(1, 2), store.pair_key(2, 1))
+        self.assertNotEqual(store.pair_key(1, 2), store.pair_key(1, 3))
+        self.assertEqual(len(store.node_key(1, length=32)), 32)
+        # The cache stays bounded
+        for node_id in range(10):
+            store.node_key(node_id)
+        self.assertEqual(len(store.cache), 2)
+        self.assertGreater(store.cache.evictions, 0)
+
+    def test_key_store_preload(self):
+        store = KeyStore(b"master secret")
+        keys = store.preload(100)
+        self.assertEqual(keys.shape, (100, 16))
+        self.assertEqual(store.node_key(42), KeyStore(b"master secret").node_key(42))
+        self.assertEqual(store.cache.misses, 0)  # Preloaded lookups bypass the cache
+
+    def test_lru_cache(self):
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.put("c", 3), ("b", 2))  # Evicts "b", the least recently used
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1, "evictions": 1, "size": 2})
+
+    def test_key_management_with_store(self):
+        km = KeyManagement(KeyStore(b"master secret"))
+        km.distribute_keys(self.node_ids)
+        self.assertEqual(km.get_key("Node_1"), KeyStore(b"master secret").node_key("Node_1"))
+
+    def test_random_key_predistribution(self):
+        rings = self.km.predistribute_key_rings(200, pool_size=1000, ring_size=40, seed=1)
+        self.assertIs(self.km.key_rings, rings)
+        for node in range(10):
+            self.assertEqual(len(rings.key_ids(node)), 40)
+
+        pairs = np.random.default_rng(0).integers(0, 200, (500, 2))
+        counts = rings.shared_counts(pairs, chunk_size=64)
+        for (a, b), count in zip(pairs[:50], counts[:50]):
+            self.assertEqual(count, len(set(rings.key_ids(a)) & set(rings.key_ids(b))))
+        self.assertAlmostEqual(rings.connectivity(pairs), rings.expected_connectivity(), delta=0.1)
+
+        a, b = next(pair for pair, count in zip(pairs, counts) if count > 0 and pair[0] != pair[1])
+        self.assertEqual(rings.link_key(a, b), rings.link_key(b, a))
+        self.assertEqual(len(rings.link_key(a, b)), 16)
+
+    def test_q_composite(self):
+        eg = RandomKeyPredistribution(100, pool_size=1000, ring_size=40, q=1, seed=3)
+        composite = RandomKeyPredistribution(100, pool_size=1000, ring_size=40, q=2, seed=3)
+        self.assertLess(composite.expected_connectivity(), eg.expected_connectivity())
+        pairs = np.random.default_rng(1).integers(0, 100, (300, 2))
+        self.assertTrue(np.all(composite.secure_links(pairs) <= eg.secure_links(pairs)))
+
 if __name__ == "__main__":
     unittest.main()
@@ -2,6 +2,7 @@
 import sys
 import os
 import unittest
+import numpy as np
 
 # Add the root directory to sys.path for imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -9,10 +10,15 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from encryption.aes import AES
 from encryption.speck import SpeckCipher
 from encryption.present import PresentCipher
+from encryption.chacha20_cipher import ChaCha20Cipher
 from encryption.selective_encryption import SelectiveEncryption
 from protocols.openwsn import OpenWSN
 from protocols.dash7 import DASH7
 from protocols.energy_model import EnergyModel
+from protocols import frame
+from protocols import radio_model
+from protocols.radio_model import RadioModel
+from encryption.key_management import KeyManagement, KeyStore
 
 class TestProtocols(unittest.TestCase):
     def setUp(self):
@@ -67,6 +73,188 @@ class TestProtocols(unittest.TestCase):
         decrypted = self.openwsn_selective_aes.process_packet(packet)
         self.assertEqual(decrypted, self.plaintext, "OpenWSN Selective AES decryption failed!")
 
+    def test_truncated_mac(self):
+        packet = self.openwsn_speck.prepare_packet(self.plaintext, headers={"Type": "Data"})
+        ciphertext_length = len(self.speck.encrypt(self.plaintext))
+        self.assertEqual(len(packet), frame.HEADER_SIZE + ciphertext_length + 8)  # MIC-64 by default
+        tampered = bytearray(packet)
+        tampered[-1] ^= 0x01
+        with self.assertRaises(ValueError):
+            self.openwsn_speck.process_packet(tampered)
+
+    def test_header_is_authenticated(self):
+        packet = bytearray(self.openwsn_aes.prepare_packet(self.plaintext, headers={"Type": "Data", "Destination": 7}))
+        packet[4] ^= 0x01  # Flip a destination bit
+        with self.assertRaises(ValueError):
+            self.openwsn_aes.process_packet(packet)
+
+    def test_frame_layout(self):
+        packet = self.openwsn_present.prepare_packet(
+            self.plaintext, headers={"Type": "Data", "Source": 3, "Destination": 9})
+        parsed = frame.parse_frame(packet, self.openwsn_present.tag_length)
+        self.assertEqual((parsed.frame_type, parsed.source, parsed.destination), (frame.FRAME_DATA, 3, 9))
+        self.assertEqual(len(parsed.tag), 8)
+
+        buffer = bytearray(frame.MAX_FRAME_SIZE)
+        view = self.dash7_speck.query_response("Query1", self.plaintext, out=buffer)
+        self.assertIsInstance(view, memoryview)
+        self.assertEqual(frame.parse_frame(view, 8).sequence, frame.query_tag("Query1"))
+        self.assertEqual(self.dash7_speck.process_response(view), self.plaintext)
+
+    def test_batch_processing(self):
+        packets = [self.openwsn_present.prepare_packet(self.plaintext + bytes([i]), headers={"Type": "Data"})
+                   for i in range(5)]
+        decrypted = self.openwsn_present.process_packets(packets)
+        self.assertEqual(decrypted, [self.plaintext + bytes([i]) for i in range(5)])
+
+        responses = [self.dash7_aes.query_response("Query1", self.plaintext) for _ in range(3)]
+        self.assertEqual(self.dash7_aes.process_responses(responses), [self.plaintext] * 3)
+
+        tampered = bytearray(packets[2])
+        tampered[-1] ^= 0x01
+        packets[2] = tampered
+        with self.assertRaises(ValueError):
+            self.openwsn_present.process_packets(packets)
+
+    def test_aead_skips_hmac(self):
+        aes_ccm = AES(mode="CCM")
+        openwsn = OpenWSN(aes_ccm, self.energy_model)
+        packet = openwsn.prepare_packet(self.plaintext, headers={"Type": "Data"})
+        self.assertEqual(len(packet), frame.HEADER_SIZE + len(aes_ccm.encrypt(self.plaintext)))  # No HMAC tag
+        self.assertEqual(openwsn.process_packet(packet), self.plaintext)
+
+        dash7 = DASH7(aes_ccm, self.energy_model)
+        response = dash7.query_response("Query1", self.plaintext)
+        self.assertEqual(dash7.process_response(response), self.plaintext)
+
+    def test_profile_energy_scales_with_work(self):
+        flat = OpenWSN(AES(), self.energy_model)
+        self.assertAlmostEqual(flat.packet_energy(24, 67), self.energy_model.total_energy(67, 1))
+
+        model = EnergyModel(profile="MSP430", max_table_length=64)
+        speck = OpenWSN(SpeckCipher(), model)
+        present = OpenWSN(PresentCipher(), model)
+        self.assertGreater(present.packet_energy(24, 51), speck.packet_energy(24, 51))
+        # More blocks cost more, and lengths past the table fall back to the formula
+        self.assertGreater(model.crypto_energy(speck.encryption, 64), model.crypto_energy(speck.encryption, 8))
+        self.assertAlmostEqual(model.crypto_energy(speck.encryption, 100),
+                               (100 // 8 + 1) * 1100 * model.profile["energy_per_cycle"])
+
+        # Selective encryption only pays for its critical bytes
+        aes = AES()
+        selective = SelectiveEncryption(aes, encryption_ratio=0.25)
+        self.assertLess(model.crypto_energy(selective, 64), model.crypto_energy(aes, 64))
+        # AEAD ciphers carry no HMAC cost
+        ccm = OpenWSN(AES(mode="CCM"), model)
+        self.assertAlmostEqual(ccm.packet_energy(24, 47), model.calculate_transmission_energy(47)
+                               + model.cipher_energy_for("AES-CCM", 24))
+        self.assertGreater(model.key_setup_energy(aes), 0)
+        # The shared key is expanded at init; per-peer contexts charge their setup when built
+        self.assertAlmostEqual(speck.setup_energy, model.key_setup_energy(speck.encryption))
+        store = KeyStore(b"network master secret")
+        sink = OpenWSN(None, model, key_provider=store, cipher_factory=SpeckCipher, node_id=0)
+        self.assertEqual(sink.setup_energy, 0.0)
+        sender = OpenWSN(None, model, key_provider=store, cipher_factory=SpeckCipher, node_id=1)
+        for _ in range(2):
+            sink.process_packet(sender.prepare_packet(self.plaintext, {"Type": "Data", "Source": 1, "Destination": 0}))
+        self.assertAlmostEqual(sink.setup_energy, sink.key_setup_energy())  # One miss, then hits
+
+    def test_radio_model(self):
+        radio = RadioModel("CC2420")
+        self.assertAlmostEqual(radio.airtime(42), 50 * 8 / 250e3)  # PHY header and FCS included
+        state_times, transitions = radio.activity([(radio_model.IDLE, 0.001), (radio_model.TX, 0.002)], interval=1.0)
+        self.assertAlmostEqual(state_times[radio_model.SLEEP], 0.997)
+        self.assertEqual(transitions.sum(), 3)  # SLEEP->IDLE->TX->SLEEP
+        single = radio.energy(state_times, transitions)
+        population = radio.energy(np.tile(state_times, (4, 1)), np.tile(transitions, (4, 1, 1)))
+        np.testing.assert_allclose(population, [single] * 4)
+
+        # With a radio, DASH7 pays for listening to the query and OpenWSN for its ACK
+        model = EnergyModel(radio=radio)
+        for protocol in (OpenWSN(AES(), model), DASH7(AES(), model)):
+            states = {state for state, _ in protocol.radio_activity(60)}
+            self.assertIn(radio_model.RX, states)
+            self.assertGreater(protocol.packet_energy(24, 60), radio.power[radio_model.TX] * radio.airtime(60))
+            # Both wake the oscillator before any RX/TX, so its start-up is charged
+            _, transitions = radio.activity(protocol.radio_activity(60))
+            self.assertEqual(transitions[radio_model.SLEEP, radio_model.IDLE], 1)
+        # A transition the profile does not define is an error, not free
+        with self.assertRaises(ValueError):
+            radio.activity([(radio_model.RX, 0.001)])
+
+    def test_context_eviction_keeps_nonce_counter(self):
+        store = KeyStore(b"network master secret")
+        for factory, key_size in ((ChaCha20Cipher, None), (lambda key: AES(key, mode="CCM"), 16)):
+            node = OpenWSN(None, self.energy_model, key_provider=store, cipher_factory=factory, key_size=key_size,
+                           node_id=1, pool_size=1)
+            counters = []
+            for peer in (2, 3, 2):  # The context for node 2 is evicted, then rebuilt
+                packet = node.prepare_packet(self.plaintext, {"Type": "Data", "Source": 1, "Destination": peer})
+                counters.append(packet[frame.HEADER_SIZE:frame.HEADER_SIZE + 4])
+            self.assertGreater(node.contexts.stats()["evictions"], 0)
+            self.assertNotEqual(counters[0], counters[2])  # No nonce reuse under the 1-2 link key
+            receiver = OpenWSN(None, self.energy_model, key_provider=store, cipher_factory=factory,
+                               key_size=key_size, node_id=2)
+            self.assertEqual(receiver.process_packet(packet), self.plaintext)
+
+    def test_per_peer_contexts(self):
+        store = KeyStore(b"network master secret")
+        sink = OpenWSN(None, self.energy_model, key_provider=store, cipher_factory=SpeckCipher, node_id=0, pool_size=2)
+        senders = {node: OpenWSN(None, self.energy_model, key_provider=store, cipher_factory=SpeckCipher, node_id=node)
+                   for node in (1, 2, 3)}
+        packets = {node: sender.prepare_packet(self.plaintext, {"Type": "Data", "Source": node, "Destination": 0})
+                   for node, sender in senders.items()}
+        for node, packet in packets.items():
+            self.assertEqual(sink.process_packet(packet), self.plaintext)
+        self.assertEqual(sink.process_packets(list(packets.values())), [self.plaintext] * 3)
+        # Each link has its own key: node 1's frame does not verify under node 2's link key
+        forged = bytearray(packets[1])
+        forged[3:5] = (2).to_bytes(2, "big")  # Claim to come from node 2
+        with self.assertRaises(ValueError):
+            sink.process_packet(bytes(forged))
+
+        stats = sink.contexts.stats()
+        self.assertEqual(stats["size"], 2)  # Bounded pool
+        self.assertGreater(stats["evictions"], 0)
+        self.assertGreater(stats["hits"] + stats["misses"], 0)
+
+        # DASH7 with AEAD contexts in both directions of one link: the pairwise key is shared, the
+        # CCM nonce prefix is the sender address, so the two directions never reuse a nonce
+        def ccm(key):
+            return AES(key, mode="CCM")
+        endpoint = DASH7(None, self.energy_model, key_provider=store, cipher_factory=ccm, key_size=16, node_id=5)
+        gateway = DASH7(None, self.energy_model, key_provider=store, cipher_factory=ccm, key_size=16, node_id=9)
+        uplink = endpoint.query_response("Query1", self.plaintext, source=5, destination=9)
+        downlink = gateway.query_response("Query1", self.plaintext, source=9, destination=5)
+        self.assertEqual(gateway.process_response(uplink), self.plaintext)
+        self.assertEqual(endpoint.process_response(downlink), self.plaintext)
+        self.assertNotEqual(uplink[frame.HEADER_SIZE:], downlink[frame.HEADER_SIZE:])
+        self.assertEqual(gateway.contexts.stats()["misses"], 2)  # Its sending and its receiving context
+        with self.assertRaises(ValueError):
+            DASH7(None, self.energy_model, key_provider=store, cipher_factory=ccm)  # Key size not derivable
+
+        # ChaCha20 stream contexts: nonce prefix from the sender, counter on air
+        chacha = [OpenWSN(None, self.energy_model, key_provider=store, node_id=node, key_size=32,
+                          cipher_factory=lambda key: ChaCha20Cipher(key)) for node in (1, 2)]
+        packet = chacha[0].prepare_packet(self.plaintext, {"Type": "Data", "Source": 1, "Destination": 2})
+        self.assertEqual(chacha[1].process_packet(packet), self.plaintext)
+
+        # Per-node keys: a frame is protected with its sender's key on both ends, also when
+        # KeyManagement derives them from a KeyStore
+        keys = KeyManagement(KeyStore(b"node key secret"))
+        keys.distribute_keys([1, 2])
+        node = OpenWSN(None, self.energy_model, key_provider=keys, cipher_factory=SpeckCipher, node_id=1)
+        base = OpenWSN(None, self.energy_model, key_provider=keys, cipher_factory=SpeckCipher, node_id=0)
+        packet = node.prepare_packet(self.plaintext, {"Type": "Data", "Source": 1, "Destination": 0})
+        self.assertEqual(base.process_packet(packet), self.plaintext)
+        self.assertEqual(base.contexts.receiving(1)[0].get_key_bytes(), keys.get_key(1))
+
+        # Frames carry 16-bit addresses, so larger node ids are rejected up front
+        with self.assertRaises(ValueError):
+            OpenWSN(None, self.energy_model, key_provider=store, cipher_factory=SpeckCipher, node_id=70000)
+        with self.assertRaises(ValueError):
+            node.prepare_packet(self.plaintext, {"Type": "Data", "Source": 1, "Destination": frame.MAX_ADDRESS + 1})
+
     def test_all_protocols(self):
         protocols = [
             self.openwsn_aes,
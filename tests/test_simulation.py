@@ -0,0 +1,250 @@
+# tests/test_simulation.py
+import sys
+import os
+import unittest
+
+# Add the root directory to sys.path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from encryption.aes import AES
+from encryption.speck import SpeckCipher
+from protocols.openwsn import OpenWSN
+from protocols.dash7 import DASH7
+from protocols.energy_model import EnergyModel
+from simulation.node_simulation import NodeSimulation, TIMED_EXCHANGES
+from simulation.event_scheduler import EventScheduler
+from simulation.parallel_runner import ParallelRunner
+from simulation.sweep import ParameterSweep, expand_grid
+from evaluation.performance import StageTimer
+from simulation.result_sink import CSVSink, open_sink, read_records
+import csv
+import json
+import subprocess
+import tempfile
+
+class TestSimulation(unittest.TestCase):
+    def setUp(self):
+        self.energy_model = EnergyModel()
+        aes = AES()
+        speck = SpeckCipher()
+        self.protocols = {
+            "OpenWSN_AES": OpenWSN(aes, self.energy_model),
+            "DASH7_AES": DASH7(aes, self.energy_model),
+            "OpenWSN_SPECK": OpenWSN(speck, self.energy_model),
+        }
+
+    def test_network_simulation_matches_scalar(self):
+        # Small energy budget so nodes die and switch protocols within the run
+        simulation = NodeSimulation(self.protocols, num_cycles=500, energy_initial=0.01, energy_threshold=0.005)
+        scalar = simulation.run_simulation()
+        network = simulation.run_network_simulation(num_nodes=50)
+        for name, metrics in scalar.items():
+            self.assertEqual(network[name]["Network Lifetime (cycles)"], metrics["Network Lifetime (cycles)"])
+            self.assertAlmostEqual(network[name]["Energy Consumption (J)"], metrics["Energy Consumption (J)"])
+            self.assertAlmostEqual(network[name]["Packet Size (bytes)"], metrics["Packet Size (bytes)"])
+            self.assertEqual(network[name]["Nodes Alive"], 0)
+
+    def test_stage_latency_sampling(self):
+        simulation = NodeSimulation(self.protocols, num_cycles=100, energy_initial=1.0, sample_every=10)
+        results = simulation.run_simulation(["OpenWSN_AES"])
+        latency = results["OpenWSN_AES"]["Stage Latency (s)"]
+        self.assertEqual(set(latency), set(StageTimer.STAGES))
+        for stats in latency.values():
+            self.assertEqual(stats["samples"], 10)  # One packet in ten is timed
+            self.assertLessEqual(stats["p50"], stats["p95"])
+            self.assertLessEqual(stats["p95"], stats["p99"])
+        expected = (latency["encrypt"]["mean"] + latency["mac"]["mean"]) * 100
+        self.assertAlmostEqual(results["OpenWSN_AES"]["Encryption Time (s)"], expected)
+        # Timers are detached after the run
+        self.assertIsNone(self.protocols["OpenWSN_AES"].timer)
+
+    def test_radio_model_lifetime(self):
+        energy_model = EnergyModel(radio="CC2420")
+        protocols = {"OpenWSN_AES": OpenWSN(AES(), energy_model), "DASH7_AES": DASH7(AES(), energy_model)}
+        simulation = NodeSimulation(protocols, num_cycles=10000, energy_initial=0.5, energy_threshold=0.0,
+                                    cycle_interval=60.0)
+        scalar = simulation.run_simulation()
+        network = simulation.run_network_simulation(num_nodes=5)
+        for name, metrics in scalar.items():
+            self.assertEqual(network[name]["Network Lifetime (cycles)"], metrics["Network Lifetime (cycles)"])
+            radio_time = metrics["Radio Time (s)"]
+            # Each cycle lasts exactly one interval, and the radio sleeps through almost all of it
+            self.assertAlmostEqual(sum(radio_time.values()), 60.0 * metrics["Network Lifetime (cycles)"])
+            self.assertGreater(radio_time["SLEEP"], 100 * radio_time["TX"])
+        # Sleep current now bounds the lifetime: 0.5 J at 60 uW lasts under 8400 s
+        self.assertLess(scalar["OpenWSN_AES"]["Network Lifetime (cycles)"], 140)
+
+        # The event-driven run charges sleep between wake-ups, so it ends up at a similar lifetime
+        events = simulation.run_event_simulation(num_nodes=5, sense_interval=60.0)
+        self.assertEqual(events["OpenWSN_AES"]["Nodes Alive"], 0)
+        self.assertAlmostEqual(events["OpenWSN_AES"]["Network Lifetime (s)"] / 60.0,
+                               scalar["OpenWSN_AES"]["Network Lifetime (cycles)"], delta=2)
+
+    def test_simulation_statistics(self):
+        simulation = NodeSimulation(self.protocols, num_cycles=100, energy_initial=1.0)
+        scalar = simulation.run_simulation(["OpenWSN_AES"])["OpenWSN_AES"]
+        energy = scalar["Statistics"]["Energy per Cycle (J)"]
+        self.assertEqual(energy["count"], 100)
+        self.assertAlmostEqual(energy["mean"] * 100, scalar["Energy Consumption (J)"])
+        network = simulation.run_network_simulation(num_nodes=5, protocol_names=["OpenWSN_AES"])["OpenWSN_AES"]
+        self.assertEqual(network["Statistics"]["Packet Size (bytes)"]["count"], 500)
+        self.assertEqual(network["Statistics"]["Node Lifetime (cycles)"]["p50"], 100)
+        # Crypto time is measured on timed exchanges, not derived from the energy constants
+        self.assertEqual(network["Stage Latency (s)"]["encrypt"]["samples"], TIMED_EXCHANGES)
+        per_packet = network["Stage Latency (s)"]["encrypt"]["mean"] + network["Stage Latency (s)"]["mac"]["mean"]
+        self.assertAlmostEqual(network["Encryption Time (s)"], per_packet * 100)
+
+    def test_key_setup_energy(self):
+        energy_model = EnergyModel(profile="MSP430")
+        protocols = {"OpenWSN_AES": OpenWSN(AES(), energy_model), "DASH7_AES": DASH7(AES(), energy_model)}
+        simulation = NodeSimulation(protocols, num_cycles=50, energy_initial=1.0)
+        scalar = simulation.run_simulation(["OpenWSN_AES"])["OpenWSN_AES"]
+        setup = protocols["OpenWSN_AES"].key_setup_energy()
+        self.assertGreater(setup, 0)
+        per_cycle = scalar["Statistics"]["Energy per Cycle (J)"]["mean"]
+        self.assertAlmostEqual(scalar["Energy Consumption (J)"], per_cycle * 50 + setup)
+        network = simulation.run_network_simulation(num_nodes=5, protocol_names=["OpenWSN_AES"])["OpenWSN_AES"]
+        self.assertAlmostEqual(network["Energy Consumption (J)"], scalar["Energy Consumption (J)"])
+
+    def test_network_simulation_cycle_limit(self):
+        simulation = NodeSimulation(self.protocols, num_cycles=20, energy_initial=1.0)
+        results = simulation.run_network_simulation(num_nodes=10)
+        for metrics in results.values():
+            self.assertEqual(metrics["Network Lifetime (cycles)"], 20)
+            self.assertEqual(metrics["Nodes Alive"], 10)
+
+    def test_event_scheduler_order(self):
+        scheduler = EventScheduler()
+        seen = []
+        scheduler.register("tick", lambda sched, event: seen.append((event.time, event.node)))
+        scheduler.schedule(5.0, "tick", 1)
+        scheduler.schedule(1.0, "tick", 2)
+        scheduler.schedule(5.0, "tick", 3)
+        scheduler.schedule(9.0, "tick", 4)
+        self.assertEqual(scheduler.run(until=6.0), 3)
+        self.assertEqual(seen, [(1.0, 2), (5.0, 1), (5.0, 3)])  # Same-time events keep FIFO order
+        self.assertEqual(len(scheduler), 1)
+        with self.assertRaises(ValueError):
+            scheduler.schedule(2.0, "tick", 5)
+
+    def test_event_simulation(self):
+        simulation = NodeSimulation(self.protocols, num_cycles=50, energy_initial=1.0, seed=7)
+        results = simulation.run_event_simulation(num_nodes=20, sense_interval=10.0)
+        # Periodic OpenWSN nodes report once per sense interval for the whole run
+        self.assertEqual(results["OpenWSN_AES"]["Packets Sent"], 20 * 50)
+        self.assertEqual(results["OpenWSN_AES"]["Nodes Alive"], 20)
+        latency = results["OpenWSN_AES"]["Stage Latency (s)"]
+        self.assertAlmostEqual(results["OpenWSN_AES"]["Decryption Time (s)"],
+                               (latency["verify"]["mean"] + latency["decrypt"]["mean"]) * 50)
+        self.assertGreater(results["DASH7_AES"]["Packets Sent"], 0)
+        # Sparse queries: DASH7 nodes send far fewer packets than periodic reporters
+        sparse = simulation.run_event_simulation(num_nodes=20, sense_interval=10.0, query_rate=0.001)
+        self.assertLess(sparse["DASH7_AES"]["Packets Sent"], 20 * 50)
+
+    def test_parallel_runner(self):
+        runner = ParallelRunner(["OpenWSN_SPECK", "DASH7_AES"], seeds=(1, 2), max_workers=2,
+                                num_cycles=300, energy_initial=0.01, energy_threshold=0.005)
+        results = runner.run()
+        self.assertEqual(len(runner.runs), 4)
+        self.assertEqual(set(results), {"OpenWSN_SPECK", "DASH7_AES"})
+        self.assertEqual(results["DASH7_AES"]["Runs"], 2)
+        # Distribution statistics cover every cycle of both seeds
+        statistics = results["DASH7_AES"]["Statistics"]["Packet Size (bytes)"]
+        self.assertEqual(statistics["count"], sum(run["Network Lifetime (cycles)"]
+                                                  for spec, run in runner.runs if spec.protocol == "DASH7_AES"))
+
+        # A worker rebuilds the switch target too, so results match an in-process run
+        serial = NodeSimulation(self.protocols, num_cycles=300, energy_initial=0.01, energy_threshold=0.005)
+        expected = serial.run_simulation(["DASH7_AES"])["DASH7_AES"]
+        self.assertEqual(results["DASH7_AES"]["Network Lifetime (cycles)"], expected["Network Lifetime (cycles)"])
+
+        # Nested numeric metrics (radio time per state) are averaged over seeds, not dropped
+        runner = ParallelRunner(["OpenWSN_AES"], seeds=(1, 2), max_workers=1, num_cycles=50,
+                                energy_model={"radio": "CC2420"})
+        radio_time = runner.run()["OpenWSN_AES"]["Radio Time (s)"]
+        for state, seconds in radio_time.items():
+            self.assertAlmostEqual(seconds, sum(run["Radio Time (s)"][state] for _, run in runner.runs) / 2)
+
+    def test_parameter_sweep_cache(self):
+        grid = {
+            "protocol": ["OpenWSN_SelectiveAES"],
+            "num_cycles": 50,
+            "encryption_ratio": [0.25, 0.75],
+            "energy_per_bit": [50e-9, 100e-9],
+        }
+        self.assertEqual(len(expand_grid(grid)), 4)
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_dir = os.path.join(tmp, "cache")
+            sweep = ParameterSweep(grid, cache_dir=cache_dir, max_workers=1)
+            rows = sweep.run()
+            self.assertEqual(sweep.cache_hits, 0)
+            self.assertEqual(len(os.listdir(cache_dir)), 4)
+            self.assertGreater(rows[1]["Energy Consumption (J)"], rows[0]["Energy Consumption (J)"])
+
+            # Only the new grid point runs the second time
+            grid["encryption_ratio"] = [0.25, 0.75, 1.0]
+            sweep = ParameterSweep(grid, cache_dir=cache_dir, max_workers=1)
+            sweep.run()
+            self.assertEqual(sweep.cache_hits, 4)
+            self.assertEqual(len(os.listdir(cache_dir)), 6)
+
+            table = os.path.join(tmp, "sweep.csv")
+            sweep.write_table(table)
+            with open(table) as f:
+                self.assertEqual(len(list(csv.DictReader(f))), 6)
+
+    def test_result_sink_chunks(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "records.csv")
+            with open_sink(path, chunk_size=4) as sink:
+                self.assertIsInstance(sink, CSVSink)
+                for i in range(6):
+                    sink.write(cycle=i, energy=i * 0.5)
+                self.assertEqual(sink.records_written, 4)  # One chunk flushed, two records buffered
+                sink.write_batch({"cycle": [6, 7], "energy": [3.0, 3.5]})
+                with self.assertRaises(ValueError):
+                    sink.write_batch({"cycle": [8]})
+                with self.assertRaises(ValueError):
+                    sink.write(energy=4.0, cycle=8)  # Every record is checked, not just the first
+            chunks = list(read_records(path, chunk_size=3))
+            self.assertEqual([len(chunk) for chunk in chunks], [3, 3, 2])
+            self.assertEqual(chunks[-1]["energy"].tolist(), [3.0, 3.5])
+
+    def test_simulation_streams_records(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            scalar_path = os.path.join(tmp, "scalar.csv")
+            network_path = os.path.join(tmp, "network.csv")
+            with open_sink(scalar_path) as sink:
+                simulation = NodeSimulation(self.protocols, num_cycles=500, energy_initial=0.01,
+                                            energy_threshold=0.005, sink=sink)
+                scalar = simulation.run_simulation(["OpenWSN_AES"])
+            with open_sink(network_path) as sink:
+                simulation.sink = sink
+                simulation.run_network_simulation(num_nodes=3, protocol_names=["OpenWSN_AES"])
+
+            records = next(read_records(scalar_path))
+            lifetime = scalar["OpenWSN_AES"]["Network Lifetime (cycles)"]
+            self.assertEqual(len(records), lifetime)
+            self.assertAlmostEqual(records["energy"].sum(), scalar["OpenWSN_AES"]["Energy Consumption (J)"])
+            self.assertIn("DASH7_AES", set(records["protocol"]))  # The switch is visible in the trace
+            # The network trace shows every node until its last cycle
+            nodes = next(read_records(network_path))
+            self.assertEqual(len(nodes), 3 * lifetime)
+            self.assertEqual(nodes.groupby("node")["cycle"].max().tolist(), [lifetime - 1] * 3)
+    def test_cli_json(self):
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+        output = subprocess.run([sys.executable, "main.py", "--json", "--cycles", "20", "--protocols", "DASH7",
+                                 "--ciphers", "SPECK", "PRESENT"], cwd=root, capture_output=True, text=True,
+                                check=True).stdout
+        results = json.loads(output)  # Progress messages stay off stdout
+        self.assertEqual(set(results), {"DASH7_SPECK", "DASH7_PRESENT"})
+        self.assertEqual(results["DASH7_SPECK"]["Network Lifetime (cycles)"], 20)
+
+        # Plotting and reporting libraries are not loaded unless figures are requested
+        loaded = subprocess.run([sys.executable, "-c", "import sys, main; print(sorted(m for m in sys.modules"
+                                 " if m.split('.')[0] in ('matplotlib', 'seaborn', 'reportlab', 'pandas')))"],
+                                cwd=root, capture_output=True, text=True, check=True).stdout
+        self.assertEqual(loaded.strip(), "[]")
+
+if __name__ == "__main__":
+    unittest.main()